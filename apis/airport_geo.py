@@ -0,0 +1,207 @@
+import heapq
+import math
+import os
+import re
+
+from airport_index import columns
+
+
+# ---------------------------
+# Nearby Airports
+# ---------------------------
+# k-d tree over the airports' positions as unit vectors (x, y, z), so
+# distances behave at the poles and across the antimeridian. Straight-line
+# (chord) distance between unit vectors grows with great-circle distance, so
+# "within R km" and "nearest K" are answered on chords and converted back to
+# km. Only airports with an IATA code are in the data. Queries also skip
+# airports without scheduled passenger service unless commercial=False; a
+# name says little about that (Farnborough or Republic pass any heliport or
+# air base pattern), so the served airports come from a curated list in
+# data/scheduled_airports.txt. Without that file they fall back to
+# NON_COMMERCIAL_RE on the airport name.
+
+EARTH_RADIUS_KM = 6371.0088
+CITY_CLUSTER_KM = 100
+SERVED_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "scheduled_airports.txt")
+# city codes that are not also an airport's code, by the city name in airports.dat
+METRO_CODES = {
+    "PAR": "Paris", "NYC": "New York", "LON": "London", "TYO": "Tokyo", "CHI": "Chicago",
+    "WAS": "Washington", "MIL": "Milan", "ROM": "Rome", "STO": "Stockholm", "OSL": "Oslo",
+    "MOW": "Moscow", "BUE": "Buenos Aires", "SAO": "Sao Paulo", "RIO": "Rio De Janeiro",
+    "SEL": "Seoul", "OSA": "Osaka", "BJS": "Beijing", "YTO": "Toronto", "YMQ": "Montreal",
+    "JKT": "Jakarta", "BUH": "Bucharest", "REK": "Reykjavik", "DTT": "Detroit", "BER": "Berlin",
+    "SPK": "Sapporo", "BHZ": "Belo Horizonte", "TCI": "Tenerife", "QDF": "Dallas",
+}
+NON_COMMERCIAL_RE = re.compile(r"heliport|helipad|seaplane|air ?base|air force base|naval air|army air|\braf\b|\[duplicate\]", re.I)
+
+
+def unit_vector(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_for_km(km):
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def km_for_chord(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(a), 1.0))
+
+
+def load_served(path=SERVED_PATH):
+    """IATA codes with scheduled passenger service; empty if the list is missing."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {code for line in f for code in line.split("#", 1)[0].split()}
+    except FileNotFoundError:
+        return set()
+
+
+class GeoIndex:
+    def __init__(self, airports, served=None):
+        served = load_served() if served is None else set(served)
+        self.airports = airports
+        self.lats, self.lons, iatas, cities, names = columns(airports, "lat", "lon", "iata", "city", "name")
+        self.by_iata = {}
+        self.by_city = {}
+        self.points = []
+        self.minor = set()
+
+        rows = []
+        for i, (lat, lon, iata, city, name) in enumerate(zip(self.lats, self.lons, iatas, cities, names)):
+            self.points.append(unit_vector(lat, lon))
+            # 0,0 is what unparsable coordinates come out as
+            if lat == 0.0 and lon == 0.0:
+                continue
+            if (iata not in served) if served else NON_COMMERCIAL_RE.search(name):
+                self.minor.add(i)
+            rows.append(i)
+            self.by_iata.setdefault(iata, i)
+            self.by_city.setdefault(city.lower(), []).append(i)
+
+        self.root = self.build(rows, 0)
+
+    def __len__(self):
+        return len(self.by_iata)
+
+    def build(self, rows, depth):
+        """Node = (row, axis, left, right), split on the median of x, y, z in turn."""
+        if not rows:
+            return None
+        axis = depth % 3
+        rows.sort(key=lambda i: self.points[i][axis])
+        mid = len(rows) // 2
+        return (rows[mid], axis, self.build(rows[:mid], depth + 1), self.build(rows[mid + 1:], depth + 1))
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+
+    def within(self, lat, lon, radius_km, commercial=True):
+        """[(km, row)] for every airport within radius_km, nearest first."""
+        skip = self.minor if commercial else ()
+        q = unit_vector(lat, lon)
+        limit = chord_for_km(radius_km)
+        limit_sq = limit * limit
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            row, axis, left, right = node
+            p = self.points[row]
+            d_sq = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+            if d_sq <= limit_sq and row not in skip:
+                found.append((km_for_chord(math.sqrt(d_sq)), row))
+            diff = q[axis] - p[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            stack.append(near)
+            if abs(diff) <= limit:
+                stack.append(far)
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, k=1, max_km=None, commercial=True):
+        """[(km, row)] for the k closest airports, nearest first."""
+        skip = self.minor if commercial else ()
+        q = unit_vector(lat, lon)
+        bound = chord_for_km(max_km) if max_km is not None else 2.0
+        heap = []  # max-heap on squared chord via negation
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            row, axis, left, right = node
+            p = self.points[row]
+            d_sq = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+            if d_sq <= bound * bound and row not in skip:
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d_sq, row))
+                elif d_sq < -heap[0][0]:
+                    heapq.heapreplace(heap, (-d_sq, row))
+                if len(heap) == k:
+                    bound = min(bound, math.sqrt(-heap[0][0]))
+            diff = q[axis] - p[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # far side first so the near side is popped (and tightens the bound) first
+            if abs(diff) <= bound:
+                stack.append(far)
+            stack.append(near)
+        return sorted((km_for_chord(math.sqrt(-d)), row) for d, row in heap)
+
+    # ---------------------------
+    # Helpers
+    # ---------------------------
+
+    def point_for(self, iata):
+        i = self.by_iata.get((iata or "").strip().upper())
+        return None if i is None else (self.lats[i], self.lons[i])
+
+    def nearby_iata(self, iata, radius_km, limit=3):
+        """The airport itself first, then other airports within radius_km. A
+        city code (PAR) is searched around the city and its own airports are
+        left out, since a search for the city code already covers them."""
+        point = self.point_for(iata)
+        city = None
+        if point is None:
+            city = METRO_CODES.get((iata or "").strip().upper())
+            point = self.city_point(city)
+        if point is None:
+            return [iata]
+        codes = [iata]
+        for _, row in self.within(*point, radius_km):
+            code = self.airports[row]["iata"]
+            if city is not None and self.airports[row]["city"].lower() == city.lower():
+                continue
+            if code not in codes:
+                codes.append(code)
+            if len(codes) >= limit:
+                break
+        return codes
+
+    def nearest_iata(self, lat, lon, max_km=None):
+        hits = self.nearest(lat, lon, 1, max_km)
+        return self.airports[hits[0][1]]["iata"] if hits else None
+
+    def city_point(self, city):
+        """Rough (lat, lon) for a city name from its airports. Same-named
+        cities elsewhere (Paris, Texas) are told apart by keeping the largest
+        group of airports within CITY_CLUSTER_KM of each other."""
+        rows = self.by_city.get((city or "").strip().lower())
+        if not rows:
+            return None
+        best = []
+        for i in rows:
+            group = [j for j in rows
+                     if haversine_km(self.lats[i], self.lons[i], self.lats[j], self.lons[j]) <= CITY_CLUSTER_KM]
+            if len(group) > len(best):
+                best = group
+        return (sum(self.lats[j] for j in best) / len(best), sum(self.lons[j] for j in best) / len(best))
@@ -0,0 +1,118 @@
+from difflib import SequenceMatcher
+import heapq
+
+
+# ---------------------------
+# Airport Index
+# ---------------------------
+# Built once from the AIRPORTS rows so lookups never scan the whole dataset.
+# Exact lookups are plain dict hits; fuzzy city lookups use a trigram
+# inverted index to narrow the candidates before difflib scores them.
+
+FUZZY_CUTOFF = 0.8
+
+
+def normalize(text):
+    return " ".join((text or "").strip().lower().split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def columns(airports, *fields):
+    # AirportTable can decode a single field straight from the mmap
+    if hasattr(airports, "column"):
+        return [airports.column(f) for f in fields]
+    return [[a.get(f, "") for a in airports] for f in fields]
+
+
+class AirportIndex:
+    def __init__(self, airports):
+        self.airports = airports
+        self.by_city = {}
+        self.by_name = {}
+        self.by_icao = {}
+        self.cities = []
+        self.grams = {}
+
+        seen_cities = set()
+        cities, names, icaos = columns(airports, "city", "name", "icao")
+        for i, (city, name, icao) in enumerate(zip(cities, names, icaos)):
+            self.by_city.setdefault(city.lower(), []).append(i)
+            self.by_name.setdefault(normalize(name), []).append(i)
+            icao = (icao or "").upper()
+            if len(icao) == 4:
+                self.by_icao.setdefault(icao, i)
+
+            if city not in seen_cities:
+                seen_cities.add(city)
+                city_id = len(self.cities)
+                self.cities.append(city)
+                for g in trigrams(city.lower()):
+                    self.grams.setdefault(g, []).append(city_id)
+
+    def __len__(self):
+        return len(self.airports)
+
+    def iata_for(self, rows):
+        codes = []
+        for i in rows:
+            code = self.airports[i]["iata"]
+            if code not in codes:
+                codes.append(code)
+        return codes
+
+    def exact_city(self, query):
+        return self.iata_for(self.by_city.get((query or "").strip().lower(), []))
+
+    def exact_name(self, query):
+        return self.iata_for(self.by_name.get(normalize(query), []))
+
+    def exact_icao(self, query):
+        i = self.by_icao.get((query or "").strip().upper())
+        return [] if i is None else [self.airports[i]["iata"]]
+
+    def fuzzy_cities(self, query, n=1, cutoff=FUZZY_CUTOFF):
+        """Same ranking as difflib.get_close_matches over every city, but only
+        scores cities that share at least one trigram with the query."""
+        if not query:
+            return []
+
+        hits = {}
+        for g in trigrams(query.strip().lower()):
+            for city_id in self.grams.get(g, ()):
+                hits[city_id] = hits.get(city_id, 0) + 1
+
+        s = SequenceMatcher()
+        s.set_seq2(query)
+        scored = []
+        for city_id in hits:
+            city = self.cities[city_id]
+            s.set_seq1(city)
+            if s.real_quick_ratio() >= cutoff and \
+               s.quick_ratio() >= cutoff and \
+               s.ratio() >= cutoff:
+                scored.append((s.ratio(), city))
+
+        return [city for _, city in heapq.nlargest(n, scored)]
+
+    def lookup(self, query, limit=5):
+        """Ranked IATA candidates: exact city, exact airport name, ICAO code,
+        then fuzzy city matches."""
+        ranked = []
+
+        def add(codes):
+            for code in codes:
+                if code not in ranked:
+                    ranked.append(code)
+
+        add(self.exact_city(query))
+        add(self.exact_name(query))
+        add(self.exact_icao(query))
+        if len(ranked) < limit:
+            for city in self.fuzzy_cities(query, n=limit):
+                add(self.exact_city(city))
+
+        return ranked[:limit]
@@ -0,0 +1,200 @@
+import csv
+import logging
+import mmap
+import os
+import struct
+import sys
+
+import telemetry
+
+
+# ---------------------------
+# Compiled Airport Dataset
+# ---------------------------
+# `python apis/airport_store.py` compiles data/airports.dat into
+# data/airports.bin: a header, fixed-width records and a deduplicated string
+# table. The file is memory-mapped read-only, so every worker process shares
+# the same pages instead of parsing the CSV into its own dicts.
+# If the compiled file is missing or older than the CSV we fall back to the CSV.
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(ROOT_DIR, "data", "airports.dat")
+BIN_PATH = os.path.join(ROOT_DIR, "data", "airports.bin")
+
+MAGIC = b"AIRPBIN1"
+VERSION = 1
+
+# magic, version, record count, source size, source mtime_ns, strings offset
+HEADER = struct.Struct("<8sIIqqI")
+# (offset, length) for name, city, country, tz; iata; icao; pad; lat; lon
+RECORD = struct.Struct("<IHIHIHIH3s4sxdd")
+
+
+def parse_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def read_csv(path=CSV_PATH):
+    airports = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        for row in reader:
+            # Format: ID, Name, City, Country, IATA, ICAO, Lat, Long, Alt, UTC offset, DST, Tz, ...
+            if len(row) < 5:
+                continue
+            name, city, country, iata = row[1], row[2], row[3], row[4]
+            icao = row[5] if len(row) > 5 and row[5] != r"\N" else ""
+            tz = row[11] if len(row) > 11 and row[11] != r"\N" else ""
+            if iata and iata != r"\N" and len(iata) == 3:
+                airports.append({
+                    "name": name.strip(),
+                    "city": city.strip(),
+                    "country": country.strip(),
+                    "iata": iata.strip().upper(),
+                    "icao": icao.strip().upper(),
+                    "lat": parse_float(row[6]) if len(row) > 6 else 0.0,
+                    "lon": parse_float(row[7]) if len(row) > 7 else 0.0,
+                    "tz": tz.strip()
+                })
+    return airports
+
+
+def compile_airports(src=CSV_PATH, dst=BIN_PATH):
+    airports = read_csv(src)
+    st = os.stat(src)
+
+    strings = bytearray()
+    offsets = {}
+
+    def intern(text):
+        raw = text.encode("utf-8")
+        if raw not in offsets:
+            offsets[raw] = len(strings)
+            strings.extend(raw)
+        return offsets[raw], len(raw)
+
+    records = bytearray()
+    for a in airports:
+        name_off, name_len = intern(a["name"])
+        city_off, city_len = intern(a["city"])
+        country_off, country_len = intern(a["country"])
+        tz_off, tz_len = intern(a["tz"])
+        records += RECORD.pack(
+            name_off, name_len,
+            city_off, city_len,
+            country_off, country_len,
+            tz_off, tz_len,
+            a["iata"].encode("ascii"),
+            a["icao"].encode("ascii")[:4].ljust(4),
+            a["lat"], a["lon"]
+        )
+
+    strings_offset = HEADER.size + len(records)
+    header = HEADER.pack(MAGIC, VERSION, len(airports), st.st_size, st.st_mtime_ns, strings_offset)
+
+    # Write to a temp file and rename so running workers never map a half-written file
+    tmp = dst + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(records)
+        f.write(strings)
+    os.replace(tmp, dst)
+    return len(airports)
+
+
+class AirportTable:
+    """Read-only sequence of airport dicts decoded on demand from the mmap."""
+
+    def __init__(self, buf, count, strings_offset):
+        self.buf = buf
+        self.count = count
+        self.strings_offset = strings_offset
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def column(self, field):
+        """One decoded field for every record, without building row dicts.
+        Repeated strings (cities, countries, timezones) are decoded once."""
+        slot = {"name": 0, "city": 2, "country": 4, "tz": 6, "iata": 8, "icao": 9, "lat": 10, "lon": 11}[field]
+        decoded = {}
+        values = []
+        for rec in RECORD.iter_unpack(self.buf[HEADER.size:HEADER.size + self.count * RECORD.size]):
+            if slot < 8:
+                key = rec[slot]
+                if key not in decoded:
+                    decoded[key] = self.text(key, rec[slot + 1])
+                values.append(decoded[key])
+            elif slot < 10:
+                values.append(rec[slot].decode("ascii").strip())
+            else:
+                values.append(rec[slot])
+        return values
+
+    def text(self, off, length):
+        start = self.strings_offset + off
+        return self.buf[start:start + length].decode("utf-8")
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+
+        (name_off, name_len, city_off, city_len, country_off, country_len,
+         tz_off, tz_len, iata, icao, lat, lon) = RECORD.unpack_from(self.buf, HEADER.size + i * RECORD.size)
+
+        return {
+            "name": self.text(name_off, name_len),
+            "city": self.text(city_off, city_len),
+            "country": self.text(country_off, country_len),
+            "iata": iata.decode("ascii"),
+            "icao": icao.decode("ascii").strip(),
+            "lat": lat,
+            "lon": lon,
+            "tz": self.text(tz_off, tz_len)
+        }
+
+
+def open_compiled(src=CSV_PATH, dst=BIN_PATH):
+    try:
+        st = os.stat(src)
+        with open(dst, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buf) < HEADER.size:
+        buf.close()
+        return None
+
+    magic, version, count, src_size, src_mtime_ns, strings_offset = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION or src_size != st.st_size or src_mtime_ns != st.st_mtime_ns:
+        buf.close()
+        return None
+
+    return AirportTable(buf, count, strings_offset)
+
+
+def load_airports(src=CSV_PATH, dst=BIN_PATH):
+    table = open_compiled(src, dst)
+    if table is not None:
+        return table
+
+    telemetry.log_event("airports_bin_stale", level=logging.WARNING, src=src, dst=dst)
+    return read_csv(src)
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else CSV_PATH
+    dst = sys.argv[2] if len(sys.argv) > 2 else BIN_PATH
+    telemetry.configure_logging()
+    n = compile_airports(src, dst)
+    telemetry.log_event("airports_compiled", airports=n, dst=dst, bytes=os.path.getsize(dst))
@@ -1,24 +1,160 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from poi_tiles import PoiTileCache
+from rate_limiter import RateGovernor
+import telemetry
+from token_manager import TokenManager
+from ttl_cache import SqliteStore
+
+# statuses worth retrying for idempotent GETs
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# hotel offers are requested this many hotel ids at a time
+HOTEL_IDS_PER_REQUEST = 20
+
+# most POIs asked for per cached activity tile (see poi_tiles.py)
+POIS_PER_TILE = 100
+
+
+# "100-300", "-300" or "100-" -> (min, max), either side may be None
+def parse_price_range(price_range):
+    if not price_range:
+        return None, None
+    low, _, high = str(price_range).partition("-")
+    return (float(low) if low.strip() else None,
+            float(high) if high.strip() else None)
+
+
+def cheapest_offer(hotel):
+    prices = [float(o["price"]["total"]) for o in hotel.get("offers", []) if o.get("price", {}).get("total")]
+    return min(prices) if prices else float("inf")
 
 class AmadeusAPI:
-    def __init__(self, client_id, client_secret):
+    # all requests share one pooled session, so connections (and TLS handshakes) are reused between calls.
+    # GETs are retried with jittered exponential backoff on connection errors, 429 and 5xx responses
+    # note: requests only speaks HTTP/1.1, keep-alive is what we get from the pool
+    def __init__(self, client_id, client_secret,
+                 base_url="https://test.api.amadeus.com",
+                 auth_url="https://api.amadeus.com",
+                 pool_size=10,
+                 max_retries=3,
+                 backoff=0.5,
+                 max_backoff=8.0,
+                 timeout=30,
+                 token_cache_path=None,
+                 poi_tile_deg=0.1,
+                 poi_ttl=24 * 3600,
+                 poi_cache_path=None,
+                 rate_limits=None):
         self.client_id = client_id
         self.client_secret = client_secret
-        self.get_access_token()
+        self.base_url = base_url.rstrip("/")
+        self.auth_url = auth_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        # client-side pacing per endpoint family (shopping, reference-data, booking); bookings jump the queue.
+        # pass one RateGovernor to every AmadeusAPI that shares the same key
+        self.limits = rate_limits if rate_limits is not None else RateGovernor.from_env()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # token_cache_path lets worker processes share one token through a small file
+        self.tokens = TokenManager(self.get_access_token,
+                                   cache_path=token_cache_path,
+                                   cache_key=f"{self.auth_url}|{client_id}")
+        self.tokens.token()
+
+        # activity searches are answered from cached grid tiles; poi_cache_path keeps them across restarts
+        self.poi_tiles = PoiTileCache(self.fetch_pois, tile_deg=poi_tile_deg, ttl=poi_ttl,
+                                      store=SqliteStore(poi_cache_path, "poi_tiles") if poi_cache_path else None)
+
+    @property
+    def access_token(self):
+        return self.tokens.token()
+
+    def close(self):
+        self.tokens.stop()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # full jitter: sleep a random amount up to backoff * 2^attempt, unless the server told us how long to wait
+    def backoff_delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(float(retry_after), 60.0)
+            except ValueError:
+                try:
+                    wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(wait, 0.0), 60.0)
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def request(self, method, url, retry_auth=True, priority=None, **kwargs):
+        attempts = self.max_retries + 1 if method == "GET" else 1
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            self.limits.acquire(url, priority)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                telemetry.record_upstream(url, type(e).__name__, time.perf_counter() - start)
+                if last:
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+                continue
+            # status codes and latency per endpoint family end up on /metrics
+            telemetry.record_upstream(url, response.status_code, time.perf_counter() - start)
+
+            # expired or revoked token: refresh once and replay the request
+            headers = kwargs.get("headers") or {}
+            if response.status_code == 401 and retry_auth and "Authorization" in headers:
+                stale = headers["Authorization"].split(" ", 1)[-1]
+                kwargs["headers"] = dict(headers, Authorization=f"Bearer {self.tokens.refresh(stale)}")
+                return self.request(method, url, retry_auth=False, priority=priority, **kwargs)
+
+            if response.status_code not in RETRY_STATUSES or last:
+                return response
+            delay = self.backoff_delay(attempt, response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                # everyone on this endpoint family backs off, not just this call; the next acquire() waits it out
+                self.limits.pause(url, delay)
+            else:
+                time.sleep(delay)
 
     # amadeus requires the user to generate an access token from their client id and client secret before making any requests
-    # if the app runs for too long, a new access token needs to be generated
+    # tokens expire after expires_in seconds; self.tokens calls this again before that happens
     def get_access_token(self):
-        url = "https://api.amadeus.com/v1/security/oauth2/token"
+        url = f"{self.auth_url}/v1/security/oauth2/token"
         params = {
             "grant_type": "client_credentials",
             "client_id": self.client_id,
             "client_secret": self.client_secret
         }
-        response = requests.post(url, params=params)
+        response = self.request("POST", url, params=params)
         if response.json()["state"] != "approved":
             raise Exception("Access token not approved")
-        self.access_token = response.json()["access_token"]
+        return response.json()["access_token"], response.json().get("expires_in", 1799)
 
     # ==============================================
     # FLIGHTS
@@ -27,7 +163,7 @@ class AmadeusAPI:
     # uses Amadeus' Flight Offers Search API to find the best flight for a given departure and arrival airport, departure date, and return date
     def find_best_flights(self, origin, destination, departure_date, adults, currency="USD", non_stop=True):
 
-        url = "https://test.api.amadeus.com/v2/shopping/flight-offers"
+        url = f"{self.base_url}/v2/shopping/flight-offers"
 
         params = {
             "originLocationCode": origin,
@@ -44,13 +180,12 @@ class AmadeusAPI:
             "Accept": "application/json"
         }
 
-        response = requests.get(url, headers=headers, params=params)
-        print(response.status_code)
+        response = self.request("GET", url, headers=headers, params=params)
         return response.json()
 
     # takes a flight_offer json object returned by find_best_flights and confirms its avaiblability and final price
     def confirm_flight_details(self, flight_offer):
-        pricing_url = "https://test.api.amadeus.com/v1/shopping/flight-offers/pricing"
+        pricing_url = f"{self.base_url}/v1/shopping/flight-offers/pricing"
         body = {
             "data": {
                 "type": "flight-offers-pricing",
@@ -65,7 +200,7 @@ class AmadeusAPI:
             "Content-Type": "application/json"
         }
 
-        response = requests.post(pricing_url, headers=headers, json=body)
+        response = self.request("POST", pricing_url, headers=headers, json=body)
         return response.json()
 
     # creates a flight order json object that will be use to book the flight 
@@ -141,7 +276,7 @@ class AmadeusAPI:
             
             """
 
-        booking_url = "https://test.api.amadeus.com/v1/booking/flight-orders"
+        booking_url = f"{self.base_url}/v1/booking/flight-orders"
         body = self.create_flight_order(flight_offer,
                         traveler_id,
                         first_name,
@@ -158,7 +293,7 @@ class AmadeusAPI:
             "Content-Type": "application/json"
         }
 
-        response = requests.post(booking_url, headers=headers, json=body)
+        response = self.request("POST", booking_url, headers=headers, json=body)
         return response.json()
 
     # ==============================================
@@ -167,7 +302,7 @@ class AmadeusAPI:
 
     # searches for hotels in a 
     def search_hotels(self, city_code):
-        hotels_url = "https://test.api.amadeus.com/v3/shopping/hotels/by-city"
+        hotels_url = f"{self.base_url}/v3/shopping/hotels/by-city"
 
         params = {
             # Either provide cityCode or latitude/longitude
@@ -179,28 +314,80 @@ class AmadeusAPI:
             "Accept": "application/json"
         }
 
-        response = requests.get(hotels_url, headers=headers, params=params)
+        response = self.request("GET", hotels_url, headers=headers, params=params)
         return response.json()
 
-    # takes a list of hotel ids and filters them based on the check_in_date, check_out_date, adults, and room_quantity
-    def filter_hotels(self, hotel_ids, check_in_date, check_out_date, adults, room_quantity, price_range):
-        hotel_info_url = "https://test.api.amadeus.com/v3/shopping/hotels/"
+    # fetches offers for one chunk of hotel ids (Amadeus takes them comma separated)
+    def get_hotel_offers(self, hotel_ids, check_in_date, check_out_date, adults, room_quantity, price_range=None):
+        hotel_info_url = f"{self.base_url}/v3/shopping/hotels/"
         params = {
-            "hotelIds": hotel_ids,
+            "hotelIds": ",".join(hotel_ids),
             "checkInDate": check_in_date,
             "checkOutDate": check_out_date,
             "adults": adults,
             "roomQuantity": room_quantity,
-            "priceRange": price_range
         }
+        if price_range:
+            params["priceRange"] = price_range
 
         headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Accept": "application/json"
         }
-        response = requests.get(hotel_info_url, headers=headers, params=params)
+        response = self.request("GET", hotel_info_url, headers=headers, params=params)
         return response.json()
 
+    # splits hotel_ids into upstream-sized chunks, fetches up to max_concurrency chunks at a time and
+    # yields hotels as each chunk finishes (cheapest first within a chunk), keeping only offers inside price_range.
+    # A chunk that fails does not stop the others; its upstream errors (or the exception) are appended to `errors`
+    def iter_hotel_offers(self, hotel_ids, check_in_date, check_out_date, adults, room_quantity, price_range=None,
+                          chunk_size=HOTEL_IDS_PER_REQUEST, max_concurrency=4, errors=None):
+        errors = [] if errors is None else errors
+        low, high = parse_price_range(price_range)
+        chunks = [hotel_ids[i:i + chunk_size] for i in range(0, len(hotel_ids), chunk_size)]
+        if not chunks:
+            return
+
+        pool = ThreadPoolExecutor(max_workers=min(max_concurrency, len(chunks)))
+        try:
+            futures = [
+                pool.submit(self.get_hotel_offers, chunk, check_in_date, check_out_date,
+                            adults, room_quantity, price_range)
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                try:
+                    found = future.result()
+                except Exception as e:  # network, bad JSON, RateLimited: the other chunks still count
+                    errors.append({"title": type(e).__name__, "detail": str(e)})
+                    continue
+                errors.extend(found.get("errors") or [])
+                hotels = []
+                for hotel in found.get("data") or []:
+                    offers = [
+                        o for o in hotel.get("offers", [])
+                        if (low is None or float(o.get("price", {}).get("total", 0)) >= low)
+                        and (high is None or float(o.get("price", {}).get("total", 0)) <= high)
+                    ]
+                    if offers:
+                        hotels.append(dict(hotel, offers=offers))
+                hotels.sort(key=cheapest_offer)
+                yield from hotels
+        finally:
+            # the caller may stop early; don't start chunks nobody will read
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # takes a list of hotel ids and filters them based on the check_in_date, check_out_date, adults, and room_quantity
+    def filter_hotels(self, hotel_ids, check_in_date, check_out_date, adults, room_quantity, price_range):
+        errors = []
+        hotels = list(self.iter_hotel_offers(hotel_ids, check_in_date, check_out_date,
+                                             adults, room_quantity, price_range, errors=errors))
+        hotels.sort(key=cheapest_offer)
+        result = {"data": hotels}
+        if errors:
+            result["errors"] = errors
+        return result
+
     def create_hotel_booking_order(offer_id,
                         guest_id,
                         title,
@@ -272,7 +459,7 @@ class AmadeusAPI:
                                     card_number,
                                     card_expiry_date):
 
-        booking_url = "https://test.api.amadeus.com/v1/booking/hotel-bookings"
+        booking_url = f"{self.base_url}/v1/booking/hotel-bookings"
         
 
         body = self.create_hotel_booking_order(offer_id,
@@ -291,7 +478,7 @@ class AmadeusAPI:
             "Content-Type": "application/json"
         }
 
-        response = requests.post(booking_url, headers=headers, json=body)
+        response = self.request("POST", booking_url, headers=headers, json=body)
         return response.json()
 
 
@@ -305,27 +492,32 @@ class AmadeusAPI:
             start_datetime,
             passengers,
             transfer_type="PRIVATE",
-            currency="USD"
+            currency="USD",
+            end_geo=None,
+            priority=None
             ):
 
-        url = "https://test.api.amadeus.com/v1/shopping/transfers"
+        url = f"{self.base_url}/v1/shopping/transfers"
 
         params = {
             "startLocationCode": start_location,
-            "endLocationCode": end_location,
             "startDateTime": start_datetime,
             "passengers": passengers,
             "transferType": transfer_type,
             "currency": currency
         }
+        # a hotel is usually given by position (end_geo=(lat, lon)) rather than a location code
+        if end_location:
+            params["endLocationCode"] = end_location
+        if end_geo:
+            params["endGeoCode"] = f"{end_geo[0]},{end_geo[1]}"
 
         headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Accept": "application/json"
         }
 
-        response = requests.get(url, headers=headers, params=params)
-        print(response.status_code)
+        response = self.request("GET", url, headers=headers, params=params, priority=priority)
         return response.json()
 
     def create_transfer_booking_order(transfer_offer,
@@ -379,7 +571,7 @@ class AmadeusAPI:
                             phone_country_code,
                             phone_number
                         ):
-        booking_url = "https://test.api.amadeus.com/v1/booking/transfers"
+        booking_url = f"{self.base_url}/v1/booking/transfers"
         body = self.create_transfer_booking_order(transfer_offer,
                             first_name,
                             last_name,
@@ -391,7 +583,7 @@ class AmadeusAPI:
             "Content-Type": "application/json"
         }
 
-        response = requests.post(booking_url, headers=headers, json=body)
+        response = self.request("POST", booking_url, headers=headers, json=body)
         return response.json()
 
     #==============================================
@@ -400,7 +592,7 @@ class AmadeusAPI:
 
     # gets longitude and latitude for a given city
     def get_city_coordinates(self, city_name):
-        url = "https://test.api.amadeus.com/v1/reference-data/locations/cities"
+        url = f"{self.base_url}/v1/reference-data/locations/cities"
         params = {
             "keyword": city_name
         }
@@ -408,13 +600,18 @@ class AmadeusAPI:
             "Authorization": f"Bearer {self.access_token}",
             "Accept": "application/json"}
 
-        response = requests.get(url, headers=headers, params=params)
+        response = self.request("GET", url, headers=headers, params=params)
         return response.json()
 
 
-    # finds activities in a given area by longitude and latitude
+    # finds activities in a given area by longitude and latitude; only tiles of the area that are not cached yet
+    # are fetched from Amadeus, so repeat itineraries for the same city cost no upstream calls
     def find_activities(self, north, south, east, west, categories=None, limit=20):
-        url = "https://test.api.amadeus.com/v1/reference-data/locations/pois/by-square"
+        return {"data": self.poi_tiles.find(north, south, east, west, categories, limit)}
+
+    # raw pois/by-square call for one box (all categories), used to fill the tile cache
+    def fetch_pois(self, north, south, east, west, limit=POIS_PER_TILE):
+        url = f"{self.base_url}/v1/reference-data/locations/pois/by-square"
 
         params = {
             "north": north,
@@ -424,14 +621,10 @@ class AmadeusAPI:
             "page[limit]": limit
         }
 
-        if categories:
-            params["categories"] = categories
-
         headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Accept": "application/json"
         }
 
-        response = requests.get(url, headers=headers, params=params)
-        print(response.status_code)
-        return response.json()
\ No newline at end of file
+        response = self.request("GET", url, headers=headers, params=params)
+        return response.json().get("data") or []
\ No newline at end of file
@@ -0,0 +1,116 @@
+import asyncio
+import importlib.util
+import os
+import time
+
+try:
+    import httpx
+except ImportError:  # only needed for the async serving mode
+    httpx = None
+
+from rate_limiter import RateLimited
+import telemetry
+
+
+# ---------------------------
+# Async Amadeus Client
+# ---------------------------
+# The subset of the Amadeus API that /api/flights needs (location lookup and
+# flight offer search), on one shared httpx.AsyncClient so a single process
+# can keep hundreds of searches in flight. HTTP/2 is used when the `h2`
+# package is installed. Reads the same AMADEUS_* environment variables as
+# the SDK client in flight_api.py, and waits on the same RateGovernor when
+# one is passed in.
+
+
+class AmadeusError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(f"[{status}] {detail}")
+        self.status = status
+
+
+def base_url_from_env():
+    host = os.getenv("AMADEUS_HOST")
+    if not host:
+        return "https://test.api.amadeus.com"
+    ssl = os.getenv("AMADEUS_SSL", "true").lower() not in ("0", "false", "no")
+    port = int(os.getenv("AMADEUS_PORT", "443" if ssl else "80"))
+    return f"{'https' if ssl else 'http'}://{host}:{port}"
+
+
+class AsyncAmadeus:
+    def __init__(self, client_id, client_secret, base_url=None, max_connections=200, timeout=30.0, limits=None):
+        if httpx is None:
+            raise RuntimeError("The async serving mode needs httpx: pip install httpx")
+
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.limits = limits
+        self.client = httpx.AsyncClient(
+            base_url=base_url or base_url_from_env(),
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout
+        )
+        self.access_token = None
+        self.expires_at = 0.0
+        self.token_lock = asyncio.Lock()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def token(self, stale=None):
+        if self.access_token and self.access_token != stale and time.time() < self.expires_at - 60:
+            return self.access_token
+        async with self.token_lock:
+            # another request may have refreshed it while we waited
+            if self.access_token and self.access_token != stale and time.time() < self.expires_at - 60:
+                return self.access_token
+            resp = await self.client.post("/v1/security/oauth2/token", data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret
+            })
+            if resp.status_code != 200:
+                raise AmadeusError(resp.status_code, resp.text)
+            body = resp.json()
+            self.access_token = body["access_token"]
+            self.expires_at = time.time() + float(body.get("expires_in", 1799))
+            return self.access_token
+
+    async def get(self, path, params, priority=None):
+        if self.limits is not None:
+            try:
+                await self.limits.acquire_async(path, priority)
+            except RateLimited as e:
+                raise AmadeusError(429, str(e)) from e
+        start = time.perf_counter()
+        try:
+            token = await self.token()
+            resp = await self.client.get(path, params=params, headers={"Authorization": f"Bearer {token}"})
+            if resp.status_code == 401:
+                token = await self.token(stale=token)
+                resp = await self.client.get(path, params=params, headers={"Authorization": f"Bearer {token}"})
+        except httpx.HTTPError as e:
+            telemetry.record_upstream(path, type(e).__name__, time.perf_counter() - start)
+            # network failures surface like the SDK's NetworkError
+            raise AmadeusError(None, f"{type(e).__name__}: {e}") from e
+        telemetry.record_upstream(path, resp.status_code, time.perf_counter() - start)
+        if resp.status_code >= 400:
+            raise AmadeusError(resp.status_code, resp.text)
+        return resp.json()
+
+    async def locations(self, keyword, sub_type="CITY,AIRPORT", limit=10):
+        body = await self.get("/v1/reference-data/locations", {
+            "keyword": keyword,
+            "subType": sub_type,
+            "page[limit]": limit
+        })
+        return body.get("data") or []
+
+    async def flight_offers(self, params, priority=None):
+        body = await self.get("/v2/shopping/flight-offers", params, priority)
+        return {
+            "data": body.get("data") or [],
+            "dictionaries": body.get("dictionaries", {})
+        }
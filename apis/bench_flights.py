@@ -0,0 +1,145 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from stub_amadeus import StubServer
+
+
+# ---------------------------
+# /api/flights Load Benchmark
+# ---------------------------
+# Starts the Amadeus stub, points flight_api.py at it, serves the Flask app on
+# a local threaded server and drives POST /api/flights at a fixed concurrency.
+# Reports RPS, p50/p95/p99 latency and upstream calls per endpoint. Each run
+# is appended to bench_results.jsonl together with the git commit, so numbers
+# can be compared across commits.
+#
+#   python apis/bench_flights.py --requests 500 --concurrency 16 --latency-ms 150
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_results.jsonl")
+
+DESTINATIONS = ["Paris", "Tokyo", "London", "Rome", "Madrid", "Berlin", "Lisbon", "Dublin",
+                "Athens", "Vienna", "Prague", "Oslo", "Denver", "Miami", "Chicago", "Seattle"]
+
+
+def git_commit():
+    try:
+        # the repo this file lives in, wherever the benchmark is run from
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def start_app(stub):
+    os.environ.setdefault("AMADEUS_CLIENT_ID", "bench")
+    os.environ.setdefault("AMADEUS_CLIENT_SECRET", "bench")
+    os.environ["AMADEUS_HOST"] = stub.server_address[0]
+    os.environ["AMADEUS_PORT"] = str(stub.server_address[1])
+    os.environ["AMADEUS_SSL"] = "false"
+    os.environ.setdefault("RESULT_SINK", "none")
+    # the stub has no quota; measure the app, not the client-side rate limit
+    for family in ("SHOPPING", "REFERENCE_DATA", "BOOKING"):
+        os.environ.setdefault(f"AMADEUS_RATE_{family}", "100000")
+
+    from werkzeug.serving import make_server
+    import flight_api
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    server = make_server("127.0.0.1", 0, flight_api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for /api/flights")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--distinct", type=int, default=8, help="number of distinct destinations in the mix")
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    stub = StubServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate).start()
+    server, base_url = start_app(stub)
+
+    destinations = DESTINATIONS[:max(1, args.distinct)]
+    local = threading.local()
+
+    def one(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        body = {
+            "origin": "JFK",
+            "destination": destinations[i % len(destinations)],
+            "dates": "2026-06-01 to 2026-06-08",
+            "budget": ""
+        }
+        start = time.perf_counter()
+        resp = session.post(f"{base_url}/api/flights", json=body)
+        return time.perf_counter() - start, resp.status_code
+
+    # one untimed request so lazy loading (airports, tokens) is not in the numbers
+    one(0)
+    stub.reset_counts()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [t * 1000 for t, status in results if status == 200]
+    report = {
+        "commit": git_commit(),
+        "label": args.label,
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "config": {k: v for k, v in vars(args).items() if k not in ("label", "no_save")},
+        "rps": round(len(results) / elapsed, 1),
+        "ok": len(latencies),
+        "errors": len(results) - len(latencies),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) or 0, 2),
+            "p95": round(percentile(latencies, 95) or 0, 2),
+            "p99": round(percentile(latencies, 99) or 0, 2),
+            "mean": round(statistics.fmean(latencies), 2) if latencies else None
+        },
+        "upstream_calls": stub.upstream_calls()
+    }
+
+    print(json.dumps(report, indent=2))
+    if not args.no_save:
+        with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+
+    server.shutdown()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from amadeus_api import AmadeusAPI
+from rate_limiter import RateGovernor, FAMILIES
+from stub_amadeus import StubServer
+
+
+# ---------------------------
+# HTTP Client Benchmark
+# ---------------------------
+# Compares a fresh connection per call (module-level requests.get, the old
+# behavior) against AmadeusAPI's pooled keep-alive session, using the local
+# stub so no real quota is spent.
+#
+#   python apis/bench_http.py [calls] [threads]
+
+
+def run(label, fn, calls, threads):
+    start = time.perf_counter()
+    if threads == 1:
+        for _ in range(calls):
+            fn()
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(lambda _: fn(), range(calls)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {calls / elapsed:8.0f} req/s   {elapsed / calls * 1000:6.2f} ms/req")
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    server = StubServer().start()
+    api = AmadeusAPI("id", "secret", base_url=server.url, auth_url=server.url, pool_size=max(threads, 10),
+                     rate_limits=RateGovernor({f: {"rate": 100000} for f in FAMILIES}))
+    url = f"{server.url}/v1/reference-data/locations/cities"
+    params = {"keyword": "PARIS"}
+
+    print(f"{calls} calls, {threads} thread(s)")
+    run("requests.get (no pool)", lambda: requests.get(url, params=params), calls, threads)
+    run("AmadeusAPI pooled session", lambda: api.get_city_coordinates("PARIS"), calls, threads)
+
+    api.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
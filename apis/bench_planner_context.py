@@ -0,0 +1,87 @@
+import json
+import os
+import sys
+
+import offer_summary
+import planner_context
+
+
+# ---------------------------
+# Planner Context Size Benchmark
+# ---------------------------
+# Bytes and tokens of the trip data handed to the LLM planner, for the raw
+# aggregated payloads, the summarized flight offers and the compact
+# planner_context encodings, on the sample payloads in stub_data/. Token
+# counts are exact with tiktoken installed (cl100k_base), else estimated.
+#
+#   python apis/bench_planner_context.py [budget]
+
+STUB_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_data")
+
+TRIP = {
+    "origin": "JFK", "destination": "CDG", "depart_date": "2026-06-01", "return_date": "2026-06-08",
+    "city_code": "PAR", "city_name": "Paris", "adults": 1, "rooms": 1
+}
+
+
+def load(name):
+    with open(os.path.join(STUB_DATA, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sample_itinerary(hotels=20):
+    """An itinerary shaped like TripPlanner.plan() output. The sample hotel
+    offer is repeated under the names of the first `hotels` city hotels."""
+    offer = load("hotel_offers.json")["data"][0]
+    listing = load("hotels_by_city.json")["data"][:hotels]
+    hotel_offers = []
+    for i, entry in enumerate(listing):
+        copy = json.loads(json.dumps(offer))
+        copy["hotel"].update(hotelId=entry["hotelId"], name=entry["name"])
+        for o in copy.get("offers") or []:
+            o["price"]["total"] = f"{float(o['price']['total']) + 17 * i:.2f}"
+        hotel_offers.append(copy)
+    return {
+        "query": TRIP,
+        "flights": load("flight_offers.json"),
+        "hotels": {"data": hotel_offers},
+        "activities": {"data": load("pois.json")["data"]},
+        "transfers": load("transfers.json"),
+        "errors": {}
+    }
+
+
+def summarized(itinerary):
+    """The previous planner input: summarized flights, other sections raw."""
+    flights = itinerary["flights"]
+    summaries = [offer_summary.summarize(o, flights["dictionaries"]).to_dict() for o in flights["data"]]
+    return offer_summary.dumps(dict(itinerary, flights=summaries)).decode()
+
+
+def main():
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    itinerary = sample_itinerary()
+    raw = json.dumps(itinerary)
+
+    encodings = [
+        ("raw aggregated JSON", raw),
+        ("summarized flights JSON", summarized(itinerary)),
+        ("compact JSON", planner_context.compact(itinerary, fmt="json").text),
+        ("compact text", planner_context.compact(itinerary).text),
+    ]
+    fitted = planner_context.compact(itinerary, budget=budget)
+    encodings.append((f"compact text, {budget} tokens", fitted.text))
+
+    counter = "tiktoken cl100k_base" if planner_context.ENCODING is not None else "estimate"
+    print(f"{len(itinerary['flights']['data'])} flights, {len(itinerary['hotels']['data'])} hotels, "
+          f"{len(itinerary['activities']['data'])} activities, tokens: {counter}")
+    raw_bytes, raw_tokens = len(raw.encode()), planner_context.count_tokens(raw)
+    for label, text in encodings:
+        size, tokens = len(text.encode()), planner_context.count_tokens(text)
+        print(f"{label:<30} {size:8d} bytes ({1 - size / raw_bytes:6.1%} less) "
+              f"{tokens:7d} tokens ({1 - tokens / raw_tokens:6.1%} less)")
+    print(f"rows kept under the budget: {fitted.rows}{'' if fitted.fits else ' (over budget)'}")
+
+
+if __name__ == "__main__":
+    main()
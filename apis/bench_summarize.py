@@ -0,0 +1,124 @@
+import json
+import os
+import sys
+import timeit
+
+import offer_summary
+
+
+# ---------------------------
+# Offer Summarization Micro-benchmark
+# ---------------------------
+# Times offer_summary against the previous multi-pass summarize_offer (kept
+# below as the baseline) on the sample flight offers in stub_data/, with
+# the payload repeated up to `offers` entries (Amadeus allows max=250).
+#
+#   python apis/bench_summarize.py [offers]
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_data", "flight_offers.json")
+
+
+# ---------------------------
+# Baseline (previous implementation)
+# ---------------------------
+
+def extract_flight_codes(offer):
+    codes = []
+    for itin in offer.get("itineraries", []):
+        for seg in itin.get("segments", []):
+            carrier = seg.get("carrierCode")
+            number = seg.get("number")
+            if carrier and number:
+                codes.append(f"{carrier} {number}")
+    return codes
+
+
+def count_stops(itinerary):
+    segments = itinerary.get("segments", [])
+    return max(0, len(segments) - 1)
+
+
+def summarize_itinerary(itin, dictionaries):
+    if not itin:
+        return None
+
+    segs = itin.get("segments", [])
+    first = segs[0] if segs else None
+    last = segs[-1] if segs else None
+
+    carrier_codes = []
+    for s in segs:
+        cc = s.get("carrierCode")
+        if cc and cc not in carrier_codes:
+            carrier_codes.append(cc)
+
+    carrier_dict = dictionaries.get("carriers", {}) if dictionaries else {}
+    airline_names = [carrier_dict.get(cc, cc) for cc in carrier_codes]
+
+    return {
+        "from": first.get("departure", {}).get("iataCode") if first else None,
+        "to": last.get("arrival", {}).get("iataCode") if last else None,
+        "departAt": first.get("departure", {}).get("at") if first else None,
+        "arriveAt": last.get("arrival", {}).get("at") if last else None,
+        "stops": count_stops(itin),
+        "duration": itin.get("duration"),
+        "airlines": airline_names,
+        "carrierCodes": carrier_codes,
+    }
+
+
+def summarize_offer(offer, dictionaries):
+    itineraries = offer.get("itineraries", [])
+    outbound = itineraries[0] if len(itineraries) > 0 else None
+    inbound = itineraries[1] if len(itineraries) > 1 else None
+
+    return {
+        "id": offer.get("id"),
+        "price": {
+            "total": offer.get("price", {}).get("total"),
+            "currency": offer.get("price", {}).get("currency")
+        },
+        "flightCodes": extract_flight_codes(offer),
+        "outbound": summarize_itinerary(outbound, dictionaries),
+        "inbound": summarize_itinerary(inbound, dictionaries)
+    }
+
+
+# ---------------------------
+# Runs
+# ---------------------------
+
+def baseline(data, dictionaries):
+    return json.dumps([summarize_offer(o, dictionaries) for o in data]).encode("utf-8")
+
+
+def current(data, dictionaries):
+    return offer_summary.dumps([offer_summary.summarize(o, dictionaries).to_dict() for o in data])
+
+
+def current_sorted(data, dictionaries):
+    summaries = offer_summary.sort_summaries([offer_summary.summarize(o, dictionaries) for o in data], "duration")
+    return offer_summary.dumps([s.to_dict() for s in summaries])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    with open(DATA, encoding="utf-8") as f:
+        recorded = json.load(f)
+    data = (recorded["data"] * (n // len(recorded["data"]) + 1))[:n]
+    dictionaries = recorded["dictionaries"]
+
+    # same output as before, byte for byte once parsed
+    assert json.loads(baseline(data, dictionaries)) == json.loads(current(data, dictionaries))
+
+    print(f"{n} offers, serializer: {'orjson' if offer_summary.orjson else 'json'}")
+    for label, fn in [("baseline summarize + json", baseline),
+                      ("offer_summary + dumps", current),
+                      ("offer_summary + sort + dumps", current_sorted)]:
+        runs = 50
+        best = min(timeit.repeat(lambda: fn(data, dictionaries), number=runs, repeat=5)) / runs
+        print(f"{label:<30} {best * 1000:7.3f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+
+# ---------------------------
+# Flexible Date Search
+# ---------------------------
+# Expands a depart/return date pair into a ±N day grid and runs one search
+# per cell with bounded concurrency. Cells come back in completion order so
+# the caller can stream them; the search function is expected to go through
+# the shared result cache (and the low-priority rate limit lane on cache misses).
+
+
+def date_grid(depart_date, return_date=None, window=3):
+    """All (depart, return) pairs within ±window days, keeping return after
+    depart and never departing in the past. One-way trips vary only depart."""
+    depart = date.fromisoformat(depart_date)
+    ret = date.fromisoformat(return_date) if return_date else None
+    today = date.today()
+
+    cells = []
+    for d in range(-window, window + 1):
+        dep = depart + timedelta(days=d)
+        if dep < today:
+            continue
+        if ret is None:
+            cells.append((dep.isoformat(), None))
+            continue
+        for r in range(-window, window + 1):
+            back = ret + timedelta(days=r)
+            if back > dep:
+                cells.append((dep.isoformat(), back.isoformat()))
+    return cells
+
+
+def cheapest(offers):
+    best = None
+    for o in offers:
+        try:
+            total = float(o["price"]["total"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if best is None or total < best["total"]:
+            best = {"total": total, "currency": o["price"].get("currency"), "offer_id": o.get("id")}
+    return best
+
+
+class FlexScheduler:
+    def __init__(self, search, max_concurrency=4):
+        """search(depart_date, return_date) -> list of raw offers."""
+        self.search = search
+        self.max_concurrency = max_concurrency
+
+    def run(self, cells):
+        """Yields one price calendar cell per unique (depart, return) pair,
+        as soon as its search completes."""
+        unique = list(dict.fromkeys(cells))
+        if not unique:
+            return
+
+        pool = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(unique)), thread_name_prefix="flex")
+        try:
+            futures = {pool.submit(self.search, dep, ret): (dep, ret) for dep, ret in unique}
+            for future in as_completed(futures):
+                dep, ret = futures[future]
+                cell = {"depart_date": dep, "return_date": ret}
+                try:
+                    offers = future.result()
+                    cell["offers"] = len(offers)
+                    cell["cheapest"] = cheapest(offers)
+                except Exception as e:
+                    cell["error"] = str(e)
+                yield cell
+        finally:
+            # client went away: don't start the remaining searches
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def calendar_summary(cells):
+    priced = [c for c in cells if c.get("cheapest")]
+    best = min(priced, key=lambda c: c["cheapest"]["total"]) if priced else None
+    return {
+        "cells": sorted(cells, key=lambda c: (c["depart_date"], c["return_date"] or "")),
+        "cheapest": best
+    }
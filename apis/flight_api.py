@@ -1,43 +1,172 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Blueprint, Flask, Response, g, request, jsonify, render_template, stream_with_context
 from amadeus import Client, ResponseError
+import requests
 import os, re
-import csv
-import os
-from difflib import get_close_matches
-import json
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from airport_index import AirportIndex, normalize
+from airport_geo import GeoIndex
+import airport_store
+from ttl_cache import TTLCache, SqliteStore, MISSING
+from search_cache import SearchCache
+from search_refresh import SearchRefresher
+from result_sink import BackgroundWriter, make_sink
+from rate_limiter import RateGovernor, RateLimited, LOW
+from flex_search import FlexScheduler, date_grid, calendar_summary
+from static_assets import AssetBundle, compress
+from transfer_prefetch import TransferQuotes, QuoteError, arrival_bucket, parse_place, place_text
+from amadeus_api import AmadeusAPI
+import offer_summary
+import offer_ranking
+import telemetry
+from telemetry import span
 
 
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 AIRPORTS = []
 AIRPORTS_LOADED = False
+AIRPORT_INDEX = None
+GEO_INDEX = None
+
+# Each search is appended to a log by a background thread (see result_sink.py).
+# RESULT_SINK is "jsonl" (default), "sqlite" or "none".
+RESULT_SINK = os.getenv("RESULT_SINK", "jsonl")
+RESULTS_PATH = os.getenv("RESULT_SINK_PATH") or os.path.join(
+    os.path.dirname(__file__), "flight_results.db" if RESULT_SINK == "sqlite" else "flight_results.jsonl"
+)
+RESULT_WRITER = BackgroundWriter(
+    lambda: make_sink(RESULT_SINK, RESULTS_PATH, fsync=os.getenv("RESULT_SINK_FSYNC", "batch"))
+)
 
-RESULTS_PATH = os.path.join(os.path.dirname(__file__), "flight_results.json")
-
-# Always create/clear file on startup
-with open(RESULTS_PATH, "w", encoding="utf-8") as f:
-    json.dump({"query": {}, "results": []}, f, indent=2)
-
-print("Initialized flight_results.json at:", RESULTS_PATH)
-
-
+# Routes live on a blueprint; create_app() builds the Flask app around it
+bp = Blueprint("flights", __name__)
+APP = None
 
-app = Flask(__name__)
 # Serve frontend files from the repo root (one level up from /apis)
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Precompressed, content-hashed copies (see static_assets.py); STATIC_AUTO_RELOAD=1
+# picks up edits to the files without a restart
+ASSETS = None
+
+# Everything built lazily (airports, clients, assets) is built under this lock
+INIT_LOCK = threading.RLock()
 
 
 # ---------------------------
 # Amadeus Client
 # ---------------------------
-amadeus = Client(
-    client_id=os.getenv("AMADEUS_CLIENT_ID"),
-    client_secret=os.getenv("AMADEUS_CLIENT_SECRET"),
-    hostname="test"
-)
+# AMADEUS_HOST / AMADEUS_PORT / AMADEUS_SSL point the client somewhere else,
+# e.g. the local stub in stub_amadeus.py for benchmarks
+AMADEUS_OPTIONS = {"hostname": "test"}
+if os.getenv("AMADEUS_HOST"):
+    AMADEUS_OPTIONS.update(
+        host=os.getenv("AMADEUS_HOST"),
+        port=int(os.getenv("AMADEUS_PORT", "443")),
+        ssl=os.getenv("AMADEUS_SSL", "true").lower() not in ("0", "false", "no")
+    )
+
+AMADEUS_CLIENT = None
+# Raw REST client for the endpoints the SDK does not cover (transfers)
+TRANSFER_API = None
+
+# Client-side pacing of every Amadeus call per endpoint family, with a
+# monthly quota if AMADEUS_QUOTA_* is set (see rate_limiter.RateGovernor).
+# Fan-out searches (flex dates, nearby airports) queue in the low lane.
+AMADEUS_LIMITS = RateGovernor.from_env()
+
+# What an upstream call can fail with
+UPSTREAM_ERRORS = (ResponseError, RateLimited)
 
 IATA_RE = re.compile(r"^[A-Z]{3}$")
 
+# Amadeus location lookups keyed by normalized keyword. Set LOCATION_CACHE_DB
+# to a file path to keep the warm cache across restarts.
+LOCATION_CACHE = TTLCache(
+    maxsize=int(os.getenv("LOCATION_CACHE_SIZE", "4096")),
+    ttl=int(os.getenv("LOCATION_CACHE_TTL", "86400")),
+    negative_ttl=int(os.getenv("LOCATION_CACHE_NEGATIVE_TTL", "900")),
+    store=SqliteStore(os.getenv("LOCATION_CACHE_DB"), table="locations") if os.getenv("LOCATION_CACHE_DB") else None
+)
+
+# Location resolution: the Amadeus lookup runs on RESOLVE_POOL while the local
+# index is searched on the request thread. RESOLVE_POLICY picks the answer:
+#   "remote_first"    - use Amadeus when it answers within RESOLVE_REMOTE_TIMEOUT,
+#                       else the local match (default, same answers as before)
+#   "first_confident" - an exact local match (city, airport name, ICAO) wins
+#                       right away; the remote lookup still finishes and warms
+#                       the cache. Fuzzy local matches wait for Amadeus.
+RESOLVE_POLICY = os.getenv("RESOLVE_POLICY", "remote_first")
+RESOLVE_REMOTE_TIMEOUT = float(os.getenv("RESOLVE_REMOTE_TIMEOUT", "5"))
+RESOLVE_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("RESOLVE_POOL_SIZE", "16")), thread_name_prefix="resolve")
+
+# Flight offer results, fresh for SEARCH_CACHE_TTL seconds. Identical
+# concurrent searches share one upstream call. For SEARCH_STALE_TTL seconds
+# after that a result is served stale when a refresh takes longer than
+# SEARCH_FRESH_TIMEOUT or fails.
+SEARCH_CACHE = SearchCache(
+    ttl=int(os.getenv("SEARCH_CACHE_TTL", "300")),
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "512")),
+    stale_ttl=int(os.getenv("SEARCH_STALE_TTL", "1800")),
+    fresh_timeout=float(os.getenv("SEARCH_FRESH_TIMEOUT", "2"))
+)
+
+# The SEARCH_REFRESH_TOP most popular searches are re-fetched up to
+# SEARCH_REFRESH_LEAD seconds before they expire, at most SEARCH_REFRESH_BUDGET
+# upstream calls per hour, in the low-priority lane. Budget 0 turns it off.
+SEARCH_REFRESH_BUDGET = int(os.getenv("SEARCH_REFRESH_BUDGET", "120"))
+SEARCH_REFRESHER = SearchRefresher(
+    SEARCH_CACHE, lambda params: fetch_offers(params, LOW),
+    top_n=int(os.getenv("SEARCH_REFRESH_TOP", "20")),
+    budget=SEARCH_REFRESH_BUDGET,
+    lead=int(os.getenv("SEARCH_REFRESH_LEAD", "60"))
+) if SEARCH_REFRESH_BUDGET > 0 else None
+
+# Flexible-date searches: at most FLEX_MAX_WINDOW days either side and
+# FLEX_CONCURRENCY searches at once per request. Their cache misses wait in
+# the governor's low-priority lane, behind direct searches.
+FLEX_MAX_WINDOW = int(os.getenv("FLEX_MAX_WINDOW", "3"))
+FLEX_CONCURRENCY = int(os.getenv("FLEX_CONCURRENCY", "4"))
+
+# Each search asks Amadeus for SEARCH_PAGE_SIZE offers once (up to 250) and
+# ranks them locally; the response carries the top `limit` (default 5). The
+# cache key only covers the upstream params, so re-ranking is free.
+SEARCH_PAGE_SIZE = max(1, min(int(os.getenv("SEARCH_PAGE_SIZE", "50")), 250))
+
+# "nearbyKm" in a search body adds up to NEARBY_MAX_AIRPORTS airports within
+# that distance (capped at NEARBY_MAX_KM) on each end; every origin/destination
+# pair is searched and the offers are ranked together.
+NEARBY_MAX_KM = float(os.getenv("NEARBY_MAX_KM", "300"))
+NEARBY_MAX_AIRPORTS = int(os.getenv("NEARBY_MAX_AIRPORTS", "3"))
+COORDS_RE = re.compile(r"^\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*$")
+
+# "transferTo" (the hotel) in a search body starts transfer quotes from the
+# arrival airport of the TRANSFER_PREFETCH_TOP best offers in the background;
+# arrivals within the same TRANSFER_BUCKET_MINUTES share one quote, cached for
+# TRANSFER_QUOTE_TTL seconds. POST /api/transfers then answers from the cache.
+TRANSFER_PREFETCH_TOP = int(os.getenv("TRANSFER_PREFETCH_TOP", "3"))
+TRANSFER_QUOTE_TIMEOUT = float(os.getenv("TRANSFER_QUOTE_TIMEOUT", "20"))
+TRANSFER_QUOTES = TransferQuotes(
+    lambda *args: fetch_transfers(*args),
+    bucket_minutes=int(os.getenv("TRANSFER_BUCKET_MINUTES", "30")),
+    ttl=int(os.getenv("TRANSFER_QUOTE_TTL", "1800"))
+)
+TRANSFER_ERRORS = (QuoteError, RateLimited, requests.RequestException)
+
+# Cache, background writer and rate limiter stats as /metrics gauges
+telemetry.REGISTRY.register_stats("flights_cache", "cache", lambda: {
+    "locations": LOCATION_CACHE.stats(),
+    "searches": SEARCH_CACHE.stats(),
+    "results": RESULT_WRITER.stats(),
+    "transfers": TRANSFER_QUOTES.stats(),
+    **({"refresh": SEARCH_REFRESHER.stats()} if SEARCH_REFRESHER else {})
+})
+telemetry.REGISTRY.register_stats("amadeus_rate_limit", "family", AMADEUS_LIMITS.metrics)
+
 # ---------------------------
 # Helpers
 # ---------------------------
@@ -51,52 +180,162 @@ def parse_dates(dates_str):
     return None, None
 
 def load_airports():
-    global AIRPORTS_LOADED
+    global AIRPORTS, AIRPORTS_LOADED, AIRPORT_INDEX, GEO_INDEX
     if AIRPORTS_LOADED:
         return
 
-    path = os.path.join(ROOT_DIR, "data", "airports.dat")
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        for row in reader:
-            # Format: ID, Name, City, Country, IATA, ICAO, Lat, Long, ...
-            if len(row) < 5:
-                continue
-            name, city, country, iata = row[1], row[2], row[3], row[4]
-            if iata and iata != r"\N" and len(iata) == 3:
-                AIRPORTS.append({
-                    "name": name.strip(),
-                    "city": city.strip(),
-                    "country": country.strip(),
-                    "iata": iata.strip().upper()
-                })
-
-    AIRPORTS_LOADED = True
+    with INIT_LOCK:
+        if AIRPORTS_LOADED:
+            return
+        # Memory-mapped data/airports.bin when it is up to date, else the CSV
+        AIRPORTS = airport_store.load_airports()
+        AIRPORT_INDEX = AirportIndex(AIRPORTS)
+        GEO_INDEX = GeoIndex(AIRPORTS)
+        AIRPORTS_LOADED = True
+
+def get_amadeus():
+    """The SDK client, built on first use unless startup() already did."""
+    global AMADEUS_CLIENT
+    if AMADEUS_CLIENT is None:
+        with INIT_LOCK:
+            if AMADEUS_CLIENT is None:
+                AMADEUS_CLIENT = Client(
+                    client_id=os.getenv("AMADEUS_CLIENT_ID"),
+                    client_secret=os.getenv("AMADEUS_CLIENT_SECRET"),
+                    **AMADEUS_OPTIONS
+                )
+    return AMADEUS_CLIENT
+
+def get_transfer_api():
+    global TRANSFER_API
+    if TRANSFER_API is None:
+        with INIT_LOCK:
+            if TRANSFER_API is None:
+                base_url = "https://test.api.amadeus.com"
+                if os.getenv("AMADEUS_HOST"):
+                    scheme = "https" if AMADEUS_OPTIONS["ssl"] else "http"
+                    base_url = f"{scheme}://{AMADEUS_OPTIONS['host']}:{AMADEUS_OPTIONS['port']}"
+                TRANSFER_API = AmadeusAPI(os.getenv("AMADEUS_CLIENT_ID"), os.getenv("AMADEUS_CLIENT_SECRET"),
+                                          base_url=base_url, auth_url=base_url, rate_limits=AMADEUS_LIMITS)
+    return TRANSFER_API
+
+def get_assets():
+    global ASSETS
+    if ASSETS is None:
+        with INIT_LOCK:
+            if ASSETS is None:
+                ASSETS = AssetBundle(ROOT_DIR, auto_reload=os.getenv("STATIC_AUTO_RELOAD", "0") == "1")
+    return ASSETS
+
+def resolve_iata_local_match(query: str):
+    """Returns (iata, confident); confident means an exact city, airport name
+    or ICAO match rather than a fuzzy one."""
+    load_airports()
+    if not (query or "").strip():
+        return None, False
+
+    exact = AIRPORT_INDEX.exact_city(query) or AIRPORT_INDEX.exact_name(query) or AIRPORT_INDEX.exact_icao(query)
+    if exact:
+        return exact[0], True
+
+    candidates = AIRPORT_INDEX.lookup(query, limit=1)
+    return (candidates[0] if candidates else None), False
+
 
 def resolve_iata_local(query: str):
-    load_airports()
-    q = (query or "").strip().lower()
-    if not q:
+    # Exact city / airport name / ICAO, then fuzzy city match
+    return resolve_iata_local_match(query)[0]
+
+
+def resolve_iata_coords(query: str):
+    """"40.68,-73.94" -> nearest commercial airport (None if not coordinates)."""
+    m = COORDS_RE.match(query or "")
+    if not m:
+        return None
+    lat, lon = float(m.group(1)), float(m.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
         return None
+    load_airports()
+    return GEO_INDEX.nearest_iata(lat, lon, max_km=NEARBY_MAX_KM)
+
+
+def parse_nearby_km(body):
+    value = body.get("nearbyKm")
+    if value in (None, ""):
+        return 0.0
+    return max(0.0, min(float(value), NEARBY_MAX_KM))
+
+
+def nearby_airports(code, radius_km):
+    if not radius_km:
+        return [code]
+    load_airports()
+    return GEO_INDEX.nearby_iata(code, radius_km, NEARBY_MAX_AIRPORTS)
 
-    # Exact city match
-    for a in AIRPORTS:
-        if a["city"].lower() == q:
-            return a["iata"]
 
-    # Fuzzy city match
-    cities = list({a["city"] for a in AIRPORTS})
-    close = get_close_matches(query, cities, n=1, cutoff=0.8)
-    if close:
-        best_city = close[0].lower()
-        for a in AIRPORTS:
-            if a["city"].lower() == best_city:
-                return a["iata"]
+def route_pairs(origin, destination, radius_km):
+    origins = nearby_airports(origin, radius_km)
+    destinations = nearby_airports(destination, radius_km)
+    return [(o, d) for o in origins for d in destinations if o != d] or [(origin, destination)]
 
+
+def merge_found(pairs, results):
+    """One search result from several routes. Offer ids are only unique per
+    search, so they get the route prefixed."""
+    if len(results) == 1:
+        return results[0]
+    data, dictionaries = [], {}
+    for (o, d), found in zip(pairs, results):
+        data.extend(dict(x, id=f"{o}-{d}-{x.get('id')}") for x in found["data"])
+        for name, entries in (found.get("dictionaries") or {}).items():
+            dictionaries.setdefault(name, {}).update(entries)
+    return {"data": data, "dictionaries": dictionaries}
+
+
+def amadeus_call(path, fn, **kwargs):
+    """Runs one SDK call, recording its status code and latency for /metrics."""
+    start = time.perf_counter()
+    try:
+        resp = fn(**kwargs)
+    except ResponseError as e:
+        status = getattr(getattr(e, "response", None), "status_code", None) or type(e).__name__
+        telemetry.record_upstream(path, status, time.perf_counter() - start)
+        raise
+    telemetry.record_upstream(path, resp.status_code, time.perf_counter() - start)
+    return resp
+
+
+def lookup_location_remote(query: str):
+    AMADEUS_LIMITS.acquire("reference-data")
+    resp = amadeus_call(
+        "/v1/reference-data/locations", get_amadeus().reference_data.locations.get,
+        keyword=query,
+        subType="CITY,AIRPORT",
+        page={"limit": 10}
+    )
+    return pick_location(resp.data or [])
+
+
+# Prefer a city code (covers every airport in the city), then any airport
+def pick_location(data):
+    for x in data:
+        if x.get("subType") == "CITY" and x.get("iataCode"):
+            return x["iataCode"]
+    for x in data:
+        if x.get("subType") == "AIRPORT" and x.get("iataCode"):
+            return x["iataCode"]
     return None
 
 
-def resolve_iata(query: str):
+def lookup_location_cached(query: str, key: str):
+    code = lookup_location_remote(query)
+    LOCATION_CACHE.set(key, code)
+    return code
+
+
+def start_resolve(query: str):
+    """Kicks off resolution; returns either a final code or a pending tuple
+    for finish_resolve. Splitting the two lets callers overlap lookups."""
     if not query:
         return None
 
@@ -104,109 +343,324 @@ def resolve_iata(query: str):
     if IATA_RE.match(q):
         return q
 
-    # 1) Try Amadeus first
+    code = resolve_iata_coords(query)
+    if code:
+        return code
+
+    # Cached Amadeus answers (including "no match") need no speculation
+    key = normalize(query)
+    code = LOCATION_CACHE.get(key)
+    if code is not MISSING:
+        return code or resolve_iata_local(query)
+
+    # 1) Amadeus in the background, 2) local index right here, in parallel
+    remote = RESOLVE_POOL.submit(lookup_location_cached, query, key)
+    deadline = time.monotonic() + RESOLVE_REMOTE_TIMEOUT
+    local, confident = resolve_iata_local_match(query)
+    if RESOLVE_POLICY == "first_confident" and confident:
+        return local
+    return (remote, deadline, local)
+
+
+def finish_resolve(pending):
+    if not isinstance(pending, tuple):
+        return pending
+
+    remote, deadline, local = pending
     try:
-        resp = amadeus.reference_data.locations.get(
-            keyword=query,
-            subType="CITY,AIRPORT",
-            page={"limit": 10}
-        )
-        data = resp.data or []
-        for x in data:
-            if x.get("subType") == "CITY" and x.get("iataCode"):
-                return x["iataCode"]
-        for x in data:
-            if x.get("subType") == "AIRPORT" and x.get("iataCode"):
-                return x["iataCode"]
+        code = remote.result(timeout=max(0.0, deadline - time.monotonic()))
     except Exception:
-        pass
+        code = None
+    return code or local
 
-    # 2) Fallback to local dataset
-    local = resolve_iata_local(query)
-    if local:
-        return local
 
-    return None
+def resolve_iata(query: str):
+    return finish_resolve(start_resolve(query))
+
+
+def resolve_many(*queries):
+    # Both remote lookups are in flight before we wait on either
+    with span("resolve"):
+        pending = [start_resolve(q) for q in queries]
+        return [finish_resolve(p) for p in pending]
+
 
+def summarize_offer(offer, dictionaries):
+    return offer_summary.summarize(offer, dictionaries).to_dict()
+
+
+def summarize_offers(data, dictionaries, prefs=None):
+    with span("summarize"):
+        return [x.to_dict() for x in rank_offers(data, dictionaries, prefs)]
+
+
+def rank_offers(data, dictionaries, prefs=None):
+    summaries = [offer_summary.summarize(o, dictionaries) for o in data]
+    return offer_ranking.rank(summaries, prefs or parse_preferences({}))
 
-def extract_flight_codes(offer):
-    codes = []
-    for itin in offer.get("itineraries", []):
-        for seg in itin.get("segments", []):
-            carrier = seg.get("carrierCode")
-            number = seg.get("number")
-            if carrier and number:
-                codes.append(f"{carrier} {number}")
-    return codes
 
+def parse_preferences(body):
+    return offer_ranking.parse_preferences(body, max_limit=SEARCH_PAGE_SIZE)
 
-def count_stops(itinerary):
-    segments = itinerary.get("segments", [])
-    return max(0, len(segments) - 1)
 
+def json_response(payload, status=200):
+    return Response(offer_summary.dumps(payload), status=status, mimetype="application/json")
 
-def summarize_itinerary(itin, dictionaries):
-    if not itin:
+# Shared by the Flask views and the async app in flight_asgi.py
+
+def parse_budget(budget):
+    if not budget:
         return None
+    return int(float(budget))
+
+
+def build_search_params(origin, destination, depart_date, return_date, max_price):
+    params = {
+        "originLocationCode": origin,
+        "destinationLocationCode": destination,
+        "departureDate": depart_date,
+        "adults": 1,
+        "currencyCode": "USD",
+        "max": SEARCH_PAGE_SIZE
+    }
 
-    segs = itin.get("segments", [])
-    first = segs[0] if segs else None
-    last = segs[-1] if segs else None
+    if return_date:
+        params["returnDate"] = return_date
+    if max_price is not None:
+        params["maxPrice"] = max_price
+    return params
 
-    carrier_codes = []
-    for s in segs:
-        cc = s.get("carrierCode")
-        if cc and cc not in carrier_codes:
-            carrier_codes.append(cc)
 
-    carrier_dict = dictionaries.get("carriers", {}) if dictionaries else {}
-    airline_names = [carrier_dict.get(cc, cc) for cc in carrier_codes]
+def search_offers(params, paced=False):
+    def fetch():
+        # fan-out cache misses queue behind direct searches
+        return fetch_offers(params, LOW if paced else None)
 
+    # fan-out searches (flex dates, nearby airports) do not count as popular
+    with span("search"):
+        return SEARCH_CACHE.get_or_fetch(params, fetch, track=not paced)
+
+
+def fetch_offers(params, priority=None):
+    AMADEUS_LIMITS.acquire("shopping", priority)
+    resp = amadeus_call("/v2/shopping/flight-offers", get_amadeus().shopping.flight_offers_search.get, **params)
     return {
-        "from": first.get("departure", {}).get("iataCode") if first else None,
-        "to": last.get("arrival", {}).get("iataCode") if last else None,
-        "departAt": first.get("departure", {}).get("at") if first else None,
-        "arriveAt": last.get("arrival", {}).get("at") if last else None,
-        "stops": count_stops(itin),
-        "duration": itin.get("duration"),
-        "airlines": airline_names,
-        "carrierCodes": carrier_codes,
+        "data": resp.data or [],
+        "dictionaries": resp.result.get("dictionaries", {})
     }
 
 
-def summarize_offer(offer, dictionaries):
-    itineraries = offer.get("itineraries", [])
-    outbound = itineraries[0] if len(itineraries) > 0 else None
-    inbound = itineraries[1] if len(itineraries) > 1 else None
+def fetch_transfers(airport, place, start_datetime, passengers):
+    code, geo = (place, None) if isinstance(place, str) else (None, place)
+    found = get_transfer_api().find_transfers(airport, code, start_datetime, passengers, end_geo=geo, priority=LOW)
+    if found.get("errors"):
+        error = found["errors"][0]
+        raise QuoteError(error.get("detail") or error.get("title") or "transfer search failed")
+    return found.get("data") or []
+
+
+def prefetch_transfers(offers, place):
+    """Starts transfer quotes for the best offers' arrivals; returns how many
+    distinct quotes that took (0 without a hotel)."""
+    if place is None or TRANSFER_PREFETCH_TOP <= 0:
+        return 0
+    with span("transfers"):
+        return TRANSFER_QUOTES.prefetch(offers, place, 1, TRANSFER_PREFETCH_TOP)
+
+
+def transfer_quote(body):
+    """POST /api/transfers {"airport", "arriveAt", "transferTo", "passengers"}
+    -> (status, payload). Instant when the flight search prefetched it."""
+    try:
+        place = parse_place(body.get("transferTo"))
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    if place is None:
+        return 400, {"error": "transferTo is required"}
+
+    airport = (body.get("airport") or "").strip().upper()
+    if not IATA_RE.match(airport):
+        return 400, {"error": "airport must be a 3-letter IATA code"}
+    bucket = arrival_bucket(body.get("arriveAt"), TRANSFER_QUOTES.bucket_minutes)
+    if bucket is None:
+        return 400, {"error": "arriveAt must be an ISO date-time"}
+    try:
+        passengers = max(1, int(body.get("passengers") or 1))
+    except (TypeError, ValueError):
+        return 400, {"error": "passengers must be a whole number"}
+
+    try:
+        with span("transfers"):
+            offers = TRANSFER_QUOTES.quote(airport, place, body["arriveAt"], passengers, TRANSFER_QUOTE_TIMEOUT)
+    except TimeoutError:
+        return 504, {"error": "Transfer search timed out"}
+    except TRANSFER_ERRORS as e:
+        return 500, {"error": "Amadeus request failed", "message": str(e)}
+    return 200, {"airport": airport, "start": bucket, "transferTo": place_text(place), "offers": offers}
+
+
+def search_routes(pairs, depart_date, return_date, max_price):
+    """Searches every (origin, destination) pair, several at once in the
+    low-priority lane. Routes that fail are left out unless all of them do."""
+    if len(pairs) == 1:
+        return search_offers(build_search_params(*pairs[0], depart_date, return_date, max_price))
+
+    with ThreadPoolExecutor(max_workers=min(len(pairs), FLEX_CONCURRENCY), thread_name_prefix="nearby") as pool:
+        # copy_context: the searches count towards this request's trace
+        futures = [
+            pool.submit(contextvars.copy_context().run, search_offers,
+                        build_search_params(o, d, depart_date, return_date, max_price), True)
+            for o, d in pairs
+        ]
+    found, searched, errors = [], [], []
+    for pair, future in zip(pairs, futures):
+        try:
+            found.append(future.result())
+            searched.append(pair)
+        except UPSTREAM_ERRORS as e:
+            errors.append(e)
+    if not found:
+        raise errors[0]
+    return merge_found(searched, found)
+
+
+def build_result_payload(origin, destination, depart_date, return_date, found, summarized=None, prefs=None):
+    if summarized is None:
+        summarized = summarize_offers(found["data"], found["dictionaries"], prefs)
 
     return {
-        "id": offer.get("id"),
-        "price": {
-            "total": offer.get("price", {}).get("total"),
-            "currency": offer.get("price", {}).get("currency")
-        },
-        "flightCodes": extract_flight_codes(offer),
-        "outbound": summarize_itinerary(outbound, dictionaries),
-        "inbound": summarize_itinerary(inbound, dictionaries)
+    "search_id": uuid.uuid4().hex,
+    "origin": origin,
+    "destination": destination,
+    "depart_date": depart_date,
+    "return_date": return_date,
+    "offers": summarized,
+    "saved_at": datetime.now().isoformat()
     }
 
+def flight_events(origin_input, destination_input, depart_date, return_date, max_price, prefs=None, place=None):
+    """The /api/flights work as a sequence of (event, data) pairs so it can
+    be streamed: resolved codes, then one summarized offer at a time."""
+    yield "progress", {"stage": "resolving"}
+
+    origin, destination = resolve_many(origin_input, destination_input)
+    origin = origin or "JFK"
+    if not destination:
+        yield "error", {"error": f"Could not resolve destination '{destination_input}'"}
+        return
+
+    yield "resolved", {"origin": origin, "destination": destination,
+                       "depart_date": depart_date, "return_date": return_date}
+    yield "progress", {"stage": "searching"}
+
+    params = build_search_params(origin, destination, depart_date, return_date, max_price)
+    try:
+        found = search_offers(params)
+    except UPSTREAM_ERRORS as e:
+        yield "error", {"error": "Amadeus request failed", "message": str(e)}
+        return
+
+    with span("summarize"):
+        ranked = rank_offers(found["data"], found["dictionaries"], prefs)
+    # quotes are under way while the offers are still being sent
+    prefetch_transfers([x.to_dict() for x in ranked[:TRANSFER_PREFETCH_TOP]], place)
+
+    summarized = []
+    for x in ranked:
+        offer = x.to_dict()
+        summarized.append(offer)
+        yield "offer", offer
+
+    result_payload = build_result_payload(origin, destination, depart_date, return_date, found, summarized)
+    RESULT_WRITER.submit(result_payload)
+
+    yield "done", {"search_id": result_payload["search_id"], "count": len(summarized)}
+
+
+def format_event(event, data, sse=False):
+    if sse:
+        return b"event: " + event.encode() + b"\ndata: " + offer_summary.dumps(data) + b"\n\n"
+    return offer_summary.dumps({"type": event, **data}) + b"\n"
+
+
+def wants_sse(accept_header):
+    return "text/event-stream" in (accept_header or "")
+
 # ---------------------------
 # Routes
 # ---------------------------
 
-@app.route("/")
+@bp.before_app_request
+def begin_trace():
+    g.trace = telemetry.start_trace(request.headers.get("X-Request-ID"))
+
+
+@bp.after_app_request
+def finish_trace(response):
+    trace = g.pop("trace", None)
+    if trace is None:
+        return response
+    response.headers["X-Trace-Id"] = trace.trace_id
+    args = (trace, request.url_rule.rule if request.url_rule else "unmatched", request.method, response.status_code)
+    if response.is_streamed:
+        # log streams once they finish, with the time taken to send everything
+        response.call_on_close(lambda: telemetry.end_trace(*args))
+    else:
+        telemetry.end_trace(*args)
+    return response
+
+
+@bp.after_app_request
+def compress_json(response):
+    """gzip/brotli for larger JSON bodies; streamed responses are left alone."""
+    if response.is_streamed or response.mimetype != "application/json" or "Content-Encoding" in response.headers:
+        return response
+    response.vary.add("Accept-Encoding")
+    body, coding = compress(response.get_data(), request.headers.get("Accept-Encoding"))
+    if coding is not None:
+        response.set_data(body)
+        response.headers["Content-Encoding"] = coding
+    return response
+
+
+@bp.get("/metrics")
+def metrics():
+    return Response(telemetry.REGISTRY.render(), content_type=telemetry.CONTENT_TYPE)
+
+
+def serve_asset(path):
+    status, headers, body = get_assets().respond(
+        path, request.headers.get("Accept-Encoding"), request.headers.get("If-None-Match"))
+    return Response(body, status=status, headers=headers)
+
+@bp.route("/")
 def home():
-    return send_from_directory(ROOT_DIR, "index.html")
+    return serve_asset("/")
 
-@app.route("/main.js")
+@bp.route("/main.js")
 def serve_main_js():
-    return send_from_directory(ROOT_DIR, "main.js")
+    return serve_asset("/main.js")
 
-@app.route("/style.css")
+@bp.route("/style.css")
 def serve_style_css():
-    return send_from_directory(ROOT_DIR, "style.css")
-
-@app.post("/api/flights")
+    return serve_asset("/style.css")
+
+@bp.route("/assets/<name>")
+def serve_hashed_asset(name):
+    return serve_asset(f"/assets/{name}")
+
+@bp.get("/api/cache/stats")
+def cache_stats():
+    return jsonify({
+        "locations": LOCATION_CACHE.stats(),
+        "searches": SEARCH_CACHE.stats(),
+        "results": RESULT_WRITER.stats(),
+        "refresh": SEARCH_REFRESHER.stats() if SEARCH_REFRESHER else None,
+        "transfers": TRANSFER_QUOTES.stats(),
+        "rate_limits": AMADEUS_LIMITS.metrics()
+    })
+
+@bp.post("/api/flights")
 def flights():
     body = request.get_json(force=True)
 
@@ -219,63 +673,224 @@ def flights():
     if not depart_date:
         return jsonify({"error": "Dates must be in YYYY-MM-DD format"}), 400
 
-    origin = resolve_iata(origin_input) or "JFK"
-    destination = resolve_iata(destination_input)
+    origin, destination = resolve_many(origin_input, destination_input)
+    origin = origin or "JFK"
 
     if not destination:
         return jsonify({"error": f"Could not resolve destination '{destination_input}'"}), 400
 
-    max_price = None
-    if budget:
-        try:
-            max_price = int(float(budget))
-        except ValueError:
-            return jsonify({"error": "Budget must be numeric"}), 400
+    try:
+        max_price = parse_budget(budget)
+    except ValueError:
+        return jsonify({"error": "Budget must be numeric"}), 400
 
     try:
-        params = {
-            "originLocationCode": origin,
-            "destinationLocationCode": destination,
-            "departureDate": depart_date,
-            "adults": 1,
-            "currencyCode": "USD",
-            "max": 5
-        }
-
-        if return_date:
-            params["returnDate"] = return_date
-        if max_price is not None:
-            params["maxPrice"] = max_price
-
-        resp = amadeus.shopping.flight_offers_search.get(**params)
+        prefs = parse_preferences(body)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    except ResponseError as e:
+    try:
+        nearby_km = parse_nearby_km(body)
+    except (TypeError, ValueError):
+        return jsonify({"error": "nearbyKm must be numeric"}), 400
+
+    try:
+        place = parse_place(body.get("transferTo"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    pairs = route_pairs(origin, destination, nearby_km)
+    try:
+        found = search_routes(pairs, depart_date, return_date, max_price)
+    except UPSTREAM_ERRORS as e:
         return jsonify({"error": "Amadeus request failed", "message": str(e)}), 500
 
-    data = resp.data or []
-    dictionaries = resp.result.get("dictionaries", {})
+    result_payload = build_result_payload(origin, destination, depart_date, return_date, found, prefs=prefs)
+    if len(pairs) > 1:
+        result_payload["routes"] = [f"{o}-{d}" for o, d in pairs]
+    if place is not None:
+        result_payload["transfers_prefetched"] = prefetch_transfers(result_payload["offers"], place)
 
-    summarized = [summarize_offer(o, dictionaries) for o in data]
+    # Persisted by the background writer, off the request thread
+    RESULT_WRITER.submit(result_payload)
 
-    result_payload = {
-    "origin": origin,
-    "destination": destination,
-    "depart_date": depart_date,
-    "return_date": return_date,
-    "offers": summarized,
-    "saved_at": datetime.now().isoformat()
-    }
+    return json_response(result_payload)
 
-    # Save next to flight_api.py (inside /apis folder)
-    out_path = os.path.join(os.path.dirname(__file__), "flight_results.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(result_payload, f, indent=2)
 
-    return jsonify(result_payload)
 
 
+@bp.post("/api/flights/stream")
+def flights_stream():
+    """Streaming /api/flights: NDJSON by default, server-sent events when the
+    client sends Accept: text/event-stream. Bad input is still a plain JSON 400."""
+    body = request.get_json(force=True)
 
+    depart_date, return_date = parse_dates(body.get("dates", ""))
+    if not depart_date:
+        return jsonify({"error": "Dates must be in YYYY-MM-DD format"}), 400
+
+    try:
+        max_price = parse_budget(body.get("budget", ""))
+    except ValueError:
+        return jsonify({"error": "Budget must be numeric"}), 400
+
+    try:
+        prefs = parse_preferences(body)
+        place = parse_place(body.get("transferTo"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    sse = wants_sse(request.headers.get("Accept"))
+    events = flight_events(body.get("origin", "JFK"), body.get("destination", ""),
+                           depart_date, return_date, max_price, prefs, place)
+
+    def generate():
+        for event, data in events:
+            yield format_event(event, data, sse)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@bp.post("/api/transfers")
+def transfers():
+    status, payload = transfer_quote(request.get_json(force=True))
+    return json_response(payload, status)
+
+
+@bp.post("/api/flights/flex")
+def flights_flex():
+    """Price calendar over a ±flexDays window, streamed as NDJSON: one
+    "resolved" line, one "cell" line per completed search, then "calendar"."""
+    body = request.get_json(force=True)
+
+    origin_input = body.get("origin", "JFK")
+    destination_input = body.get("destination", "")
+    dates = body.get("dates", "")
+    budget = body.get("budget", "")
+
+    depart_date, return_date = parse_dates(dates)
+    if not depart_date:
+        return jsonify({"error": "Dates must be in YYYY-MM-DD format"}), 400
+
+    try:
+        window = max(0, min(int(body.get("flexDays", 3)), FLEX_MAX_WINDOW))
+    except (TypeError, ValueError):
+        return jsonify({"error": "flexDays must be a whole number"}), 400
+
+    try:
+        # date_grid parses both dates, so "2026-02-30" fails here
+        cells = date_grid(depart_date, return_date, window)
+    except ValueError:
+        return jsonify({"error": "Dates must be valid YYYY-MM-DD dates"}), 400
+
+    origin, destination = resolve_many(origin_input, destination_input)
+    origin = origin or "JFK"
+
+    if not destination:
+        return jsonify({"error": f"Could not resolve destination '{destination_input}'"}), 400
+
+    try:
+        max_price = parse_budget(budget)
+    except ValueError:
+        return jsonify({"error": "Budget must be numeric"}), 400
+
+    def search(dep, ret):
+        params = build_search_params(origin, destination, dep, ret, max_price)
+        return search_offers(params, paced=True)["data"]
+
+    def generate():
+        yield format_event("resolved", {"origin": origin, "destination": destination, "cells": len(cells)})
+        done = []
+        for cell in FlexScheduler(search, FLEX_CONCURRENCY).run(cells):
+            done.append(cell)
+            yield format_event("cell", cell)
+        yield format_event("calendar", calendar_summary(done))
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+# ---------------------------
+# Startup
+# ---------------------------
+# create_app() runs the startup phases in order and times each one; the
+# timings are logged once and exported as flights_startup_seconds{phase=..}.
+# With PRELOAD_DATA=1 (default) the airport indexes and the Amadeus client
+# are built up front instead of on the first request that needs them. Under
+# gunicorn with preload_app (see gunicorn.conf.py) that happens once in the
+# master, and forked workers share the pages copy-on-write; after_fork()
+# then gives each worker its own SQLite connections.
+
+STARTUP_SECONDS = {}
+
+telemetry.REGISTRY.register_stats("flights_startup", "phase", lambda: {
+    phase: {"seconds": seconds} for phase, seconds in STARTUP_SECONDS.items()
+})
+
+
+@contextmanager
+def startup_phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_SECONDS[name] = round(time.perf_counter() - start, 4)
+
+
+def startup(preload=None):
+    if preload is None:
+        preload = os.getenv("PRELOAD_DATA", "1") == "1"
+    with startup_phase("logging"):
+        telemetry.configure_logging()
+    with startup_phase("assets"):
+        get_assets()
+    with startup_phase("result_sink"):
+        RESULT_WRITER.check()
+    if preload:
+        with startup_phase("airports"):
+            load_airports()
+        with startup_phase("amadeus_client"):
+            get_amadeus()
+    return preload
+
+
+def log_startup(preload):
+    telemetry.log_event("startup", pid=os.getpid(), preload=preload,
+                        ms={phase: round(s * 1000, 1) for phase, s in STARTUP_SECONDS.items()})
+
+
+def create_app(preload=None):
+    """WSGI entry point: `flight_api:create_app()` (gunicorn, flask --app)."""
+    global APP
+    with INIT_LOCK:
+        if APP is None:
+            preload = startup(preload)
+            with startup_phase("app"):
+                app = Flask(__name__)
+                app.register_blueprint(bp)
+            log_startup(preload)
+            APP = app
+    return APP
+
+
+def after_fork():
+    """Call in each worker forked from a master that ran create_app()."""
+    if LOCATION_CACHE.store is not None:
+        LOCATION_CACHE.store.reopen()
+    AMADEUS_LIMITS.reopen()
+    if TRANSFER_API is not None:
+        TRANSFER_API.tokens.after_fork()
+
+
+def __getattr__(name):
+    # `flight_api.app` keeps working for `flask run`, gunicorn flight_api:app
+    # and the benchmarks, without building anything at import
+    if name == "app":
+        return create_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
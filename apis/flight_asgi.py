@@ -0,0 +1,484 @@
+import asyncio
+import json
+import os
+
+import flight_api
+from flight_api import (
+    IATA_RE, LOCATION_CACHE, SEARCH_CACHE, SEARCH_REFRESHER, RESULT_WRITER,
+    RESOLVE_POLICY, RESOLVE_REMOTE_TIMEOUT, AMADEUS_LIMITS, FLEX_MAX_WINDOW, FLEX_CONCURRENCY,
+    parse_dates, parse_budget, pick_location, resolve_iata_local, resolve_iata_local_match, resolve_iata_coords,
+    parse_nearby_km, route_pairs, merge_found, rank_offers,
+    build_search_params, build_result_payload, format_event, parse_preferences, wants_sse,
+    TRANSFER_QUOTES, TRANSFER_PREFETCH_TOP, prefetch_transfers, transfer_quote
+)
+from flex_search import cheapest, calendar_summary, date_grid
+from transfer_prefetch import parse_place
+import offer_summary
+import telemetry
+from telemetry import span
+from airport_index import normalize
+from amadeus_async import AsyncAmadeus, AmadeusError
+from rate_limiter import LOW
+from static_assets import ASSET_PREFIX, compress
+from ttl_cache import MISSING
+
+
+# ---------------------------
+# Async Serving Mode (ASGI)
+# ---------------------------
+# Same routes and JSON contract as the Flask app in flight_api.py, but the
+# location lookups and the offer search are awaited on one shared async HTTP
+# client, so a slow Amadeus response no longer pins a worker thread.
+#
+#   uvicorn flight_asgi:app --app-dir apis --port 5000
+#
+# Caches, the result writer and the local airport fallback are shared with
+# flight_api.py.
+
+STATIC_FILES = {
+    "/": "index.html",
+    "/main.js": "main.js",
+    "/style.css": "style.css",
+}
+
+ROUTES = {*STATIC_FILES, "/api/flights", "/api/flights/stream", "/api/flights/flex", "/api/transfers",
+          "/api/cache/stats", "/metrics"}
+
+amadeus_async = None
+
+# remote lookups that lost the race keep running to warm the cache
+background_tasks = set()
+
+
+async def get_client():
+    global amadeus_async
+    if amadeus_async is None:
+        amadeus_async = AsyncAmadeus(os.getenv("AMADEUS_CLIENT_ID"), os.getenv("AMADEUS_CLIENT_SECRET"),
+                                     limits=AMADEUS_LIMITS)
+    return amadeus_async
+
+
+# ---------------------------
+# Helpers
+# ---------------------------
+
+async def lookup_location_cached(query, key):
+    client = await get_client()
+    code = pick_location(await client.locations(query))
+    LOCATION_CACHE.set(key, code)
+    return code
+
+
+async def resolve_iata(query):
+    if not query:
+        return None
+
+    q = query.strip().upper()
+    if IATA_RE.match(q):
+        return q
+
+    code = resolve_iata_coords(query)
+    if code:
+        return code
+
+    # Cached Amadeus answers (same cache as the Flask views)
+    key = normalize(query)
+    code = LOCATION_CACHE.get(key)
+    if code is not MISSING:
+        return code or resolve_iata_local(query)
+
+    # 1) Amadeus as a task, 2) the local index meanwhile (see RESOLVE_POLICY)
+    remote = asyncio.create_task(lookup_location_cached(query, key))
+    background_tasks.add(remote)
+    remote.add_done_callback(background_tasks.discard)
+
+    local, confident = resolve_iata_local_match(query)
+    if RESOLVE_POLICY == "first_confident" and confident:
+        return local
+
+    try:
+        code = await asyncio.wait_for(asyncio.shield(remote), RESOLVE_REMOTE_TIMEOUT)
+    except Exception:
+        code = None
+    return code or local
+
+
+async def search_offers(params, paced=False):
+    """Async twin of flight_api.search_offers."""
+    client = await get_client()
+
+    async def fetch():
+        return await client.flight_offers(params, priority=LOW if paced else None)
+    return await SEARCH_CACHE.get_or_fetch_async(params, fetch, track=not paced)
+
+
+async def search_routes(pairs, depart_date, return_date, max_price):
+    """Async twin of flight_api.search_routes."""
+    paced = len(pairs) > 1
+    with span("search"):
+        results = await asyncio.gather(
+            *(search_offers(build_search_params(o, d, depart_date, return_date, max_price), paced) for o, d in pairs),
+            return_exceptions=True
+        )
+    found = [(pair, r) for pair, r in zip(pairs, results) if not isinstance(r, BaseException)]
+    if not found:
+        raise results[0]
+    return merge_found([pair for pair, _ in found], [r for _, r in found])
+
+
+async def flights(body):
+    origin_input = body.get("origin", "JFK")
+    destination_input = body.get("destination", "")
+    dates = body.get("dates", "")
+    budget = body.get("budget", "")
+
+    depart_date, return_date = parse_dates(dates)
+    if not depart_date:
+        return 400, {"error": "Dates must be in YYYY-MM-DD format"}
+
+    with span("resolve"):
+        origin, destination = await asyncio.gather(resolve_iata(origin_input), resolve_iata(destination_input))
+    origin = origin or "JFK"
+
+    if not destination:
+        return 400, {"error": f"Could not resolve destination '{destination_input}'"}
+
+    try:
+        max_price = parse_budget(budget)
+    except ValueError:
+        return 400, {"error": "Budget must be numeric"}
+
+    try:
+        prefs = parse_preferences(body)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+
+    try:
+        nearby_km = parse_nearby_km(body)
+    except (TypeError, ValueError):
+        return 400, {"error": "nearbyKm must be numeric"}
+
+    try:
+        place = parse_place(body.get("transferTo"))
+    except ValueError as e:
+        return 400, {"error": str(e)}
+
+    pairs = route_pairs(origin, destination, nearby_km)
+    try:
+        found = await search_routes(pairs, depart_date, return_date, max_price)
+    except AmadeusError as e:
+        return 500, {"error": "Amadeus request failed", "message": str(e)}
+
+    result_payload = build_result_payload(origin, destination, depart_date, return_date, found, prefs=prefs)
+    if len(pairs) > 1:
+        result_payload["routes"] = [f"{o}-{d}" for o, d in pairs]
+    if place is not None:
+        result_payload["transfers_prefetched"] = prefetch_transfers(result_payload["offers"], place)
+
+    # Persisted by the background writer, off the event loop
+    RESULT_WRITER.submit(result_payload)
+
+    return 200, result_payload
+
+
+async def flight_events(body):
+    """Async twin of flight_api.flight_events. Yields (event, data) pairs."""
+    depart_date, return_date = parse_dates(body.get("dates", ""))
+    max_price = parse_budget(body.get("budget", ""))
+    prefs = parse_preferences(body)
+    place = parse_place(body.get("transferTo"))
+    destination_input = body.get("destination", "")
+
+    yield "progress", {"stage": "resolving"}
+
+    with span("resolve"):
+        origin, destination = await asyncio.gather(resolve_iata(body.get("origin", "JFK")), resolve_iata(destination_input))
+    origin = origin or "JFK"
+    if not destination:
+        yield "error", {"error": f"Could not resolve destination '{destination_input}'"}
+        return
+
+    yield "resolved", {"origin": origin, "destination": destination,
+                       "depart_date": depart_date, "return_date": return_date}
+    yield "progress", {"stage": "searching"}
+
+    params = build_search_params(origin, destination, depart_date, return_date, max_price)
+    try:
+        client = await get_client()
+        with span("search"):
+            found = await SEARCH_CACHE.get_or_fetch_async(params, lambda: client.flight_offers(params))
+    except AmadeusError as e:
+        yield "error", {"error": "Amadeus request failed", "message": str(e)}
+        return
+
+    with span("summarize"):
+        ranked = rank_offers(found["data"], found["dictionaries"], prefs)
+    prefetch_transfers([x.to_dict() for x in ranked[:TRANSFER_PREFETCH_TOP]], place)
+
+    summarized = []
+    for x in ranked:
+        offer = x.to_dict()
+        summarized.append(offer)
+        yield "offer", offer
+
+    result_payload = build_result_payload(origin, destination, depart_date, return_date, found, summarized)
+    RESULT_WRITER.submit(result_payload)
+
+    yield "done", {"search_id": result_payload["search_id"], "count": len(summarized)}
+
+
+async def flex_cells(cells, origin, destination, max_price):
+    """Async twin of flex_search.FlexScheduler: yields one calendar cell per
+    search as it completes, at most FLEX_CONCURRENCY searches at a time."""
+    limit = asyncio.Semaphore(FLEX_CONCURRENCY)
+
+    async def search(dep, ret):
+        cell = {"depart_date": dep, "return_date": ret}
+        async with limit:
+            try:
+                params = build_search_params(origin, destination, dep, ret, max_price)
+                offers = (await search_offers(params, paced=True))["data"]
+                cell["offers"] = len(offers)
+                cell["cheapest"] = cheapest(offers)
+            except Exception as e:
+                cell["error"] = str(e)
+        return cell
+
+    tasks = [asyncio.create_task(search(dep, ret)) for dep, ret in dict.fromkeys(cells)]
+    try:
+        for done in asyncio.as_completed(tasks):
+            yield await done
+    finally:
+        # client went away: don't run the remaining searches
+        for task in tasks:
+            task.cancel()
+
+
+async def flights_flex(send, body):
+    """Async twin of flight_api.flights_flex."""
+    depart_date, return_date = parse_dates(body.get("dates", ""))
+    if not depart_date:
+        await send_json(send, 400, {"error": "Dates must be in YYYY-MM-DD format"})
+        return
+    try:
+        window = max(0, min(int(body.get("flexDays", 3)), FLEX_MAX_WINDOW))
+    except (TypeError, ValueError):
+        await send_json(send, 400, {"error": "flexDays must be a whole number"})
+        return
+    try:
+        cells = date_grid(depart_date, return_date, window)
+    except ValueError:
+        await send_json(send, 400, {"error": "Dates must be valid YYYY-MM-DD dates"})
+        return
+
+    destination_input = body.get("destination", "")
+    with span("resolve"):
+        origin, destination = await asyncio.gather(resolve_iata(body.get("origin", "JFK")), resolve_iata(destination_input))
+    origin = origin or "JFK"
+    if not destination:
+        await send_json(send, 400, {"error": f"Could not resolve destination '{destination_input}'"})
+        return
+    try:
+        max_price = parse_budget(body.get("budget", ""))
+    except ValueError:
+        await send_json(send, 400, {"error": "Budget must be numeric"})
+        return
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/x-ndjson"), (b"cache-control", b"no-cache")]
+    })
+
+    async def emit(event, data):
+        await send({"type": "http.response.body", "body": format_event(event, data), "more_body": True})
+
+    await emit("resolved", {"origin": origin, "destination": destination, "cells": len(cells)})
+    done = []
+    async for cell in flex_cells(cells, origin, destination, max_price):
+        done.append(cell)
+        await emit("cell", cell)
+    await emit("calendar", calendar_summary(done))
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def stream_flights(scope, send, body):
+    if not parse_dates(body.get("dates", ""))[0]:
+        await send_json(send, 400, {"error": "Dates must be in YYYY-MM-DD format"})
+        return
+    try:
+        parse_budget(body.get("budget", ""))
+    except ValueError:
+        await send_json(send, 400, {"error": "Budget must be numeric"})
+        return
+    try:
+        parse_preferences(body)
+        parse_place(body.get("transferTo"))
+    except ValueError as e:
+        await send_json(send, 400, {"error": str(e)})
+        return
+
+    headers = dict(scope.get("headers") or [])
+    sse = wants_sse(headers.get(b"accept", b"").decode("latin-1"))
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream" if sse else b"application/x-ndjson"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no")
+        ]
+    })
+    async for event, data in flight_events(body):
+        await send({"type": "http.response.body", "body": format_event(event, data, sse), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+# ---------------------------
+# ASGI plumbing
+# ---------------------------
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def send_response(send, status, body, content_type, extra_headers=(), head=False):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+            *extra_headers
+        ]
+    })
+    await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+async def send_json(send, status, payload, accept_encoding=None):
+    body, coding = compress(offer_summary.dumps(payload), accept_encoding)
+    extra = [(b"vary", b"Accept-Encoding")]
+    if coding is not None:
+        extra.append((b"content-encoding", coding.encode()))
+    await send_response(send, status, body, "application/json", extra)
+
+
+async def lifespan(receive, send):
+    global amadeus_async
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                preload = flight_api.startup()
+                with flight_api.startup_phase("async_client"):
+                    await get_client()
+            except Exception as e:
+                # e.g. a bad RESULT_SINK: refuse to serve instead of failing every request
+                await send({"type": "lifespan.startup.failed", "message": f"{type(e).__name__}: {e}"})
+                return
+            flight_api.log_startup(preload)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if amadeus_async is not None:
+                await amadeus_async.aclose()
+                amadeus_async = None
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    headers = dict(scope.get("headers") or [])
+    trace = telemetry.start_trace(headers.get(b"x-request-id", b"").decode("latin-1") or None)
+    status = None
+
+    async def traced_send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            message = dict(message, headers=[*message.get("headers", []),
+                                             (b"x-trace-id", trace.trace_id.encode())])
+        await send(message)
+
+    try:
+        await route(scope, receive, traced_send)
+    finally:
+        path = scope["path"]
+        route_name = path if path in ROUTES else "/assets/<name>" if path.startswith(ASSET_PREFIX) else "unmatched"
+        telemetry.end_trace(trace, route_name, scope["method"], status or 500)
+
+
+async def route(scope, receive, send):
+    path = scope["path"]
+    method = scope["method"]
+
+    if path == "/metrics" and method == "GET":
+        await send_response(send, 200, telemetry.REGISTRY.render().encode(), telemetry.CONTENT_TYPE)
+        return
+
+    headers = dict(scope.get("headers") or [])
+    accept_encoding = headers.get(b"accept-encoding", b"").decode("latin-1")
+
+    if method in ("GET", "HEAD") and (path in STATIC_FILES or path.startswith(ASSET_PREFIX)):
+        status, asset_headers, body = flight_api.get_assets().respond(
+            path, accept_encoding, headers.get(b"if-none-match", b"").decode("latin-1"), head=method == "HEAD")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.lower().encode(), v.encode()) for k, v in asset_headers]
+        })
+        await send({"type": "http.response.body", "body": body})
+        return
+
+    if path == "/api/cache/stats" and method == "GET":
+        await send_json(send, 200, {
+            "locations": LOCATION_CACHE.stats(),
+            "searches": SEARCH_CACHE.stats(),
+            "results": RESULT_WRITER.stats(),
+            "refresh": SEARCH_REFRESHER.stats() if SEARCH_REFRESHER else None,
+            "transfers": TRANSFER_QUOTES.stats(),
+            "rate_limits": AMADEUS_LIMITS.metrics()
+        }, accept_encoding)
+        return
+
+    if path in ("/api/flights", "/api/flights/stream", "/api/flights/flex") and method == "POST":
+        try:
+            body = json.loads(await read_body(receive) or b"{}")
+        except ValueError:
+            await send_json(send, 400, {"error": "Request body must be JSON"})
+            return
+        if path == "/api/flights/stream":
+            await stream_flights(scope, send, body)
+            return
+        if path == "/api/flights/flex":
+            await flights_flex(send, body)
+            return
+        status, payload = await flights(body)
+        await send_json(send, status, payload, accept_encoding)
+        return
+
+    if path == "/api/transfers" and method == "POST":
+        try:
+            body = json.loads(await read_body(receive) or b"{}")
+        except ValueError:
+            await send_json(send, 400, {"error": "Request body must be JSON"})
+            return
+        # a prefetched quote is a cache hit; a miss waits on the upstream call in a thread
+        status, payload = await asyncio.to_thread(transfer_quote, body)
+        await send_json(send, status, payload, accept_encoding)
+        return
+
+    if path in ROUTES:
+        await send_json(send, 405, {"error": "Method not allowed"})
+    else:
+        await send_json(send, 404, {"error": "Not found"})
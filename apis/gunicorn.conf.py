@@ -0,0 +1,36 @@
+import gc
+import os
+import sys
+
+
+# ---------------------------
+# Gunicorn
+# ---------------------------
+#   gunicorn -c apis/gunicorn.conf.py
+#
+# Preload-then-fork: the master imports flight_api and runs create_app()
+# (airport indexes, Amadeus client, static assets) once, then forks the
+# workers, which start serving right away and share that memory
+# copy-on-write. gc.freeze() before forking keeps the garbage collector
+# from touching (and so copying) the preloaded objects in every worker.
+# PRELOAD_APP=0 loads the app in each worker instead.
+
+pythonpath = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = "flight_api:create_app()"
+
+bind = os.getenv("BIND", "127.0.0.1:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+preload_app = os.getenv("PRELOAD_APP", "1") == "1"
+
+
+def when_ready(server):
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    flight_api = sys.modules.get("flight_api")
+    if flight_api is not None:
+        flight_api.after_fork()
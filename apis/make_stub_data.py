@@ -0,0 +1,275 @@
+import json
+import math
+import os
+import random
+from datetime import datetime, timedelta
+
+
+# ---------------------------
+# Generated Stub Data
+# ---------------------------
+# Writes the flight offers, city hotels and points of interest in
+# stub_data/. These are GENERATED samples in the Amadeus response format,
+# not recordings: schedules are made up, but block times follow the
+# great-circle distance and the local time zones of the airports, and the
+# dictionaries carry the real city and country codes. Hotel names are
+# invented; the POIs are real Paris landmarks at approximate coordinates.
+# The output is deterministic (fixed seed).
+#
+#   python apis/make_stub_data.py
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_data")
+SEED = 20260601
+
+DEPART_DATE = "2026-06-01"
+RETURN_DATE = "2026-06-08"
+
+# code: (lat, lon, UTC offset in June, city, country)
+AIRPORTS = {
+    "JFK": (40.6413, -73.7781, -4, "NYC", "US"),
+    "ATL": (33.6407, -84.4277, -4, "ATL", "US"),
+    "DTW": (42.2162, -83.3554, -4, "DTT", "US"),
+    "CLT": (35.2140, -80.9431, -4, "CLT", "US"),
+    "ORD": (41.9742, -87.9073, -5, "CHI", "US"),
+    "DFW": (32.8998, -97.0403, -5, "DFW", "US"),
+    "CDG": (49.0097, 2.5479, 2, "PAR", "FR"),
+    "LHR": (51.4700, -0.4543, 1, "LON", "GB"),
+    "AMS": (52.3105, 4.7683, 2, "AMS", "NL"),
+}
+
+CARRIERS = {
+    "AF": "AIR FRANCE",
+    "DL": "DELTA AIR LINES",
+    "AA": "AMERICAN AIRLINES",
+    "UA": "UNITED AIRLINES",
+    "B6": "JETBLUE AIRWAYS",
+    "BA": "BRITISH AIRWAYS",
+    "KL": "KLM ROYAL DUTCH AIRLINES",
+}
+
+AIRCRAFT = {
+    "320": "AIRBUS A320",
+    "321": "AIRBUS A321",
+    "333": "AIRBUS A330-300",
+    "738": "BOEING 737-800",
+    "77W": "BOEING 777-300ER",
+    "789": "BOEING 787-9",
+}
+
+# outbound routings JFK -> CDG as (airport, carrier) hops; returns are mirrored
+ROUTINGS = [
+    (["JFK", "CDG"], ["AF"]),
+    (["JFK", "CDG"], ["DL"]),
+    (["JFK", "CDG"], ["AA"]),
+    (["JFK", "CDG"], ["B6"]),
+    (["JFK", "LHR", "CDG"], ["BA", "BA"]),
+    (["JFK", "AMS", "CDG"], ["DL", "KL"]),
+    (["JFK", "ATL", "CDG"], ["DL", "DL"]),
+    (["JFK", "DTW", "CDG"], ["DL", "DL"]),
+    (["JFK", "ORD", "CDG"], ["UA", "UA"]),
+    (["JFK", "CLT", "CDG"], ["AA", "AA"]),
+    (["JFK", "DFW", "CDG"], ["AA", "AA"]),
+    (["JFK", "DTW", "AMS", "CDG"], ["DL", "DL", "KL"]),
+    (["JFK", "CLT", "LHR", "CDG"], ["AA", "BA", "BA"]),
+]
+
+HOTEL_STYLES = ["Hotel", "Hotel du", "Grand Hotel", "Hotel Le", "Residence", "Maison",
+                "Hotel des Arts", "Boutique Hotel", "Hotel Villa", "Studio"]
+QUARTERS = ["Marais", "Montmartre", "Opera", "Bastille", "Saint-Germain", "Louvre", "Pigalle",
+            "Batignolles", "Oberkampf", "Canal Saint-Martin", "Montparnasse", "Trocadero"]
+
+# name, category, lat, lon
+POIS = [
+    ("Eiffel Tower", "SIGHTS", 48.8584, 2.2945),
+    ("Louvre Museum", "SIGHTS", 48.8606, 2.3376),
+    ("Notre-Dame de Paris", "SIGHTS", 48.8530, 2.3499),
+    ("Arc de Triomphe", "SIGHTS", 48.8738, 2.2950),
+    ("Sacre-Coeur", "SIGHTS", 48.8867, 2.3431),
+    ("Musee d'Orsay", "SIGHTS", 48.8600, 2.3266),
+    ("Sainte-Chapelle", "SIGHTS", 48.8554, 2.3450),
+    ("Pantheon", "SIGHTS", 48.8462, 2.3464),
+    ("Centre Pompidou", "SIGHTS", 48.8607, 2.3522),
+    ("Palais Garnier", "SIGHTS", 48.8720, 2.3316),
+    ("Musee Rodin", "SIGHTS", 48.8553, 2.3159),
+    ("Les Invalides", "SIGHTS", 48.8550, 2.3125),
+    ("Place des Vosges", "SIGHTS", 48.8556, 2.3655),
+    ("Pont Alexandre III", "SIGHTS", 48.8639, 2.3136),
+    ("Jardin du Luxembourg", "BEACH_PARK", 48.8462, 2.3372),
+    ("Jardin des Tuileries", "BEACH_PARK", 48.8635, 2.3275),
+    ("Parc des Buttes-Chaumont", "BEACH_PARK", 48.8809, 2.3828),
+    ("Bois de Boulogne", "BEACH_PARK", 48.8620, 2.2491),
+    ("Parc Monceau", "BEACH_PARK", 48.8796, 2.3090),
+    ("Jardin des Plantes", "BEACH_PARK", 48.8440, 2.3596),
+    ("Paris Plages", "BEACH_PARK", 48.8566, 2.3530),
+    ("Galeries Lafayette", "SHOPPING", 48.8738, 2.3320),
+    ("Le Bon Marche", "SHOPPING", 48.8510, 2.3245),
+    ("Printemps Haussmann", "SHOPPING", 48.8740, 2.3280),
+    ("Marche aux Puces de Saint-Ouen", "SHOPPING", 48.9017, 2.3431),
+    ("Rue du Faubourg Saint-Honore", "SHOPPING", 48.8700, 2.3150),
+    ("Shakespeare and Company", "SHOPPING", 48.8526, 2.3471),
+    ("Le Comptoir du Pantheon", "RESTAURANT", 48.8467, 2.3449),
+    ("Bouillon Chartier", "RESTAURANT", 48.8719, 2.3436),
+    ("Le Procope", "RESTAURANT", 48.8530, 2.3389),
+    ("Marche des Enfants Rouges", "RESTAURANT", 48.8628, 2.3617),
+    ("Angelina", "RESTAURANT", 48.8651, 2.3285),
+    ("Cafe de Flore", "RESTAURANT", 48.8541, 2.3326),
+    ("Le Train Bleu", "RESTAURANT", 48.8448, 2.3735),
+    ("Moulin Rouge", "NIGHTLIFE", 48.8841, 2.3322),
+    ("Le Caveau de la Huchette", "NIGHTLIFE", 48.8527, 2.3465),
+    ("Rue Oberkampf bars", "NIGHTLIFE", 48.8652, 2.3785),
+    ("Le Lido", "NIGHTLIFE", 48.8718, 2.3009),
+    ("Canal Saint-Martin quays", "NIGHTLIFE", 48.8710, 2.3655),
+    ("Rex Club", "NIGHTLIFE", 48.8707, 2.3479),
+]
+
+TAGS = {
+    "SIGHTS": ["sightseeing", "landmark", "museum", "tourguide"],
+    "BEACH_PARK": ["park", "garden", "outdoor", "walking"],
+    "SHOPPING": ["shopping", "fashion", "market", "books"],
+    "RESTAURANT": ["restaurant", "french", "cafe", "historic"],
+    "NIGHTLIFE": ["nightlife", "music", "bar", "show"],
+}
+
+
+def distance_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (*AIRPORTS[a][:2], *AIRPORTS[b][:2]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(h))
+
+
+def block_minutes(a, b):
+    """Taxi plus cruise at ~800 km/h, rounded to 5 minutes."""
+    return int(round((30 + distance_km(a, b) / 13.3) / 5) * 5)
+
+
+def iso_duration(minutes):
+    return f"PT{minutes // 60}H{minutes % 60}M" if minutes % 60 else f"PT{minutes // 60}H"
+
+
+def local(utc, airport):
+    return (utc + timedelta(hours=AIRPORTS[airport][2])).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def itinerary(rng, hops, carriers, date, first_local_hour, next_id):
+    start = datetime.fromisoformat(date) + timedelta(hours=first_local_hour, minutes=rng.randrange(0, 60, 5))
+    utc = start - timedelta(hours=AIRPORTS[hops[0]][2])
+    departed = utc
+    segments = []
+    for i, (a, b) in enumerate(zip(hops, hops[1:])):
+        if i:
+            utc += timedelta(minutes=rng.randrange(75, 200, 5))
+        minutes = block_minutes(a, b)
+        long_haul = distance_km(a, b) > 3000
+        segments.append({
+            "departure": {"iataCode": a, "terminal": str(rng.randint(1, 8)), "at": local(utc, a)},
+            "arrival": {"iataCode": b, "terminal": str(rng.randint(1, 8)), "at": local(utc + timedelta(minutes=minutes), b)},
+            "carrierCode": carriers[i],
+            "number": str(rng.randint(10, 2999)),
+            "aircraft": {"code": rng.choice(["77W", "789", "333"] if long_haul else ["320", "321", "738"])},
+            "operating": {"carrierCode": carriers[i]},
+            "duration": iso_duration(minutes),
+            "id": str(next_id + i),
+            "numberOfStops": 0,
+            "blacklistedInEU": False
+        })
+        utc += timedelta(minutes=minutes)
+    return {"duration": iso_duration(int((utc - departed).total_seconds() // 60)), "segments": segments}
+
+
+def flight_offers(rng, count=50):
+    offers = []
+    for _ in range(count):
+        hops, carriers = rng.choice(ROUTINGS)
+        back_hops, back_carriers = rng.choice([r for r in ROUTINGS if len(r[0]) == len(hops)])
+        # eastbound transatlantic leaves in the evening; connections start earlier
+        out = itinerary(rng, hops, carriers, DEPART_DATE, 17 if len(hops) == 2 else 12 - 2 * (len(hops) - 3), 1)
+        back = itinerary(rng, back_hops[::-1], back_carriers[::-1], RETURN_DATE, rng.choice([8, 10, 13]),
+                         len(out["segments"]) + 1)
+        stops = len(hops) - 2
+        total = round(rng.uniform(650, 1400) if stops == 0 else rng.uniform(480, 1100) - 60 * stops, 2)
+        base = round(total / 1.25, 2)
+        validating = carriers[0]
+        offers.append({
+            "type": "flight-offer",
+            "source": "GDS",
+            "instantTicketingRequired": False,
+            "nonHomogeneous": False,
+            "oneWay": False,
+            "lastTicketingDate": "2026-05-20",
+            "numberOfBookableSeats": rng.randint(1, 9),
+            "itineraries": [out, back],
+            "price": {"currency": "USD", "total": f"{total:.2f}", "base": f"{base:.2f}",
+                      "fees": [{"amount": "0.00", "type": "SUPPLIER"}, {"amount": "0.00", "type": "TICKETING"}],
+                      "grandTotal": f"{total:.2f}"},
+            "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": False},
+            "validatingAirlineCodes": [validating],
+            "travelerPricings": [{
+                "travelerId": "1", "fareOption": "STANDARD", "travelerType": "ADULT",
+                "price": {"currency": "USD", "total": f"{total:.2f}", "base": f"{base:.2f}"},
+                "fareDetailsBySegment": [
+                    {"segmentId": s["id"], "cabin": "ECONOMY", "fareBasis": "KL7ABCD", "class": "K",
+                     "includedCheckedBags": {"quantity": 0}}
+                    for s in out["segments"] + back["segments"]
+                ]
+            }]
+        })
+    # Amadeus answers cheapest first
+    offers.sort(key=lambda o: float(o["price"]["total"]))
+    used = {s[k]["iataCode"] for o in offers for it in o["itineraries"] for s in it["segments"]
+            for k in ("departure", "arrival")}
+    return {
+        "meta": {"count": len(offers)},
+        "data": [{"type": o.pop("type"), "id": str(i), **o} for i, o in enumerate(offers, 1)],
+        "dictionaries": {
+            "locations": {code: {"cityCode": AIRPORTS[code][3], "countryCode": AIRPORTS[code][4]}
+                          for code in AIRPORTS if code in used},
+            "aircraft": AIRCRAFT,
+            "currencies": {"USD": "US DOLLAR"},
+            "carriers": CARRIERS
+        }
+    }
+
+
+def hotels_by_city(rng):
+    hotels = []
+    for i, (style, quarter) in enumerate((s, q) for s in HOTEL_STYLES for q in QUARTERS):
+        hotels.append({
+            "chainCode": "AC",
+            "iataCode": "PAR",
+            "dupeId": 700000000 + i,
+            "name": f"{style} {quarter}".upper(),
+            "hotelId": f"ACPAR{i:03d}",
+            "geoCode": {"latitude": 48.8566 + rng.uniform(-0.04, 0.04), "longitude": 2.3522 + rng.uniform(-0.06, 0.06)},
+            "address": {"countryCode": "FR"},
+            "lastUpdate": "2025-06-15T10:00:00"
+        })
+    return {"data": hotels}
+
+
+def pois(rng):
+    return {"data": [{
+        "type": "location",
+        "subType": "POINT_OF_INTEREST",
+        "id": f"POI{i}",
+        "self": {},
+        "geoCode": {"latitude": lat, "longitude": lon},
+        "name": name,
+        "category": category,
+        "rank": i + 1,
+        "tags": rng.sample(TAGS[category], 2)
+    } for i, (name, category, lat, lon) in enumerate(POIS)]}
+
+
+def main():
+    rng = random.Random(SEED)
+    for name, payload in [("flight_offers.json", flight_offers(rng)),
+                          ("hotels_by_city.json", hotels_by_city(rng)),
+                          ("pois.json", pois(rng))]:
+        with open(os.path.join(DATA_DIR, name), "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=1)
+            f.write("\n")
+        print("wrote", name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+from dataclasses import dataclass, field
+
+from offer_summary import SORT_KEYS, sort_summaries
+
+
+# ---------------------------
+# Offer Ranking
+# ---------------------------
+# Ranks summarized offers (see offer_summary.py) by user preferences, after
+# one larger upstream page has been fetched and cached. Offers are first
+# filtered on hard limits (max stops, max hours per leg). Then they are either
+# scored on weighted, min-max-normalized columns (price, total duration,
+# stops, distance from a departure-time window) or reduced to their Pareto
+# front. Everything runs on the cached page, so re-ranking with new
+# preferences never calls Amadeus again.
+
+CRITERIA = ("price", "duration", "stops", "departure")
+MODES = ("score", "pareto")
+DEFAULT_LIMIT = 5
+
+
+@dataclass(slots=True)
+class Preferences:
+    weights: dict = field(default_factory=dict)
+    depart_window: tuple = None
+    max_stops: int = None
+    max_minutes: int = None
+    mode: str = None
+    sort: str = None
+    limit: int = DEFAULT_LIMIT
+
+    @property
+    def ranked(self):
+        return self.mode == "pareto" or any(self.weights.values())
+
+
+def parse_clock(text):
+    hours, _, minutes = str(text).strip().partition(":")
+    value = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= value <= 1440:
+        raise ValueError
+    return value
+
+
+def parse_preferences(body, max_limit=250):
+    """Reads the optional ranking fields of a search body:
+
+        "rank": "score" | "pareto"
+        "weights": {"price": 1, "duration": 0.5, "stops": 1, "departure": 0.5}
+        "departWindow": "06:00-12:00"
+        "maxStops": 0
+        "maxHours": 10
+        "sort": "price" | "duration" | "stops"
+        "limit": 5
+
+    Raises ValueError with a message suitable for a 400 response."""
+    prefs = Preferences(sort=body.get("sort") if body.get("sort") in SORT_KEYS else None)
+
+    mode = body.get("rank")
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"rank must be one of: {', '.join(MODES)}")
+    prefs.mode = mode
+
+    weights = body.get("weights") or {}
+    if not isinstance(weights, dict):
+        raise ValueError("weights must be an object")
+    try:
+        prefs.weights = {k: float(weights.get(k) or 0) for k in CRITERIA}
+    except (TypeError, ValueError):
+        raise ValueError("weights must be numbers") from None
+    if any(w < 0 for w in prefs.weights.values()):
+        raise ValueError("weights must not be negative")
+    if mode == "score" and not any(prefs.weights.values()):
+        prefs.weights["price"] = 1.0
+
+    if body.get("departWindow"):
+        try:
+            start, end = str(body["departWindow"]).split("-")
+            prefs.depart_window = (parse_clock(start), parse_clock(end))
+        except ValueError:
+            raise ValueError("departWindow must look like HH:MM-HH:MM") from None
+
+    try:
+        if body.get("maxStops") not in (None, ""):
+            prefs.max_stops = int(body["maxStops"])
+        if body.get("maxHours") not in (None, ""):
+            prefs.max_minutes = int(float(body["maxHours"]) * 60)
+        if body.get("limit") not in (None, ""):
+            prefs.limit = max(1, min(int(body["limit"]), max_limit))
+    except (TypeError, ValueError):
+        raise ValueError("maxStops, maxHours and limit must be numeric") from None
+
+    return prefs
+
+
+# ---------------------------
+# Columns
+# ---------------------------
+
+def depart_minute(summary):
+    at = summary.outbound.depart_at if summary.outbound is not None else None
+    if not at or len(at) < 16:
+        return None
+    return int(at[11:13]) * 60 + int(at[14:16])
+
+
+def window_distance(minute, window):
+    """Minutes outside the departure window (0 inside it). Windows may wrap
+    past midnight, e.g. 22:00-02:00."""
+    if window is None or minute is None:
+        return 0
+    start, end = window
+    if start <= end:
+        if start <= minute <= end:
+            return 0
+        return min(abs(minute - start), abs(minute - end), 1440 - abs(minute - start), 1440 - abs(minute - end))
+    if minute >= start or minute <= end:
+        return 0
+    return min(minute - end, start - minute)
+
+
+def columns(summaries, window):
+    """One pass over the offers -> one list per criterion, missing values
+    replaced by the worst value in the column."""
+    price, duration, stops, departure = [], [], [], []
+    for s in summaries:
+        price.append(s.price)
+        duration.append(s.minutes)
+        stops.append(s.stops)
+        departure.append(window_distance(depart_minute(s), window))
+
+    known = [m for m in duration if m is not None]
+    worst = max(known) if known else 0
+    duration = [worst if m is None else m for m in duration]
+
+    known = [p for p in price if p != float("inf")]
+    worst = max(known) if known else 0
+    price = [worst if p == float("inf") else p for p in price]
+
+    return {"price": price, "duration": duration, "stops": stops, "departure": departure}
+
+
+def normalized(values):
+    lo, hi = min(values), max(values)
+    if hi == lo:
+        return [0.0] * len(values)
+    span = hi - lo
+    return [(v - lo) / span for v in values]
+
+
+# ---------------------------
+# Ranking
+# ---------------------------
+
+def apply_filters(summaries, prefs):
+    """Hard limits apply to each direction separately: maxStops 0 means
+    nonstop both ways, maxHours 10 means no leg over 10 hours."""
+    if prefs.max_stops is not None:
+        summaries = [s for s in summaries if all(
+            i.stops <= prefs.max_stops for i in (s.outbound, s.inbound) if i is not None
+        )]
+    if prefs.max_minutes is not None:
+        summaries = [s for s in summaries if all(
+            i.minutes is None or i.minutes <= prefs.max_minutes
+            for i in (s.outbound, s.inbound) if i is not None
+        )]
+    return summaries
+
+
+def scores(cols, weights):
+    total = [0.0] * len(cols["price"])
+    for name in CRITERIA:
+        w = weights.get(name)
+        if not w:
+            continue
+        for i, v in enumerate(normalized(cols[name])):
+            total[i] += w * v
+    return total
+
+
+def pareto_front(cols):
+    """Indices of offers no other offer beats on every criterion. Sweeps in
+    price order, so each candidate is only compared against the front so far."""
+    names = [n for n in CRITERIA if any(cols[n])] or ["price"]
+    points = list(zip(*(cols[n] for n in names)))
+    order = sorted(range(len(points)), key=points.__getitem__)
+
+    front = []
+    for i in order:
+        p = points[i]
+        dominated = any(
+            all(a <= b for a, b in zip(points[j], p)) and points[j] != p
+            for j in front
+        )
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def rank(summaries, prefs):
+    """Filters, orders and truncates offers to prefs.limit. Without ranking
+    preferences the Amadeus order (or the plain `sort`) is kept."""
+    summaries = apply_filters(list(summaries), prefs)
+    if not summaries:
+        return []
+
+    if not prefs.ranked:
+        if prefs.sort:
+            summaries = sort_summaries(summaries, prefs.sort)
+        return summaries[:prefs.limit]
+
+    cols = columns(summaries, prefs.depart_window)
+    weights = prefs.weights if any(prefs.weights.values()) else {"price": 1.0}
+    score = scores(cols, weights)
+
+    candidates = pareto_front(cols) if prefs.mode == "pareto" else range(len(summaries))
+    best = sorted(candidates, key=lambda i: (score[i], cols["price"][i], i))
+    return [summaries[i] for i in best[:prefs.limit]]
@@ -0,0 +1,170 @@
+import json
+import re
+from dataclasses import asdict, dataclass, field, is_dataclass
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # optional, plain json works just slower
+    orjson = None
+
+
+# ---------------------------
+# Offer Summaries
+# ---------------------------
+# One pass over each raw Amadeus flight offer builds a slotted record with the
+# fields the frontend shows, plus parsed durations so offers can be sorted on
+# the server. to_dict() produces exactly the JSON shape /api/flights has
+# always returned.
+
+DURATION_RE = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?)?")
+
+SORT_KEYS = ("price", "duration", "stops")
+
+
+@lru_cache(maxsize=4096)
+def parse_duration(iso):
+    """ISO-8601 duration like "PT10H49M" or "P1DT2H" -> minutes (None if unparsable)."""
+    if not iso:
+        return None
+    m = DURATION_RE.fullmatch(iso)
+    if not m:
+        return None
+    days, hours, minutes = (int(g) if g else 0 for g in m.groups())
+    return days * 1440 + hours * 60 + minutes
+
+
+@dataclass(slots=True)
+class ItinerarySummary:
+    origin: str = None
+    destination: str = None
+    depart_at: str = None
+    arrive_at: str = None
+    stops: int = 0
+    duration: str = None
+    minutes: int = None
+    airlines: list = field(default_factory=list)
+    carrier_codes: list = field(default_factory=list)
+
+    def to_dict(self):
+        return {
+            "from": self.origin,
+            "to": self.destination,
+            "departAt": self.depart_at,
+            "arriveAt": self.arrive_at,
+            "stops": self.stops,
+            "duration": self.duration,
+            "airlines": self.airlines,
+            "carrierCodes": self.carrier_codes,
+        }
+
+
+@dataclass(slots=True)
+class OfferSummary:
+    id: str = None
+    total: str = None
+    currency: str = None
+    price: float = float("inf")
+    flight_codes: list = field(default_factory=list)
+    outbound: ItinerarySummary = None
+    inbound: ItinerarySummary = None
+
+    @property
+    def minutes(self):
+        legs = [i.minutes for i in (self.outbound, self.inbound) if i is not None and i.minutes is not None]
+        return sum(legs) if legs else None
+
+    @property
+    def stops(self):
+        return sum(i.stops for i in (self.outbound, self.inbound) if i is not None)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "price": {"total": self.total, "currency": self.currency},
+            "flightCodes": self.flight_codes,
+            "outbound": self.outbound.to_dict() if self.outbound is not None else None,
+            "inbound": self.inbound.to_dict() if self.inbound is not None else None,
+        }
+
+
+def summarize_itinerary(itin, carriers, flight_codes):
+    segs = itin.get("segments") or []
+    codes = {}
+    for s in segs:
+        cc = s.get("carrierCode")
+        if cc:
+            codes[cc] = None
+            number = s.get("number")
+            if number:
+                flight_codes.append(f"{cc} {number}")
+
+    first = segs[0] if segs else None
+    last = segs[-1] if segs else None
+    duration = itin.get("duration")
+    carrier_codes = list(codes)
+
+    return ItinerarySummary(
+        origin=first.get("departure", {}).get("iataCode") if first else None,
+        destination=last.get("arrival", {}).get("iataCode") if last else None,
+        depart_at=first.get("departure", {}).get("at") if first else None,
+        arrive_at=last.get("arrival", {}).get("at") if last else None,
+        stops=max(0, len(segs) - 1),
+        duration=duration,
+        minutes=parse_duration(duration),
+        airlines=[carriers.get(cc, cc) for cc in carrier_codes],
+        carrier_codes=carrier_codes,
+    )
+
+
+def summarize(offer, dictionaries):
+    carriers = (dictionaries or {}).get("carriers") or {}
+    itineraries = offer.get("itineraries") or []
+    price = offer.get("price") or {}
+    total = price.get("total")
+
+    flight_codes = []
+    summaries = [summarize_itinerary(itin, carriers, flight_codes) if itin else None for itin in itineraries[:2]]
+    # flight codes cover every itinerary, not just the first two
+    for itin in itineraries[2:]:
+        summarize_itinerary(itin, carriers, flight_codes)
+
+    try:
+        numeric = float(total)
+    except (TypeError, ValueError):
+        numeric = float("inf")
+
+    return OfferSummary(
+        id=offer.get("id"),
+        total=total,
+        currency=price.get("currency"),
+        price=numeric,
+        flight_codes=flight_codes,
+        outbound=summaries[0] if len(summaries) > 0 else None,
+        inbound=summaries[1] if len(summaries) > 1 else None,
+    )
+
+
+def sort_summaries(summaries, key="price"):
+    """Stable sort by price, total duration or stops; ties keep Amadeus order."""
+    if key == "price":
+        return sorted(summaries, key=lambda s: s.price)
+    if key == "duration":
+        return sorted(summaries, key=lambda s: (s.minutes is None, s.minutes or 0, s.price))
+    if key == "stops":
+        return sorted(summaries, key=lambda s: (s.stops, s.price))
+    return list(summaries)
+
+
+def dumps(obj):
+    """JSON bytes, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), default=dataclass_fields).encode("utf-8")
+
+
+def dataclass_fields(obj):
+    """json.dumps fallback for dataclasses, in the same shape orjson writes."""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
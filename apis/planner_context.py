@@ -0,0 +1,230 @@
+import json
+import math
+import re
+from dataclasses import dataclass, field, replace
+
+import offer_ranking
+import offer_summary
+
+try:
+    import tiktoken
+    ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:  # optional, count_tokens() falls back to an estimate
+    ENCODING = None
+
+
+# ---------------------------
+# Planner Context
+# ---------------------------
+# The aggregated trip (TripPlanner.plan) goes to the LLM planner, and its
+# latency and cost grow with prompt tokens. This compacts it:
+#   - only the fields the planner reasons about (price, times, stops,
+#     carriers, hotel room, POI category); ids, links, coordinates, fare
+#     details and aircraft are dropped
+#   - carriers and airports are written once, in lookup tables, and rows
+#     refer to them by code
+#   - each list is cut to its best entries (Amadeus order or offer_ranking
+#     preferences for flights, cheapest hotels and transfers, highest-ranked
+#     POIs), and cut further until the result fits `budget` tokens
+#   - rows are pipe-separated under one header line ("text"), or
+#     {"cols": [...], "rows": [[...]]} tables ("json")
+
+LIMITS = {"flights": 5, "hotels": 5, "activities": 10, "transfers": 3}
+SECTIONS = ("flights", "hotels", "activities", "transfers")
+
+# digit runs of up to 3, letter runs, or single symbols: close to how BPE
+# vocabularies split this kind of text
+TOKEN_RE = re.compile(r"\d{1,3}|[A-Za-z]+|[^\sA-Za-z\d]")
+CODE_SPLIT_RE = re.compile(r"[\s>/]+")
+
+
+def count_tokens(text):
+    """Exact with tiktoken installed (cl100k_base), else an estimate that
+    counts ~4 letters per token."""
+    if ENCODING is not None:
+        return len(ENCODING.encode(text))
+    return sum(math.ceil(len(p) / 4) if p[0].isalpha() else 1 for p in TOKEN_RE.findall(text))
+
+
+@dataclass(slots=True)
+class PlannerContext:
+    text: str
+    tokens: int
+    rows: dict = field(default_factory=dict)
+    fits: bool = True
+
+
+def short_time(at):
+    """"2026-06-01T18:27:00" -> "06-01 18:27" (the year is in the trip line)."""
+    return f"{at[5:10]} {at[11:16]}" if at and len(at) >= 16 else (at or "")
+
+
+def short_minutes(minutes):
+    return "" if minutes is None else f"{minutes // 60}h{minutes % 60:02d}"
+
+
+def price_value(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("inf")
+
+
+def words(code):
+    """"STANDARD_ROOM" -> "standard room"."""
+    return (code or "").replace("_", " ").lower()
+
+
+# ---------------------------
+# Sections
+# ---------------------------
+
+def leg_cell(leg):
+    if leg is None:
+        return ""
+    return (f"{leg.origin} {short_time(leg.depart_at)}>{leg.destination} {short_time(leg.arrive_at)} "
+            f"{short_minutes(leg.minutes)} {leg.stops} {'/'.join(leg.carrier_codes)}")
+
+
+def flight_table(found, limit, prefs=None):
+    """(header, rows, carriers, airports) for the best `limit` offers."""
+    found = found or {}
+    dictionaries = found.get("dictionaries") or {}
+    summaries = [offer_summary.summarize(o, dictionaries) for o in found.get("data") or []]
+    prefs = replace(prefs or offer_ranking.Preferences(), limit=limit)
+    ranked = offer_ranking.rank(summaries, prefs)
+
+    carriers, airports = {}, {}
+    names = dictionaries.get("carriers") or {}
+    locations = dictionaries.get("locations") or {}
+    rows = []
+    for s in ranked:
+        for leg in (s.outbound, s.inbound):
+            if leg is None:
+                continue
+            for code in leg.carrier_codes:
+                carriers[code] = names.get(code, code).title()
+            for code in (leg.origin, leg.destination):
+                loc = locations.get(code) or {}
+                city = loc.get("cityCode") if loc.get("cityCode") != code else None
+                airports[code] = "/".join(x for x in (city, loc.get("countryCode")) if x)
+        rows.append([s.total, leg_cell(s.outbound), leg_cell(s.inbound)])
+
+    currencies = {s.currency for s in ranked}
+    currency = currencies.pop() if len(currencies) == 1 else "mixed"
+    header = [f"price {currency}", "out: from dep>to arr dur stops carriers", "return"]
+    return header, rows, carriers, airports
+
+
+def hotel_table(found, limit):
+    hotels = []
+    for entry in (found or {}).get("data") or []:
+        offers = sorted(entry.get("offers") or [], key=lambda o: price_value((o.get("price") or {}).get("total")))
+        if not offers:
+            continue
+        best = offers[0]
+        room = (best.get("room") or {}).get("typeEstimated") or {}
+        beds = f"{room.get('beds', '')} {words(room.get('bedType'))}".strip()
+        hotels.append((price_value((best.get("price") or {}).get("total")), [
+            (entry.get("hotel") or {}).get("name", "").title(),
+            (best.get("price") or {}).get("total"),
+            (best.get("price") or {}).get("currency"),
+            ", ".join(x for x in (words(room.get("category")), beds, words(best.get("boardType"))) if x)
+        ]))
+    hotels.sort(key=lambda h: h[0])
+    return ["name", "total", "cur", "room"], [row for _, row in hotels[:limit]]
+
+
+def activity_table(found, limit):
+    pois = sorted((found or {}).get("data") or [], key=lambda p: p.get("rank", float("inf")))
+    rows = [[p.get("name", ""), words(p.get("category")), ",".join((p.get("tags") or [])[:3])] for p in pois[:limit]]
+    return ["name", "category", "tags"], rows
+
+
+def transfer_table(found, limit):
+    offers = sorted((found or {}).get("data") or [],
+                    key=lambda t: price_value((t.get("quotation") or {}).get("monetaryAmount")))
+    rows = []
+    for t in offers[:limit]:
+        quote = t.get("quotation") or {}
+        rows.append([words(t.get("transferType")), quote.get("monetaryAmount"), quote.get("currencyCode"),
+                     (t.get("vehicle") or {}).get("description", ""), (t.get("serviceProvider") or {}).get("name", "")])
+    return ["type", "price", "cur", "vehicle", "provider"], rows
+
+
+def trip_line(query):
+    query = query or {}
+    parts = [f"{query.get('origin', '?')}>{query.get('destination', '?')}",
+             f"{query.get('depart_date', '')}..{query.get('return_date', '')}",
+             f"adults={query.get('adults', 1)}"]
+    for key in ("rooms", "price_range", "categories"):
+        if query.get(key):
+            parts.append(f"{key}={query[key]}")
+    return " ".join(parts)
+
+
+# ---------------------------
+# Encoding
+# ---------------------------
+
+def cell(value):
+    return "" if value is None else str(value).replace("|", "/").replace("\n", " ")
+
+
+def render_text(trip, tables, carriers, airports, errors):
+    lines = [f"TRIP {trip}"]
+    if carriers:
+        lines.append("CARRIERS " + ";".join(f"{k}={v}" for k, v in carriers.items()))
+    if airports:
+        lines.append("AIRPORTS " + ";".join(f"{k}={v}" for k, v in airports.items() if v))
+    for name, (header, rows) in tables.items():
+        if not rows:
+            continue
+        lines.append(f"{name.upper()} " + "|".join(header))
+        lines.extend("|".join(cell(v) for v in row) for row in rows)
+    if errors:
+        lines.append("UNAVAILABLE " + ";".join(f"{k}={v}" for k, v in errors.items()))
+    return "\n".join(lines)
+
+
+def render_json(trip, tables, carriers, airports, errors):
+    payload = {"trip": trip, "carriers": carriers, "airports": {k: v for k, v in airports.items() if v}}
+    for name, (header, rows) in tables.items():
+        if rows:
+            payload[name] = {"cols": header, "rows": rows}
+    if errors:
+        payload["unavailable"] = errors
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def compact(itinerary, budget=None, limits=None, fmt="text", prefs=None):
+    """PlannerContext for an aggregated trip. With `budget` (tokens), the
+    longest list loses its last row until the text fits or every list is
+    down to one row (then fits=False)."""
+    limits = dict(LIMITS, **(limits or {}))
+    header, flights, carriers, airports = flight_table(itinerary.get("flights"), limits["flights"], prefs)
+    full = {
+        "flights": (header, flights),
+        "hotels": hotel_table(itinerary.get("hotels"), limits["hotels"]),
+        "activities": activity_table(itinerary.get("activities"), limits["activities"]),
+        "transfers": transfer_table(itinerary.get("transfers"), limits["transfers"]),
+    }
+    trip = trip_line(itinerary.get("query"))
+    errors = itinerary.get("errors") or {}
+    render = render_json if fmt == "json" else render_text
+    counts = {name: len(rows) for name, (_, rows) in full.items()}
+
+    while True:
+        tables = {name: (h, rows[:counts[name]]) for name, (h, rows) in full.items()}
+        # only list the carriers and airports the remaining flight rows use
+        kept = set(CODE_SPLIT_RE.split(" ".join(row[1] + " " + row[2] for row in tables["flights"][1])))
+        text = render(trip, tables,
+                      {k: v for k, v in carriers.items() if k in kept},
+                      {k: v for k, v in airports.items() if k in kept}, errors)
+        tokens = count_tokens(text)
+        if budget is None or tokens <= budget:
+            return PlannerContext(text, tokens, counts, True)
+        longest = max(SECTIONS, key=lambda n: counts[n])
+        if counts[longest] <= 1:
+            return PlannerContext(text, tokens, counts, False)
+        counts[longest] -= 1
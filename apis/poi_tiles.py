@@ -0,0 +1,147 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ttl_cache import TTLCache, MISSING
+
+
+# ---------------------------
+# POI Tile Cache
+# ---------------------------
+# Points of interest hardly change, and itineraries for the same city ask for
+# nearly the same bounding box again and again. Boxes are snapped to a fixed
+# lat/lon grid of `tile_deg` degrees. Each tile's POIs (all categories) are
+# cached with a TTL, so a box is answered by merging cached tiles and
+# fetching only the missing ones, concurrently. Two requests that miss the
+# same tile share one upstream call.
+
+TILE_DEG = 0.1
+TILE_TTL = 24 * 3600
+
+
+def in_box(poi, north, south, east, west):
+    geo = poi.get("geoCode") or {}
+    lat, lon = geo.get("latitude"), geo.get("longitude")
+    if lat is None or lon is None or not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lon <= east
+    return lon >= west or lon <= east  # box across the antimeridian
+
+
+class PoiTileCache:
+    def __init__(self, fetch, tile_deg=TILE_DEG, ttl=TILE_TTL, maxsize=4096, max_concurrency=4, store=None):
+        """fetch(north, south, east, west) -> list of POIs inside that box."""
+        self.fetch = fetch
+        self.tile_deg = tile_deg
+        self.columns = round(360 / tile_deg)
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, negative_ttl=ttl, store=store)
+        self.pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="poi-tile")
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    # ---------------------------
+    # Grid
+    # ---------------------------
+
+    def tiles(self, north, south, east, west):
+        """(row, col) of every tile the box touches."""
+        deg = self.tile_deg
+        rows = range(math.floor(south / deg), math.floor(north / deg) + 1)
+        first, last = math.floor(west / deg), math.floor(east / deg)
+        if east < west:
+            last += self.columns
+        half = self.columns // 2
+        cols = [(c + half) % self.columns - half for c in range(first, last + 1)]
+        return [(r, c) for r in rows for c in cols]
+
+    def tile_key(self, tile):
+        return f"{self.tile_deg}:{tile[0]}:{tile[1]}"
+
+    def tile_box(self, tile):
+        deg = self.tile_deg
+        row, col = tile
+        return {
+            "north": min((row + 1) * deg, 90.0),
+            "south": max(row * deg, -90.0),
+            "east": (col + 1) * deg,
+            "west": col * deg
+        }
+
+    # ---------------------------
+    # Lookups
+    # ---------------------------
+
+    def fetch_tile(self, tile, key):
+        try:
+            pois = self.fetch(**self.tile_box(tile))
+            self.cache.set(key, pois)
+            return pois
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+    def tile_pois(self, tiles):
+        """POI lists for the tiles, from cache where possible. Every miss is
+        fetched at the same time; a failed tile raises after the rest are cached."""
+        results = {}
+        pending = {}
+        with self.lock:
+            for tile in tiles:
+                key = self.tile_key(tile)
+                pois = self.cache.get(key)
+                if pois is not MISSING:
+                    results[tile] = pois
+                    continue
+                future = self.in_flight.get(key)
+                if future is None:
+                    future = self.in_flight[key] = self.pool.submit(self.fetch_tile, tile, key)
+                    self.upstream_calls += 1
+                else:
+                    self.coalesced += 1
+                pending[tile] = future
+
+        error = None
+        for tile, future in pending.items():
+            try:
+                results[tile] = future.result()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return results
+
+    def find(self, north, south, east, west, categories=None, limit=None):
+        """POIs inside the box, most relevant first (Amadeus rank), optionally
+        limited to the given categories ("SIGHTS,RESTAURANT" or a list)."""
+        if isinstance(categories, str):
+            categories = categories.split(",")
+        wanted = {c.strip().upper() for c in categories or () if c.strip()}
+
+        seen = set()
+        pois = []
+        for tile_list in self.tile_pois(self.tiles(north, south, east, west)).values():
+            for poi in tile_list:
+                poi_id = poi.get("id")
+                if poi_id in seen or not in_box(poi, north, south, east, west):
+                    continue
+                if wanted and poi.get("category") not in wanted:
+                    continue
+                seen.add(poi_id)
+                pois.append(poi)
+
+        pois.sort(key=lambda p: p.get("rank", float("inf")))
+        return pois[:limit] if limit else pois
+
+    def warm(self, boxes):
+        """Prefetches the tiles for (north, south, east, west) boxes, e.g. the
+        most popular destinations at startup."""
+        tiles = {t for box in boxes for t in self.tiles(*box)}
+        self.tile_pois(tiles)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.cache.stats(), upstream_calls=self.upstream_calls,
+                        coalesced=self.coalesced, in_flight=len(self.in_flight))
@@ -0,0 +1,419 @@
+import asyncio
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+
+# ---------------------------
+# Rate Limiting
+# ---------------------------
+# Token bucket shared by every thread in the process: `rate` tokens per
+# second refill up to `burst`. try_acquire() never waits; callers that run
+# out (the search refresher's hourly budget) skip the work instead.
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1.0):
+        with self.lock:
+            self.refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+
+# ---------------------------
+# Amadeus Rate Governor
+# ---------------------------
+# One limiter per Amadeus endpoint family (shopping, reference-data,
+# booking), each a token bucket with a monthly quota. Waiters queue in
+# priority lanes: when a token frees up it goes to the highest-priority
+# waiter, so a booking never waits behind a queue of searches. The last
+# `reserve` share of each monthly quota is also kept for the high lane.
+#
+# Bucket and quota state lives in memory, or in a small SQLite file
+# (AMADEUS_RATE_STORE) when several worker processes share one Amadeus key.
+# Lane ordering is per process; the token budget is shared.
+#
+# acquire() blocks the calling thread. asyncio code uses acquire_async(),
+# which keeps its place in the same lanes but sleeps on the event loop
+# between try_acquire() attempts. self.cond only guards the lanes and
+# counters and is never held across a state call: with SqliteState a take
+# can wait up to 10s on another process's write lock, so acquire_async()
+# runs those in a worker thread instead of on the loop.
+
+HIGH, NORMAL, LOW = 0, 1, 2
+LANES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+FAMILIES = ("shopping", "reference-data", "booking")
+
+# Amadeus self-service test environment: 10 transactions per second
+DEFAULT_RATE = 10.0
+
+# acquire(timeout=...) default: the governor's own timeout
+MISSING_TIMEOUT = object()
+
+# how often an async waiter that is not first in line checks again
+ASYNC_POLL = 0.01
+
+
+class RateLimited(Exception):
+    def __init__(self, family, reason):
+        super().__init__(f"{family}: {reason}")
+        self.family = family
+        self.reason = reason
+
+
+def current_month():
+    return time.strftime("%Y-%m", time.gmtime())
+
+
+class MemoryState:
+    """Bucket levels and monthly usage for one process."""
+
+    def __init__(self):
+        self.buckets = {}  # name -> (tokens, updated)
+        self.usage = {}  # (name, month) -> used
+        self.lock = threading.Lock()
+
+    def take(self, name, rate, burst, now):
+        """Takes one token and returns 0, or returns the seconds until one is available."""
+        with self.lock:
+            tokens, updated = self.buckets.get(name, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            if tokens >= 1:
+                self.buckets[name] = (tokens - 1, now)
+                return 0.0
+            self.buckets[name] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def level(self, name, rate, burst, now):
+        with self.lock:
+            tokens, updated = self.buckets.get(name, (burst, now))
+            return min(burst, tokens + max(0.0, now - updated) * rate)
+
+    def drain(self, name, rate, burst, seconds, now):
+        """Empties the bucket for `seconds`, e.g. after a 429 with Retry-After."""
+        with self.lock:
+            tokens, updated = self.buckets.get(name, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            self.buckets[name] = (min(tokens, -seconds * rate), now)
+
+    def used(self, name, month, add=0):
+        with self.lock:
+            key = (name, month)
+            self.usage[key] = self.usage.get(key, 0) + add
+            return self.usage[key]
+
+
+class SqliteState(MemoryState):
+    """Same as MemoryState, but every process using the file shares it."""
+
+    def __init__(self, path):
+        self.path = path
+        self.reopen()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS usage (name TEXT, month TEXT, used INTEGER, PRIMARY KEY (name, month))")
+
+    def reopen(self):
+        """New connection and lock, e.g. in a worker forked from a preloading master."""
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+
+    def transaction(self, name, burst, now, update):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                tokens, updated = row if row else (burst, now)
+                tokens, result = update(tokens, updated)
+                self.conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                                  (name, tokens, now))
+                self.conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def take(self, name, rate, burst, now):
+        def update(tokens, updated):
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            if tokens >= 1:
+                return tokens - 1, 0.0
+            return tokens, (1 - tokens) / rate
+        return self.transaction(name, burst, now, update)
+
+    def level(self, name, rate, burst, now):
+        with self.lock:
+            row = self.conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+        tokens, updated = row if row else (burst, now)
+        return min(burst, tokens + max(0.0, now - updated) * rate)
+
+    def drain(self, name, rate, burst, seconds, now):
+        def update(tokens, updated):
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            return min(tokens, -seconds * rate), None
+        self.transaction(name, burst, now, update)
+
+    def used(self, name, month, add=0):
+        with self.lock:
+            if add:
+                self.conn.execute(
+                    "INSERT INTO usage (name, month, used) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name, month) DO UPDATE SET used = used + excluded.used",
+                    (name, month, add)
+                )
+            row = self.conn.execute("SELECT used FROM usage WHERE name = ? AND month = ?", (name, month)).fetchone()
+            return row[0] if row else 0
+
+
+class RateLimiter:
+    def __init__(self, name, rate=DEFAULT_RATE, burst=None, monthly_quota=None, reserve=0.05,
+                 state=None, max_samples=1024):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.monthly_quota = monthly_quota
+        self.reserve = reserve
+        self.state = state or MemoryState()
+
+        self.cond = threading.Condition()
+        self.waiters = []  # heap of (priority, seq)
+        self.seq = itertools.count()
+
+        self.granted = {lane: 0 for lane in LANES.values()}
+        self.waits = {lane: deque(maxlen=max_samples) for lane in LANES.values()}
+        self.max_wait = {lane: 0.0 for lane in LANES.values()}
+        self.timeouts = 0
+        self.rejected = 0
+        self.paused = 0
+
+    def quota_left(self, priority):
+        if self.monthly_quota is None:
+            return None
+        limit = self.monthly_quota if priority == HIGH else self.monthly_quota * (1 - self.reserve)
+        return limit - self.state.used(self.name, current_month())
+
+    def enqueue(self, priority):
+        """Takes a place in the priority lane; call with self.cond held."""
+        ticket = (priority, next(self.seq))
+        heapq.heappush(self.waiters, ticket)
+        return ticket
+
+    def dequeue(self, ticket):
+        """Leaves the queue; call with self.cond held."""
+        self.waiters.remove(ticket)
+        heapq.heapify(self.waiters)
+        # the next waiter in line may be able to go now
+        self.cond.notify_all()
+
+    def first(self, ticket):
+        with self.cond:
+            return self.waiters[0] == ticket
+
+    def try_acquire(self, ticket, start):
+        """0.0 when `ticket` got a token, else the seconds until one frees up
+        (None while other waiters are ahead). Call without self.cond held.
+        Raises RateLimited when the lane's quota is spent."""
+        if not self.first(ticket):
+            return None
+        priority = ticket[0]
+        left = self.quota_left(priority)
+        if left is not None and left <= 0:
+            with self.cond:
+                self.rejected += 1
+            raise RateLimited(self.name, "monthly quota exhausted")
+        wait = self.state.take(self.name, self.rate, self.burst, time.time())
+        if wait == 0:
+            self.state.used(self.name, current_month(), 1)
+            with self.cond:
+                self.record(priority, time.monotonic() - start)
+        return wait
+
+    def remaining(self, deadline, timeout):
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            with self.cond:
+                self.timeouts += 1
+            raise RateLimited(self.name, f"no capacity within {timeout:g}s")
+        return remaining
+
+    def acquire(self, priority=NORMAL, timeout=None):
+        """Waits for a token in the given lane. Raises RateLimited when the
+        monthly quota for the lane is spent or the timeout passes first."""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+
+        with self.cond:
+            ticket = self.enqueue(priority)
+        try:
+            while True:
+                wait = self.try_acquire(ticket, start)
+                if wait == 0:
+                    return True
+                remaining = self.remaining(deadline, timeout)
+                if remaining is not None:
+                    wait = remaining if wait is None else min(wait, remaining)
+                with self.cond:
+                    # the waiter ahead may have left since try_acquire looked
+                    if wait is not None or self.waiters[0] != ticket:
+                        self.cond.wait(wait)
+        finally:
+            with self.cond:
+                self.dequeue(ticket)
+
+    async def acquire_async(self, priority=NORMAL, timeout=None):
+        """acquire() for the event loop: waits with asyncio.sleep instead of
+        holding a thread."""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+
+        shared = isinstance(self.state, SqliteState)
+        with self.cond:
+            ticket = self.enqueue(priority)
+        try:
+            while True:
+                if shared and self.first(ticket):
+                    wait = await asyncio.to_thread(self.try_acquire, ticket, start)
+                else:
+                    wait = self.try_acquire(ticket, start)
+                if wait == 0:
+                    return True
+                remaining = self.remaining(deadline, timeout)
+                wait = ASYNC_POLL if wait is None else wait
+                await asyncio.sleep(wait if remaining is None else min(wait, remaining))
+        finally:
+            with self.cond:
+                self.dequeue(ticket)
+
+    def record(self, priority, waited):
+        lane = LANES[priority]
+        self.granted[lane] += 1
+        self.waits[lane].append(waited)
+        self.max_wait[lane] = max(self.max_wait[lane], waited)
+
+    def pause(self, seconds):
+        """Upstream said slow down (429 + Retry-After): hold everyone back."""
+        with self.cond:
+            self.paused += 1
+        self.state.drain(self.name, self.rate, self.burst, seconds, time.time())
+
+    def metrics(self):
+        used = self.state.used(self.name, current_month())
+        tokens = self.state.level(self.name, self.rate, self.burst, time.time())
+        with self.cond:
+            waits = {}
+            for lane, samples in self.waits.items():
+                ordered = sorted(samples)
+                waits[lane] = {
+                    "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2) if ordered else 0.0,
+                    "max_ms": round(self.max_wait[lane] * 1000, 2)
+                }
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "tokens": round(tokens, 2),
+                "queued": len(self.waiters),
+                "granted": dict(self.granted),
+                "wait": waits,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "paused": self.paused,
+                "month_used": used,
+                "month_remaining": None if self.monthly_quota is None else max(0, self.monthly_quota - used)
+            }
+
+
+class RateGovernor:
+    def __init__(self, limits=None, store_path=None, timeout=30.0):
+        """limits: {family: {"rate": .., "burst": .., "monthly_quota": ..}}"""
+        self.state = SqliteState(store_path) if store_path else MemoryState()
+        self.timeout = timeout
+        self.limiters = {
+            family: RateLimiter(family, state=self.state, **(limits or {}).get(family, {}))
+            for family in FAMILIES
+        }
+
+    @classmethod
+    def from_env(cls):
+        """AMADEUS_RATE_<FAMILY>, AMADEUS_BURST_<FAMILY> and AMADEUS_QUOTA_<FAMILY>
+        (e.g. AMADEUS_RATE_SHOPPING=10), AMADEUS_RATE_STORE and AMADEUS_RATE_TIMEOUT."""
+        limits = {}
+        for family in FAMILIES:
+            suffix = family.upper().replace("-", "_")
+            config = {"rate": float(os.getenv(f"AMADEUS_RATE_{suffix}", DEFAULT_RATE))}
+            if os.getenv(f"AMADEUS_BURST_{suffix}"):
+                config["burst"] = float(os.getenv(f"AMADEUS_BURST_{suffix}"))
+            if os.getenv(f"AMADEUS_QUOTA_{suffix}"):
+                config["monthly_quota"] = int(os.getenv(f"AMADEUS_QUOTA_{suffix}"))
+            limits[family] = config
+        return cls(limits, store_path=os.getenv("AMADEUS_RATE_STORE") or None,
+                   timeout=float(os.getenv("AMADEUS_RATE_TIMEOUT", "30")))
+
+    @staticmethod
+    def family_for(target):
+        """Endpoint family of a family name, URL or path; None for calls that
+        are not rate limited (the OAuth token endpoint)."""
+        if target in FAMILIES:
+            return target
+        path = urlsplit(target).path if "://" in target else target
+        if "/security/" in path:
+            return None
+        if "/booking/" in path or "/ordering/" in path:
+            return "booking"
+        if "/shopping/" in path:
+            return "shopping"
+        return "reference-data"
+
+    def limiter_for(self, target, priority):
+        """(limiter, lane) for a call; limiter is None when it is not limited."""
+        family = self.family_for(target)
+        if family is None:
+            return None, priority
+        if priority is None:
+            priority = HIGH if family == "booking" else NORMAL
+        return self.limiters[family], priority
+
+    def acquire(self, target, priority=None, timeout=MISSING_TIMEOUT):
+        limiter, priority = self.limiter_for(target, priority)
+        if limiter is not None:
+            limiter.acquire(priority, self.timeout if timeout is MISSING_TIMEOUT else timeout)
+
+    async def acquire_async(self, target, priority=None, timeout=MISSING_TIMEOUT):
+        limiter, priority = self.limiter_for(target, priority)
+        if limiter is not None:
+            await limiter.acquire_async(priority, self.timeout if timeout is MISSING_TIMEOUT else timeout)
+
+    def pause(self, target, seconds):
+        family = self.family_for(target)
+        if family is not None:
+            self.limiters[family].pause(seconds)
+
+    def reopen(self):
+        """For a worker forked after the governor was built: the shared
+        SQLite state gets its own connection."""
+        if isinstance(self.state, SqliteState):
+            self.state.reopen()
+
+    def metrics(self):
+        return {family: limiter.metrics() for family, limiter in self.limiters.items()}
@@ -0,0 +1,203 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import telemetry
+from telemetry import span
+
+
+# ---------------------------
+# Result Sinks
+# ---------------------------
+# Search results are persisted off the request thread. Handlers call
+# BackgroundWriter.submit(), which only enqueues the record; a daemon thread
+# drains the queue in batches and hands each batch to a sink.
+#
+# fsync policy for file sinks:
+#   "never"    - leave flushing to the OS
+#   "batch"    - fsync after every batch (default)
+#   "interval" - fsync at most once every `fsync_interval` seconds
+
+
+class ResultSink:
+    def write_batch(self, records):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class NullSink(ResultSink):
+    def write_batch(self, records):
+        pass
+
+
+class JsonlSink(ResultSink):
+    """Append-only JSON Lines file, one search record per line."""
+
+    def __init__(self, path, fsync="batch", fsync_interval=1.0):
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.last_fsync = 0.0
+        self.f = open(path, "a", encoding="utf-8")
+
+    def write_batch(self, records):
+        for record in records:
+            self.f.write(json.dumps(record, separators=(",", ":")))
+            self.f.write("\n")
+        self.f.flush()
+
+        now = time.monotonic()
+        if self.fsync == "batch" or (self.fsync == "interval" and now - self.last_fsync >= self.fsync_interval):
+            os.fsync(self.f.fileno())
+            self.last_fsync = now
+
+    def close(self):
+        self.f.flush()
+        if self.fsync != "never":
+            os.fsync(self.f.fileno())
+        self.f.close()
+
+
+class SqliteSink(ResultSink):
+    """One row per search: id, saved_at and the JSON payload."""
+
+    def __init__(self, path, fsync="batch"):
+        # Only the writer thread touches the connection after construction
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=" + ("OFF" if fsync == "never" else "NORMAL"))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS flight_results "
+            "(id TEXT PRIMARY KEY, saved_at TEXT, payload TEXT)"
+        )
+
+    def write_batch(self, records):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO flight_results (id, saved_at, payload) VALUES (?, ?, ?)",
+                [(r.get("search_id"), r.get("saved_at"), json.dumps(r)) for r in records]
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class BackgroundWriter:
+    def __init__(self, sink, batch_size=100, flush_interval=0.5, max_queue=10000):
+        """sink: a ResultSink, or a callable returning one. The writer thread
+        and a callable's sink are only created on the first submit() in each
+        process, so a master that preloads the app and forks workers never
+        opens the file itself and every worker gets a live thread."""
+        self.make_sink = sink if callable(sink) else (lambda: sink)
+        self.sink = None
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.closed = False
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+
+    def check(self):
+        """Builds the sink once and closes it again, so a bad sink kind or an
+        unwritable path fails at startup instead of on the first submit()."""
+        self.make_sink().close()
+
+    def start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            if self.pid is not None:
+                # forked child: the parent's thread and queue locks did not come along
+                self.queue = queue.Queue(maxsize=self.max_queue)
+                self.lock = threading.Lock()
+            self.sink = self.make_sink()
+            self.thread = threading.Thread(target=self.run, name="result-writer", daemon=True)
+            self.thread.start()
+            self.pid = os.getpid()
+
+    def submit(self, record):
+        """Never blocks the caller; records are dropped if the queue is full."""
+        if self.pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def run(self):
+        stop = False
+        while not stop:
+            batch = []
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    with span("persist"):
+                        self.sink.write_batch(batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    self.errors += 1
+                    telemetry.log_event("result_sink_failed", level=logging.ERROR, records=len(batch), error=str(e))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.pid != os.getpid():
+            return  # never started here
+        try:
+            # a stuck writer with a full queue must not hang shutdown
+            self.queue.put(None, timeout=5)
+        except queue.Full:
+            telemetry.log_event("result_sink_close_timeout", level=logging.WARNING, queued=self.queue.qsize())
+            return
+        self.thread.join(timeout=5)
+        if not self.thread.is_alive():
+            self.sink.close()
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+
+def make_sink(kind, path, fsync="batch"):
+    if kind == "jsonl":
+        return JsonlSink(path, fsync=fsync)
+    if kind == "sqlite":
+        return SqliteSink(path, fsync=fsync)
+    if kind == "none":
+        return NullSink()
+    raise ValueError(f"Unknown result sink '{kind}'")
@@ -0,0 +1,240 @@
+import asyncio
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ttl_cache import TTLCache, MISSING
+
+
+# ---------------------------
+# Flight Search Cache
+# ---------------------------
+# Caches upstream flight offer results keyed on the normalized search params
+# for `ttl` seconds (the freshness window). Concurrent identical searches are
+# coalesced: the first caller fetches, everyone else waits for its answer, so
+# N identical in-flight searches cost exactly one upstream call.
+#
+# With `stale_ttl`, expired results are kept a while longer and served
+# stale-while-revalidate: the request triggers a refresh but does not wait
+# more than `fresh_timeout` for it, and an upstream error falls back to the
+# stale copy. search_refresh.py refreshes popular searches before they expire.
+
+
+def search_key(params):
+    normalized = {}
+    for k, v in params.items():
+        if v is None:
+            continue
+        normalized[k] = v.strip().upper() if isinstance(v, str) else v
+    return json.dumps(normalized, sort_keys=True)
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SearchCache:
+    def __init__(self, ttl=300, maxsize=512, stale_ttl=0, fresh_timeout=2.0):
+        """Results are fresh for `ttl` seconds and kept `stale_ttl` seconds
+        longer. A stale hit starts a refresh and waits up to `fresh_timeout`
+        seconds for it; if the refresh is slower or fails, the stale result
+        is served instead."""
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.fresh_timeout = fresh_timeout
+        # entries are (fetched_at, result); freshness is decided here
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl + stale_ttl, negative_ttl=ttl + stale_ttl)
+        self.pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search-revalidate")
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.in_flight_async = {}
+        self.background = set()
+        # optional popularity tracker, see search_refresh.py
+        self.tracker = None
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def lookup(self, key):
+        """(result, fresh); result is MISSING on a miss."""
+        entry = self.cache.get(key)
+        if entry is MISSING:
+            return MISSING, False
+        fetched_at, result = entry
+        return result, time.time() - fetched_at < self.ttl
+
+    def age(self, key):
+        """Seconds since the cached result was fetched, None if there is none."""
+        entry = self.cache.peek(key)
+        return None if entry is MISSING else time.time() - entry[0]
+
+    def track(self, key, params):
+        if self.tracker is not None:
+            self.tracker.record(key, params)
+
+    # ---------------------------
+    # Threads
+    # ---------------------------
+
+    def join(self, key):
+        """(flight, leader) for `key`; call with the lock held."""
+        flight = self.in_flight.get(key)
+        if flight is None:
+            flight = self.in_flight[key] = Flight()
+            self.upstream_calls += 1
+            return flight, True
+        self.coalesced += 1
+        return flight, False
+
+    def lead(self, key, flight, fetch):
+        try:
+            flight.result = fetch()
+            self.cache.set(key, (time.time(), flight.result))
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            flight.done.set()
+
+    def revalidate(self, key, flight, fetch):
+        try:
+            self.lead(key, flight, fetch)
+            return True
+        except Exception:
+            with self.lock:
+                self.refresh_errors += 1
+            return False
+
+    def get_or_fetch(self, params, fetch, track=True):
+        """Returns the cached result for `params`, or calls `fetch()` once for
+        all concurrent callers. Errors are re-raised to every waiter and are
+        never cached. `track` counts the search towards route popularity."""
+        key = search_key(params)
+        if track:
+            self.track(key, params)
+        with self.lock:
+            result, fresh = self.lookup(key)
+            if fresh:
+                return result
+            flight, leader = self.join(key)
+
+        if result is MISSING:
+            if leader:
+                return self.lead(key, flight, fetch)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        # stale: revalidate off this thread, and only wait fresh_timeout for it
+        if leader:
+            self.pool.submit(contextvars.copy_context().run, self.revalidate, key, flight, fetch)
+        if flight.done.wait(self.fresh_timeout) and flight.error is None:
+            return flight.result
+        with self.lock:
+            self.stale_served += 1
+        return result
+
+    def refresh(self, params, fetch):
+        """Re-fetches `params` whether or not the cached copy is still fresh,
+        e.g. ahead of its expiry. False if it failed or was already in flight."""
+        key = search_key(params)
+        with self.lock:
+            if key in self.in_flight:
+                return False
+            flight, _ = self.join(key)
+            self.refreshes += 1
+        return self.revalidate(key, flight, fetch)
+
+    # ---------------------------
+    # asyncio
+    # ---------------------------
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+        return task
+
+    async def lead_async(self, key, future, fetch):
+        """Runs in its own task, so a leader whose client disconnects does
+        not cancel the fetch the coalesced waiters are awaiting. True on success."""
+        try:
+            result = await fetch()
+            self.cache.set(key, (time.time(), result))
+            future.set_result(result)
+            return True
+        except asyncio.CancelledError:
+            # only when the loop shuts down; waiters get an error they can retry on
+            future.set_exception(RuntimeError("search cancelled before it finished"))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            return False
+        finally:
+            with self.lock:
+                self.in_flight_async.pop(key, None)
+
+    async def revalidate_async(self, key, future, fetch):
+        if not await self.lead_async(key, future, fetch):
+            with self.lock:
+                self.refresh_errors += 1
+
+    async def get_or_fetch_async(self, params, fetch, track=True):
+        """Async variant for the ASGI app: `fetch` is a coroutine function and
+        waiters await the leader's future instead of blocking a thread. The
+        fetch itself runs as a separate task, and every caller (the leader
+        too) awaits it through asyncio.shield, so cancelling one request
+        never cancels it for the others."""
+        key = search_key(params)
+        if track:
+            self.track(key, params)
+        with self.lock:
+            result, fresh = self.lookup(key)
+            if fresh:
+                return result
+            future = self.in_flight_async.get(key)
+            leader = future is None
+            if leader:
+                future = asyncio.get_running_loop().create_future()
+                self.in_flight_async[key] = future
+                self.upstream_calls += 1
+            else:
+                self.coalesced += 1
+
+        if result is MISSING:
+            if leader:
+                self.spawn(self.lead_async(key, future, fetch))
+            return await asyncio.shield(future)
+
+        if leader:
+            self.spawn(self.revalidate_async(key, future, fetch))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.fresh_timeout)
+        except Exception:
+            with self.lock:
+                self.stale_served += 1
+            return result
+
+    def stats(self):
+        stats = self.cache.stats()
+        with self.lock:
+            stats["upstream_calls"] = self.upstream_calls
+            stats["coalesced"] = self.coalesced
+            stats["in_flight"] = len(self.in_flight) + len(self.in_flight_async)
+            stats["stale_served"] = self.stale_served
+            stats["refreshes"] = self.refreshes
+            stats["refresh_errors"] = self.refresh_errors
+        return stats
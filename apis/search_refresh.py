@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import telemetry
+from rate_limiter import TokenBucket
+
+
+# ---------------------------
+# Popular Search Refresh
+# ---------------------------
+# Traffic is skewed toward a few origin/destination/date searches. Every
+# search served is counted with an exponentially decaying score (half-life
+# `half_life` seconds), and a background thread re-fetches the top N ahead
+# of their expiry in the SearchCache, so hot routes are answered from memory
+# instead of waiting on Amadeus. Refreshes spend at most `budget` upstream
+# calls per hour; once the hour's budget is gone, the rest wait for the next
+# tick, most popular first.
+
+
+def departure_passed(params, today=None):
+    date = params.get("departureDate")
+    return bool(date) and date < (today or time.strftime("%Y-%m-%d", time.gmtime()))
+
+
+class Popularity:
+    def __init__(self, half_life=3600, maxsize=2048):
+        self.half_life = half_life
+        self.maxsize = maxsize
+        self.entries = {}  # key -> [score, updated, params]
+        self.lock = threading.Lock()
+
+    def decayed(self, entry, now):
+        return entry[0] * 0.5 ** ((now - entry[1]) / self.half_life)
+
+    def record(self, key, params, now=None):
+        now = now or time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                if len(self.entries) >= self.maxsize:
+                    self.prune(now)
+                self.entries[key] = [1.0, now, dict(params)]
+            else:
+                entry[0] = self.decayed(entry, now) + 1.0
+                entry[1] = now
+
+    def prune(self, now):
+        """Drops the less popular half."""
+        ranked = sorted(self.entries, key=lambda k: self.decayed(self.entries[k], now))
+        for key in ranked[:len(ranked) // 2]:
+            del self.entries[key]
+
+    def top(self, n, min_score=0.0, now=None):
+        """[(key, params, score)] for the n most popular searches."""
+        now = now or time.time()
+        with self.lock:
+            scored = [(self.decayed(e, now), key, e[2]) for key, e in self.entries.items()]
+        scored = [s for s in scored if s[0] >= min_score]
+        scored.sort(key=lambda s: s[0], reverse=True)
+        return [(key, params, round(score, 3)) for score, key, params in scored[:n]]
+
+    def forget(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SearchRefresher:
+    def __init__(self, cache, fetch, top_n=20, budget=120, lead=60, interval=5.0,
+                 min_score=2.0, half_life=3600, concurrency=2):
+        """fetch(params) -> result, the same upstream call a request would make.
+        lead: seconds before expiry a popular entry is refreshed. budget:
+        upstream refreshes per hour. min_score: decayed hit count below which
+        a search is not worth refreshing."""
+        self.cache = cache
+        self.fetch = fetch
+        self.top_n = top_n
+        self.lead = min(lead, cache.ttl)
+        self.interval = interval
+        self.min_score = min_score
+        self.concurrency = concurrency
+        self.popularity = Popularity(half_life)
+        self.budget = TokenBucket(rate=budget / 3600, burst=max(1, min(budget, top_n)))
+        self.pool = None
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.refreshed = 0
+        self.over_budget = 0
+        cache.tracker = self
+
+    def record(self, key, params):
+        self.popularity.record(key, params)
+        if self.pid != os.getpid():
+            self.start()
+
+    def start(self):
+        """Starts the refresh thread once per process (after a fork, too)."""
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pending = set()
+            self.pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="search-refresh")
+            self.thread = threading.Thread(target=self.run, name="search-refresher", daemon=True)
+            self.thread.start()
+            self.pid = os.getpid()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception as e:
+                telemetry.log_event("search_refresh_failed", level=logging.ERROR, error=str(e))
+
+    def due(self, key):
+        age = self.cache.age(key)
+        return age is None or age >= self.cache.ttl - self.lead
+
+    def tick(self):
+        """Queues refreshes for the popular searches about to expire."""
+        for key, params, _ in self.popularity.top(self.top_n, self.min_score):
+            if departure_passed(params):
+                self.popularity.forget(key)
+                continue
+            with self.lock:
+                if key in self.pending or not self.due(key):
+                    continue
+            if not self.budget.try_acquire():
+                with self.lock:
+                    self.over_budget += 1
+                return
+            with self.lock:
+                self.pending.add(key)
+            self.pool.submit(self.refresh, key, params)
+
+    def refresh(self, key, params):
+        refreshed = False
+        try:
+            # errors are counted by the cache (refresh_errors)
+            refreshed = self.cache.refresh(params, lambda: self.fetch(params))
+        finally:
+            with self.lock:
+                self.pending.discard(key)
+                if refreshed:
+                    self.refreshed += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "tracked": len(self.popularity),
+                "pending": len(self.pending),
+                "refreshed": self.refreshed,
+                "over_budget": self.over_budget,
+                "budget_tokens": round(self.budget.tokens, 2)
+            }
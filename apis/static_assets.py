@@ -0,0 +1,205 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+
+# ---------------------------
+# Static Assets
+# ---------------------------
+# The frontend files are read once, compressed ahead of time (gzip, plus
+# brotli when the package is installed) and served from memory with strong
+# ETags. index.html is rewritten to reference content-hashed copies such as
+# /assets/main.3f2a9c1b.js, which can be cached "immutable" for a year;
+# index.html itself and the plain /main.js and /style.css names are
+# revalidated on every load and answered with 304 when unchanged.
+#
+# Framework neutral: respond() returns (status, headers, body) for both the
+# Flask app and the ASGI app. compress() does negotiated on-the-fly
+# compression for larger API responses.
+
+ASSET_FILES = ("index.html", "main.js", "style.css")
+ASSET_PREFIX = "/assets/"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# API responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+REFERENCE_RE = re.compile(r'(href|src)="/?([\w.-]+\.(?:js|css))"')
+
+
+def parse_accept_encoding(header):
+    """{"gzip": 1.0, "br": 0.8, ...} from an Accept-Encoding header."""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header, available=("br", "gzip")):
+    """Best content coding the client accepts among `available`, or None."""
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body, accept_encoding, min_size=MIN_COMPRESS_SIZE):
+    """(body, content_encoding) for a dynamic response; fast settings since
+    this runs per request."""
+    if len(body) < min_size:
+        return body, None
+    coding = negotiate(accept_encoding, ("br", "gzip") if brotli is not None else ("gzip",))
+    if coding == "br":
+        return brotli.compress(body, quality=4), "br"
+    if coding == "gzip":
+        return gzip.compress(body, compresslevel=5, mtime=0), "gzip"
+    return body, None
+
+
+def etag_matches(if_none_match, etags):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as RFC 9110 asks for If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(tag in candidates for tag in etags)
+
+
+@dataclass(slots=True)
+class Asset:
+    name: str
+    content_type: str
+    digest: str
+    encodings: dict  # coding ("identity", "gzip", "br") -> bytes
+    mtime_ns: int = 0
+
+    @property
+    def hashed_name(self):
+        stem, ext = os.path.splitext(self.name)
+        return f"{stem}.{self.digest[:10]}{ext}"
+
+    def etag(self, coding):
+        suffix = "" if coding == "identity" else f"-{coding}"
+        return f'"{self.digest[:20]}{suffix}"'
+
+    def etags(self):
+        return [self.etag(coding) for coding in self.encodings]
+
+
+def build_asset(name, body, mtime_ns=0):
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type.endswith("javascript"):
+        content_type += "; charset=utf-8"
+    encodings = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(body, quality=11)
+    # only keep encodings that actually save bytes
+    encodings = {k: v for k, v in encodings.items() if k == "identity" or len(v) < len(body)}
+    return Asset(name, content_type, hashlib.sha256(body).hexdigest(), encodings, mtime_ns)
+
+
+class AssetBundle:
+    def __init__(self, root, names=ASSET_FILES, auto_reload=False):
+        """auto_reload re-reads a file when its mtime changes (development)."""
+        self.root = root
+        self.names = names
+        self.auto_reload = auto_reload
+        self.lock = threading.Lock()
+        self.assets = {}
+        self.hashed = {}
+        self.build()
+
+    def read(self, name):
+        path = os.path.join(self.root, name)
+        with open(path, "rb") as f:
+            return f.read(), os.stat(path).st_mtime_ns
+
+    def build(self):
+        assets = {}
+        for name in self.names:
+            if name != "index.html":
+                assets[name] = build_asset(name, *self.read(name))
+        hashed = {a.hashed_name: a for a in assets.values()}
+
+        if "index.html" in self.names:
+            html, mtime_ns = self.read("index.html")
+
+            def rewrite(m):
+                asset = assets.get(m.group(2))
+                if asset is None:
+                    return m.group(0)
+                return f'{m.group(1)}="{ASSET_PREFIX}{asset.hashed_name}"'
+
+            html = REFERENCE_RE.sub(rewrite, html.decode("utf-8")).encode("utf-8")
+            assets["index.html"] = build_asset("index.html", html, mtime_ns)
+
+        with self.lock:
+            self.assets, self.hashed = assets, hashed
+
+    def stale(self):
+        for name, asset in self.assets.items():
+            try:
+                if os.stat(os.path.join(self.root, name)).st_mtime_ns != asset.mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def lookup(self, path):
+        """(asset, immutable) for a request path, or (None, False)."""
+        if self.auto_reload and self.stale():
+            self.build()
+        if path.startswith(ASSET_PREFIX):
+            asset = self.hashed.get(path[len(ASSET_PREFIX):])
+            return asset, asset is not None
+        name = "index.html" if path == "/" else path.lstrip("/")
+        return self.assets.get(name), False
+
+    def respond(self, path, accept_encoding=None, if_none_match=None, head=False):
+        """(status, headers, body) for a GET/HEAD of `path`."""
+        asset, immutable = self.lookup(path)
+        if asset is None:
+            return 404, [("Content-Type", "text/plain; charset=utf-8")], b"Not found"
+
+        coding = negotiate(accept_encoding, [c for c in ("br", "gzip") if c in asset.encodings]) or "identity"
+        headers = [
+            ("ETag", asset.etag(coding)),
+            ("Cache-Control", IMMUTABLE if immutable else REVALIDATE),
+            ("Vary", "Accept-Encoding"),
+        ]
+        if etag_matches(if_none_match, asset.etags()):
+            return 304, headers, b""
+
+        body = asset.encodings[coding]
+        headers.append(("Content-Type", asset.content_type))
+        headers.append(("Content-Length", str(len(body))))
+        if coding != "identity":
+            headers.append(("Content-Encoding", coding))
+        return 200, headers, b"" if head else body
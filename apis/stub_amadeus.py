@@ -0,0 +1,245 @@
+import argparse
+import json
+from datetime import date, datetime, timedelta
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+# ---------------------------
+# Local Amadeus Stub
+# ---------------------------
+# A stand-in for the Amadeus API so benchmarks never touch the real one.
+# Serves the sample responses in stub_data/. Those are generated (see
+# make_stub_data.py), not recorded; drop real recordings in there with the
+# same file names to replay those instead. Flight offers are moved to the
+# requested departure and return dates. Speaks HTTP/1.1 with keep-alive and
+# can inject latency and errors:
+#
+#   python apis/stub_amadeus.py --port 8099 --latency-ms 120 --jitter-ms 40 --error-rate 0.02
+#
+# Point flight_api.py at it with AMADEUS_HOST=127.0.0.1 AMADEUS_PORT=8099 AMADEUS_SSL=false.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_data")
+
+# path suffix -> recorded response file, most specific first
+ROUTES = [
+    ("/security/oauth2/token", None),
+    ("/shopping/flight-offers", "flight_offers.json"),
+    ("/reference-data/locations/cities", "cities.json"),
+    ("/reference-data/locations/pois/by-square", "pois.json"),
+    ("/reference-data/locations/hotels/by-city", "hotels_by_city.json"),
+    ("/shopping/hotels/by-city", "hotels_by_city.json"),
+    ("/reference-data/locations", "locations.json"),
+    ("/shopping/hotels", "hotel_offers.json"),
+    ("/shopping/hotel-offers", "hotel_offers.json"),
+    ("/shopping/transfers", "transfers.json"),
+]
+
+
+def load_recordings(data_dir=DATA_DIR):
+    recordings = {}
+    for _, name in ROUTES:
+        if name and name not in recordings:
+            with open(os.path.join(data_dir, name), encoding="utf-8") as f:
+                recordings[name] = json.load(f)
+    return recordings
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # buffer each response into one write; headers and body in separate
+    # segments trip Nagle + delayed ACK on keep-alive connections
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/vnd.amadeus+json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def route(self, path):
+        for suffix, name in ROUTES:
+            if path.rstrip("/").endswith(suffix):
+                return suffix, name
+        return None, None
+
+    def do_POST(self):
+        self.read_body()
+        self.handle_request(urlparse(self.path), method="POST")
+
+    def do_GET(self):
+        self.handle_request(urlparse(self.path), method="GET")
+
+    def handle_request(self, url, method):
+        server = self.server
+        suffix, name = self.route(url.path)
+        server.count(suffix or url.path)
+
+        # the token endpoint is never delayed or failed, like a warmed up real API
+        if suffix == "/security/oauth2/token":
+            self.send_json(200, {
+                "state": "approved",
+                "access_token": "stub-token",
+                "token_type": "Bearer",
+                "expires_in": 1799
+            })
+            return
+
+        server.delay()
+        error = server.injected_error()
+        if error:
+            headers = {"Retry-After": "1"} if error == 429 else None
+            self.send_json(error, {"errors": [{"status": error, "title": "INJECTED ERROR"}]}, headers)
+            return
+
+        if name is None:
+            self.send_json(404 if method == "GET" else 200, {"data": []})
+            return
+
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.send_json(200, server.respond(name, query))
+
+
+def days_between(itinerary, requested):
+    try:
+        return (date.fromisoformat(requested) - date.fromisoformat(itinerary["segments"][0]["departure"]["at"][:10])).days
+    except (TypeError, ValueError, KeyError, IndexError):
+        return 0
+
+
+def shift_itinerary(itinerary, days):
+    def moved(point):
+        at = datetime.fromisoformat(point["at"]) + timedelta(days=days)
+        return dict(point, at=at.isoformat())
+    return dict(itinerary, segments=[dict(s, departure=moved(s["departure"]), arrival=moved(s["arrival"]))
+                                     for s in itinerary["segments"]])
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), handler=StubHandler,
+                 latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=500, data_dir=DATA_DIR):
+        super().__init__(address, handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.recordings = load_recordings(data_dir)
+        self.hotel_names = {h["hotelId"]: h["name"] for h in self.recordings["hotels_by_city.json"].get("data", [])}
+        self.dated_offers = {}
+        self.calls = {}
+        self.calls_lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path):
+        with self.calls_lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+    def upstream_calls(self):
+        with self.calls_lock:
+            return dict(self.calls)
+
+    def reset_counts(self):
+        with self.calls_lock:
+            self.calls.clear()
+
+    def delay(self):
+        ms = self.latency_ms + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def injected_error(self):
+        if self.error_rate and random.random() < self.error_rate:
+            return self.error_status
+        return None
+
+    def respond(self, name, query):
+        recorded = self.recordings[name]
+
+        if name == "flight_offers.json":
+            found = self.flight_offers(query.get("departureDate"), query.get("returnDate"))
+            if query.get("max"):
+                found = dict(found, data=found["data"][:int(query["max"])])
+            return found
+
+        # a distinct city code per keyword, so different searches don't share cache entries
+        if name == "locations.json" and query.get("keyword"):
+            code = "".join(c for c in query["keyword"].upper() if c.isalpha())[:3].ljust(3, "X")
+            return dict(recorded, data=[dict(recorded["data"][0], iataCode=code, name=query["keyword"].upper())])
+
+        # one templated offer per requested hotel, so chunked fetches look real
+        if name == "hotel_offers.json" and query.get("hotelIds"):
+            template = recorded["data"][0]
+            data = []
+            for i, hotel_id in enumerate(query["hotelIds"].split(",")):
+                offer = dict(template["offers"][0], id=f"{hotel_id}-OFFER")
+                offer["price"] = dict(offer["price"], total=f"{80 + (i * 37) % 400:.2f}")
+                hotel = dict(template["hotel"], hotelId=hotel_id, name=self.hotel_names.get(hotel_id, template["hotel"]["name"]))
+                data.append(dict(template, hotel=hotel, offers=[offer]))
+            return {"data": data}
+
+        return recorded
+
+    def flight_offers(self, depart_date, return_date):
+        """The sample offers moved to the requested dates; one-way searches
+        get the outbound itinerary only."""
+        key = (depart_date, return_date)
+        if key not in self.dated_offers:
+            recorded = self.recordings["flight_offers.json"]
+            data = recorded["data"]
+            if data and depart_date:
+                first = data[0]["itineraries"]
+                shifts = [days_between(first[0], depart_date)]
+                if return_date and len(first) > 1:
+                    shifts.append(days_between(first[1], return_date))
+                data = [dict(o, oneWay=len(shifts) == 1,
+                             itineraries=[shift_itinerary(it, d) for it, d in zip(o["itineraries"], shifts)])
+                        for o in data]
+            self.dated_offers[key] = dict(recorded, data=data)
+        return self.dated_offers[key]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Amadeus stub server")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", args.port), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, error_status=args.error_status)
+    print("Amadeus stub listening on", server.url)
+    server.serve_forever()
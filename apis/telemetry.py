@@ -0,0 +1,248 @@
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+# ---------------------------
+# Telemetry
+# ---------------------------
+# Counters and histograms rendered in the Prometheus text format for
+# GET /metrics, timing spans around the hot path (location resolution,
+# Amadeus calls, summarization, persistence), and one structured JSON log
+# line per request carrying its trace id and per-stage timings.
+#
+# Everything is in-process and dependency free; with several worker
+# processes each one reports its own numbers.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Trace id and {stage: ms} of the request being handled
+TRACE_ID = contextvars.ContextVar("trace_id", default=None)
+STAGES = contextvars.ContextVar("stages", default=None)
+
+log = logging.getLogger("flights")
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{label_text(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # key -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, entry in sorted(self.values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, entry):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{label_text(self.labels + ('le',), key + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{label_text(self.labels + ('le',), key + ('+Inf',))} {entry[-1]}")
+                lines.append(f"{self.name}_sum{label_text(self.labels, key)} {entry[-2]:.6f}")
+                lines.append(f"{self.name}_count{label_text(self.labels, key)} {entry[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.stats = {}  # gauge prefix -> (label name, fn returning {label value: {stat: number}})
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix, label, fn):
+        """Exposes the numeric fields of existing stats() dicts as gauges,
+        e.g. flights_cache_hit_rate{cache="locations"}."""
+        self.stats[prefix] = (label, fn)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for prefix, (label, fn) in self.stats.items():
+            gauges = {}
+            for name, stats in fn().items():
+                for stat, value in stats.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        gauges.setdefault(f"{prefix}_{stat}", []).append(
+                            f"{prefix}_{stat}{label_text((label,), (name,))} {value}")
+            for gauge, samples in gauges.items():
+                lines.append(f"# TYPE {gauge} gauge")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.add(Histogram(
+    "flights_stage_seconds", "Time spent per request stage", ("stage", "outcome")))
+HTTP_REQUESTS = REGISTRY.add(Counter(
+    "flights_http_requests_total", "HTTP requests served", ("route", "method", "status")))
+HTTP_SECONDS = REGISTRY.add(Histogram(
+    "flights_http_request_seconds", "HTTP request latency", ("route", "method")))
+UPSTREAM_REQUESTS = REGISTRY.add(Counter(
+    "amadeus_requests_total", "Amadeus calls by endpoint family and status code", ("family", "status")))
+UPSTREAM_SECONDS = REGISTRY.add(Histogram(
+    "amadeus_request_seconds", "Amadeus call latency", ("family",)))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ---------------------------
+# Spans and traces
+# ---------------------------
+
+@contextmanager
+def span(stage):
+    """Times a block into flights_stage_seconds and the current request's
+    stage timings (repeated stages add up)."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage, outcome=outcome)
+        stages = STAGES.get()
+        if stages is not None:
+            stages[stage] = round(stages.get(stage, 0.0) + elapsed * 1000, 2)
+
+
+def upstream_family(url):
+    for family in ("security", "booking", "ordering", "shopping", "reference-data"):
+        if f"/{family}/" in url:
+            return "booking" if family == "ordering" else family
+    return "other"
+
+
+def record_upstream(url, status, seconds):
+    """status: HTTP status code, or the exception name when there was no response."""
+    family = upstream_family(url)
+    UPSTREAM_REQUESTS.inc(family=family, status=status)
+    UPSTREAM_SECONDS.observe(seconds, family=family)
+    if log.isEnabledFor(logging.DEBUG):
+        log_event("upstream", level=logging.DEBUG, family=family, status=status, ms=round(seconds * 1000, 2))
+
+
+class Trace:
+    __slots__ = ("trace_id", "stages", "started", "tokens")
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.tokens = (TRACE_ID.set(trace_id), STAGES.set(self.stages))
+
+
+def start_trace(incoming=None):
+    """Starts request tracing; keeps a sane incoming X-Request-ID as the trace id."""
+    if not (incoming and len(incoming) <= 64 and incoming.replace("-", "").isalnum()):
+        incoming = uuid.uuid4().hex
+    return Trace(incoming)
+
+
+def end_trace(trace, route, method, status):
+    """Records the request and writes its log line. For streamed responses
+    this runs when the stream closes, possibly in another context."""
+    seconds = time.perf_counter() - trace.started
+    HTTP_REQUESTS.inc(route=route, method=method, status=status)
+    HTTP_SECONDS.observe(seconds, route=route, method=method)
+    log_event("request", trace_id=trace.trace_id, route=route, method=method, status=status,
+              ms=round(seconds * 1000, 2), stages=trace.stages)
+    try:
+        TRACE_ID.reset(trace.tokens[0])
+        STAGES.reset(trace.tokens[1])
+    except ValueError:
+        pass
+
+
+# ---------------------------
+# Structured logs
+# ---------------------------
+
+def log_event(event, level=logging.INFO, **fields):
+    if log.isEnabledFor(level):
+        log.log(level, event, extra={"fields": fields})
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+            "trace_id": TRACE_ID.get(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["error"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None):
+    """JSON lines on stderr for the "flights" logger (LOG_LEVEL, default INFO)."""
+    if any(isinstance(h.formatter, JsonFormatter) for h in log.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+    log.addHandler(handler)
+    log.setLevel(level or os.getenv("LOG_LEVEL", "INFO").upper())
+    log.propagate = False
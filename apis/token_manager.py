@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import telemetry
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, the cache file still works
+    fcntl = None
+
+
+# ---------------------------
+# OAuth Token Manager
+# ---------------------------
+# Keeps an Amadeus access token valid for the lifetime of the process.
+#  - remembers expires_in and refreshes `refresh_margin` seconds early
+#  - a daemon thread refreshes ahead of expiry so requests never wait on it;
+#    it is started once per process, so forked workers get their own
+#  - one lock per process (plus a file lock across processes) so a burst of
+#    requests triggers a single token call, never a stampede
+#  - with `cache_path`, workers share the token through a small JSON file
+#
+# `fetch` is a callable returning (access_token, expires_in).
+
+
+class TokenManager:
+    def __init__(self, fetch, cache_path=None, cache_key="", refresh_margin=60, background=True):
+        self.fetch = fetch
+        self.cache_path = cache_path
+        self.cache_key = hashlib.sha256(cache_key.encode("utf-8")).hexdigest()[:16]
+        self.refresh_margin = refresh_margin
+        self.lock = threading.Lock()
+        self.access_token = None
+        self.expires_at = 0.0
+        self.refreshes = 0
+
+        self.stopped = threading.Event()
+        self.background = background
+        self.thread = None
+        self.pid = None
+
+    def valid(self):
+        return self.access_token is not None and time.time() < self.expires_at - self.refresh_margin
+
+    def token(self):
+        if self.pid is not None and self.pid != os.getpid():
+            self.after_fork()
+        if not self.valid() or (self.background and self.pid is None):
+            with self.lock:
+                if not self.valid():
+                    self.load_or_fetch()
+                self.start_background()
+        return self.access_token
+
+    def refresh(self, stale_token=None):
+        """Force a new token, e.g. after a 401. If another thread already
+        replaced `stale_token`, its token is reused instead of fetching again."""
+        with self.lock:
+            if stale_token is not None and self.access_token != stale_token and self.valid():
+                return self.access_token
+            self.load_or_fetch(stale_token=stale_token or self.access_token)
+            return self.access_token
+
+    # called with self.lock held, once the first token is in place
+    def start_background(self):
+        if not self.background or self.stopped.is_set():
+            return
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.refresh_loop, name="token-refresh", daemon=True)
+        self.thread.start()
+        self.pid = os.getpid()
+
+    def after_fork(self):
+        """In a forked worker the parent's refresh thread is gone and its lock
+        may have been held mid-fork; the next token() starts a new thread."""
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def stop(self):
+        self.stopped.set()
+
+    def refresh_loop(self):
+        while not self.stopped.is_set():
+            wait = self.expires_at - self.refresh_margin - time.time()
+            if self.stopped.wait(max(wait, 1.0)):
+                return
+            try:
+                if not self.valid():
+                    with self.lock:
+                        if not self.valid():
+                            self.load_or_fetch()
+            except Exception as e:
+                telemetry.log_event("token_refresh_failed", level=logging.WARNING, error=str(e))
+
+    # ---------------------------
+    # Shared cache file
+    # ---------------------------
+
+    def load_or_fetch(self, stale_token=None):
+        if not self.cache_path:
+            self.store(*self.fetch())
+            return
+
+        with open(self.cache_path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                cached = self.read_cache()
+                if cached and cached["access_token"] != stale_token \
+                   and time.time() < cached["expires_at"] - self.refresh_margin:
+                    self.access_token = cached["access_token"]
+                    self.expires_at = cached["expires_at"]
+                    return
+                self.store(*self.fetch())
+                self.write_cache()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def store(self, access_token, expires_in):
+        self.access_token = access_token
+        self.expires_at = time.time() + float(expires_in or 0)
+        self.refreshes += 1
+
+    def read_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("key") != self.cache_key:
+            return None
+        return cached
+
+    def write_cache(self):
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": self.cache_key, "access_token": self.access_token, "expires_at": self.expires_at}, f)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, self.cache_path)
@@ -0,0 +1,138 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from ttl_cache import TTLCache, MISSING
+
+
+# ---------------------------
+# Transfer Quote Prefetch
+# ---------------------------
+# A transfer quote needs the arrival airport and time, and both are already
+# in the summarized offers /api/flights returns. When the search names the
+# hotel ("transferTo"), the top-ranked offers' arrivals are quoted in the
+# background right away, so picking a flight does not cost another serial
+# round trip. Arrival times are rounded up to `bucket_minutes`, so offers
+# landing close together share one upstream query and one cache entry, and
+# the quoted pickup is never before the plane lands.
+
+BUCKET_MINUTES = 30
+QUOTE_TTL = 1800
+
+
+class QuoteError(Exception):
+    """The upstream transfer search answered with an error."""
+
+
+def arrival_bucket(arrive_at, minutes=BUCKET_MINUTES):
+    """"2026-06-01T09:47:00" -> "2026-06-01T10:00:00", the end of its bucket
+    and so the pickup time to quote (None if unparsable)."""
+    try:
+        at = datetime.fromisoformat(arrive_at)
+    except (TypeError, ValueError):
+        return None
+    midnight = at.replace(hour=0, minute=0, second=0, microsecond=0)
+    step = minutes * 60
+    seconds = math.ceil((at - midnight).total_seconds() / step) * step
+    return (midnight + timedelta(seconds=seconds)).isoformat()
+
+
+def parse_place(value):
+    """Transfer destination from a request: a location code ("CDG"), or a
+    hotel / point with "latitude"/"longitude" (or Amadeus' "geoCode") ->
+    (lat, lon) rounded to ~100 m. None when absent; ValueError when malformed."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, str):
+        return value.strip().upper()
+    if isinstance(value, dict):
+        geo = value.get("geoCode") or value
+        try:
+            lat, lon = float(geo["latitude"]), float(geo["longitude"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("transferTo needs latitude and longitude") from None
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("transferTo coordinates are out of range")
+        return (round(lat, 3), round(lon, 3))
+    raise ValueError("transferTo must be a location code or an object with latitude and longitude")
+
+
+def place_text(place):
+    return place if isinstance(place, str) else f"{place[0]},{place[1]}"
+
+
+class TransferQuotes:
+    def __init__(self, fetch, bucket_minutes=BUCKET_MINUTES, ttl=QUOTE_TTL, maxsize=2048, max_concurrency=4):
+        """fetch(airport, place, start_datetime, passengers) -> list of transfer offers."""
+        self.fetch = fetch
+        self.bucket_minutes = bucket_minutes
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, negative_ttl=ttl)
+        self.pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="transfer-quote")
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def key(self, airport, place, bucket, passengers):
+        return f"{airport}|{place_text(place)}|{bucket}|{passengers}"
+
+    def fetch_quote(self, key, airport, place, bucket, passengers):
+        try:
+            offers = self.fetch(airport, place, bucket, passengers)
+            self.cache.set(key, offers)
+            return offers
+        except Exception:
+            with self.lock:
+                self.errors += 1
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+    def lookup(self, airport, place, arrive_at, passengers):
+        """Cached offers, or a future for them (started if not already in flight)."""
+        bucket = arrival_bucket(arrive_at, self.bucket_minutes)
+        if not airport or bucket is None:
+            raise ValueError("an arrival airport and time are needed for a transfer quote")
+        key = self.key(airport, place, bucket, passengers)
+        with self.lock:
+            offers = self.cache.get(key)
+            if offers is not MISSING:
+                return offers
+            future = self.in_flight.get(key)
+            if future is None:
+                future = self.in_flight[key] = self.pool.submit(
+                    self.fetch_quote, key, airport, place, bucket, passengers)
+                self.upstream_calls += 1
+            else:
+                self.coalesced += 1
+            return future
+
+    def prefetch(self, offers, place, passengers=1, top=3):
+        """Starts quotes for the outbound arrival of the first `top` summarized
+        offers (dicts as returned by /api/flights) without waiting for them.
+        Returns the number of distinct quotes that covers."""
+        keys = set()
+        for offer in offers[:top]:
+            leg = offer.get("outbound") or {}
+            bucket = arrival_bucket(leg.get("arriveAt"), self.bucket_minutes)
+            if not leg.get("to") or bucket is None:
+                continue
+            keys.add(self.key(leg["to"], place, bucket, passengers))
+            result = self.lookup(leg["to"], place, leg["arriveAt"], passengers)
+            if not isinstance(result, list):
+                # errors are counted in fetch_quote; the selection step retries
+                result.add_done_callback(lambda f: f.exception())
+        return len(keys)
+
+    def quote(self, airport, place, arrive_at, passengers=1, timeout=None):
+        """Transfer offers for one arrival; instant when it was prefetched."""
+        result = self.lookup(airport, place, arrive_at, passengers)
+        return result if isinstance(result, list) else result.result(timeout)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.cache.stats(), upstream_calls=self.upstream_calls,
+                        coalesced=self.coalesced, errors=self.errors, in_flight=len(self.in_flight))
@@ -0,0 +1,144 @@
+import asyncio
+import contextvars
+import math
+import time
+
+
+# ---------------------------
+# Trip Planner (master script)
+# ---------------------------
+# Runs the flight, hotel, transfer and experience lookups from
+# api_architecture.md concurrently and aggregates their JSON for the LLM
+# planner. Independent branches start together; dependent calls run inside
+# their branch (city coordinates -> activities, hotel IDs -> offers), so the
+# total latency is roughly the slowest branch instead of the sum of all calls.
+#
+# City coordinates for the activity search come from the local airport
+# GeoIndex when one is passed in and knows the city; only unknown cities cost
+# a get_city_coordinates round trip.
+#
+# AmadeusAPI methods are blocking, so each call runs in a worker thread and is
+# bounded by a per-call timeout. A failed or timed out branch is reported in
+# "errors" and does not cancel the others.
+
+DEFAULT_TIMEOUTS = {
+    "flights": 20.0,
+    "hotel_list": 10.0,
+    "hotel_offers": 20.0,
+    "coordinates": 10.0,
+    "activities": 10.0,
+    "transfers": 15.0,
+}
+
+MAX_HOTEL_IDS = 100
+ACTIVITY_RADIUS_KM = 5
+
+
+# Per-plan timings; gather() copies the context into every branch task
+TIMINGS = contextvars.ContextVar("trip_timings")
+
+
+def bounding_box(lat, lon, radius_km=ACTIVITY_RADIUS_KM):
+    dlat = radius_km / 111.0
+    dlon = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+    return {
+        "north": lat + dlat,
+        "south": lat - dlat,
+        "east": lon + dlon,
+        "west": lon - dlon
+    }
+
+
+class TripPlanner:
+    def __init__(self, api, timeouts=None, geo=None):
+        self.api = api
+        self.geo = geo
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+
+    async def call(self, name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args, **kwargs), self.timeouts[name])
+        finally:
+            TIMINGS.get()[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    # ---------------------------
+    # Branches
+    # ---------------------------
+
+    async def flights(self, trip):
+        return await self.call(
+            "flights", self.api.find_best_flights,
+            trip["origin"], trip["destination"], trip["depart_date"], trip.get("adults", 1),
+            non_stop=trip.get("non_stop", False)
+        )
+
+    async def hotels(self, trip):
+        listing = await self.call("hotel_list", self.api.search_hotels, trip["city_code"])
+        hotel_ids = [h["hotelId"] for h in listing.get("data", []) if h.get("hotelId")]
+        if not hotel_ids:
+            return {"data": []}
+        return await self.call(
+            "hotel_offers", self.api.filter_hotels,
+            hotel_ids[:MAX_HOTEL_IDS], trip["depart_date"], trip["return_date"],
+            trip.get("adults", 1), trip.get("rooms", 1), trip.get("price_range")
+        )
+
+    async def coordinates(self, city_name):
+        point = self.geo.city_point(city_name) if self.geo is not None else None
+        if point is not None:
+            return point
+        cities = await self.call("coordinates", self.api.get_city_coordinates, city_name)
+        data = cities.get("data") or []
+        geo = data[0].get("geoCode") if data else None
+        return (geo["latitude"], geo["longitude"]) if geo else None
+
+    async def activities(self, trip):
+        point = await self.coordinates(trip["city_name"])
+        if point is None:
+            return {"data": []}
+        box = bounding_box(*point)
+        return await self.call("activities", self.api.find_activities, **box, categories=trip.get("categories"))
+
+    async def transfers(self, trip):
+        return await self.call(
+            "transfers", self.api.find_transfers,
+            trip["transfer_from"], trip["transfer_to"], trip["transfer_at"], trip.get("adults", 1)
+        )
+
+    # ---------------------------
+    # Orchestration
+    # ---------------------------
+
+    async def plan(self, trip):
+        """trip keys: origin, destination, depart_date, return_date, city_code,
+        city_name, adults, rooms, price_range, categories, non_stop and
+        optionally transfer_from / transfer_to / transfer_at."""
+        timings = {}
+        TIMINGS.set(timings)
+        branches = {
+            "flights": self.flights(trip),
+            "hotels": self.hotels(trip),
+            "activities": self.activities(trip),
+        }
+        if trip.get("transfer_from") and trip.get("transfer_to") and trip.get("transfer_at"):
+            branches["transfers"] = self.transfers(trip)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*branches.values(), return_exceptions=True)
+
+        itinerary = {"query": trip, "errors": {}}
+        for name, result in zip(branches, results):
+            if isinstance(result, BaseException):
+                itinerary[name] = None
+                itinerary["errors"][name] = "timeout" if isinstance(result, asyncio.TimeoutError) else str(result)
+            else:
+                itinerary[name] = result
+
+        itinerary["timings_ms"] = dict(timings, total=round((time.perf_counter() - start) * 1000, 1))
+        return itinerary
+
+
+def plan_trip(api, trip, timeouts=None, geo=None):
+    """Blocking entry point for callers that are not already in an event loop."""
+    return asyncio.run(TripPlanner(api, timeouts, geo).plan(trip))
@@ -0,0 +1,210 @@
+from collections import OrderedDict
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import telemetry
+
+
+# ---------------------------
+# TTL + LRU Cache
+# ---------------------------
+# Bounded, thread-safe cache. Entries expire after `ttl` seconds; `None`
+# values (negative results) use the shorter `negative_ttl`. When full, the
+# least recently used entry is evicted. An optional SqliteStore keeps a copy
+# on disk so a restarted process starts warm; it writes behind, off the lock.
+
+MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=3600, negative_ttl=300, store=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.store = store
+        self.data = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if store is not None:
+            now = time.time()
+            for key, value, expires_at in store.load():
+                if expires_at > now:
+                    self.data[key] = (expires_at, value)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def get(self, key, default=MISSING):
+        """Returns the cached value, or `default` (MISSING) on a miss.
+        A cached negative result comes back as None."""
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    self.data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=MISSING):
+        """Like get(), but leaves hit counts and LRU order alone."""
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None or entry[0] <= time.time():
+                return default
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        expires_at = time.time() + ttl
+
+        with self.lock:
+            self.data[key] = (expires_at, value)
+            self.data.move_to_end(key)
+            evicted = []
+            while len(self.data) > self.maxsize:
+                old_key, _ = self.data.popitem(last=False)
+                evicted.append(old_key)
+                self.evictions += 1
+
+            if self.store is not None:
+                self.store.save(key, value, expires_at)
+                for old_key in evicted:
+                    self.store.delete(old_key)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            if self.store is not None:
+                self.store.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class SqliteStore:
+    """On-disk copy of a TTLCache. Values must be JSON serializable.
+
+    save() and delete() only queue the change; a background thread commits
+    the queue in one transaction every `flush_interval` seconds, so cache
+    readers (the ASGI event loop included) never wait on the disk. Repeated
+    writes to a key in between collapse into one row write. WAL with
+    synchronous=NORMAL skips the fsync per commit; a crash can lose the
+    last moments of writes, which a cache can afford."""
+
+    def __init__(self, path, table="cache", flush_interval=0.5):
+        self.path = path
+        self.table = table
+        self.flush_interval = flush_interval
+        self.reopen()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+        )
+        atexit.register(self.flush)
+
+    def reopen(self):
+        """New connection, e.g. in a worker forked from a preloading master
+        (SQLite connections must not be shared across fork). The writer
+        thread is started again on the next write."""
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.pending = {}  # key -> (value, expires_at), or None to delete
+        self.pid = None
+
+    def start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            threading.Thread(target=self.run, name=f"cache-store-{self.table}", daemon=True).start()
+            self.pid = os.getpid()
+
+    def run(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                telemetry.log_event("cache_store_failed", level=logging.WARNING, table=self.table, error=str(e))
+            # let the next writes gather into one batch
+            time.sleep(self.flush_interval)
+
+    def queue(self, key, entry):
+        with self.lock:
+            self.pending[key] = entry
+        self.wake.set()
+        if self.pid != os.getpid():
+            self.start()
+
+    def flush(self):
+        """Commits the queued writes now."""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+            if not batch:
+                return
+            self.conn.execute("BEGIN")
+            try:
+                for key, entry in batch.items():
+                    if entry is None:
+                        self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    else:
+                        self.conn.execute(
+                            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                            (key, json.dumps(entry[0]), entry[1])
+                        )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def load(self):
+        rows = self.conn.execute(
+            f"SELECT key, value, expires_at FROM {self.table} WHERE expires_at > ? ORDER BY rowid",
+            (time.time(),)
+        ).fetchall()
+        self.conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        return [(key, json.loads(value), expires_at) for key, value, expires_at in rows]
+
+    def save(self, key, value, expires_at):
+        self.queue(key, (value, expires_at))
+
+    def delete(self, key):
+        self.queue(key, None)
+
+    def clear(self):
+        with self.flush_lock:
+            with self.lock:
+                self.pending.clear()
+            self.conn.execute(f"DELETE FROM {self.table}")
@@ -196,33 +196,74 @@ async function searchFlights() {
 
 
 
- const res = await fetch("/api/flights", {
+ // Stream results: resolved codes arrive first, then one offer per line (NDJSON)
+ const res = await fetch("/api/flights/stream", {
    method: "POST",
-   headers: { "Content-Type": "application/json" },
+   headers: { "Content-Type": "application/json", "Accept": "application/x-ndjson" },
    body: JSON.stringify(payload),
  });
 
 
 
 
- const data = await res.json();
- console.log("flight results:", data);
+ // bad input still comes back as a plain JSON error
+ if (!res.ok || !res.body) {
+   const data = await res.json();
+   const msg = data.message ? ` (${data.message})` : "";
+   displayMessage("❌ " + data.error + msg, "bot");
+   return;
+ }
 
 
 
 
- // 🔥 ADD THIS BLOCK RIGHT HERE
- if (data.error) {
-   const msg = data.message ? ` (${data.message})` : "";
-   displayMessage("❌ " + data.error + msg, "bot");
-   return;
+ const offers = [];
+ const reader = res.body.getReader();
+ const decoder = new TextDecoder();
+ let buffered = "";
+
+
+
+
+ while (true) {
+   const { value, done } = await reader.read();
+   if (done) break;
+   buffered += decoder.decode(value, { stream: true });
+
+
+
+
+   const lines = buffered.split("\n");
+   buffered = lines.pop();
+
+
+
+
+   for (const line of lines) {
+     if (!line.trim()) continue;
+     const event = JSON.parse(line);
+
+
+
+
+     if (event.type === "resolved") {
+       displayMessage("🔎 Searching flights " + event.origin + " → " + event.destination + "...", "bot");
+     } else if (event.type === "offer") {
+       offers.push(event);
+     } else if (event.type === "error") {
+       const msg = event.message ? ` (${event.message})` : "";
+       displayMessage("❌ " + event.error + msg, "bot");
+       return;
+     }
+   }
  }
+ console.log("flight results:", offers);
 
 
 
 
  // ✅ If no error, continue rendering flights
- displayMessage("✈️ Found " + data.offers.length + " flights!", "bot");
+ displayMessage("✈️ Found " + offers.length + " flights!", "bot");
 
 
 
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from airport_geo import GeoIndex, haversine_km
+
+
+def random_airports(n, seed=7):
+    rng = random.Random(seed)
+    airports = []
+    for i in range(n):
+        # extra points near the poles and the antimeridian
+        lat = rng.choice([rng.uniform(-90, 90), rng.uniform(80, 90), rng.uniform(-90, -80)])
+        lon = rng.choice([rng.uniform(-180, 180), rng.uniform(175, 180), rng.uniform(-180, -175)])
+        airports.append({"lat": lat, "lon": lon, "iata": f"A{i:03d}", "city": f"City {i}", "name": f"Airport {i}"})
+    return airports
+
+
+AIRPORTS = random_airports(600)
+INDEX = GeoIndex(AIRPORTS, served=[a["iata"] for a in AIRPORTS])
+QUERIES = [(0.0, 179.9), (89.5, 10.0), (-85.0, -178.0), (40.6, -73.8), (12.0, 0.0)]
+
+
+def brute_force(lat, lon):
+    return sorted((haversine_km(lat, lon, a["lat"], a["lon"]), i) for i, a in enumerate(AIRPORTS))
+
+
+@pytest.mark.parametrize("lat, lon", QUERIES)
+@pytest.mark.parametrize("radius", [50, 500, 2000])
+def test_within_matches_brute_force(lat, lon, radius):
+    expected = [(km, i) for km, i in brute_force(lat, lon) if km <= radius]
+    found = INDEX.within(lat, lon, radius)
+    assert [i for _, i in found] == [i for _, i in expected]
+    assert [km for km, _ in found] == pytest.approx([km for km, _ in expected], abs=1e-6)
+
+
+@pytest.mark.parametrize("lat, lon", QUERIES)
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_nearest_matches_brute_force(lat, lon, k):
+    expected = brute_force(lat, lon)[:k]
+    found = INDEX.nearest(lat, lon, k)
+    assert [i for _, i in found] == [i for _, i in expected]
+    assert [km for km, _ in found] == pytest.approx([km for km, _ in expected], abs=1e-6)
+
+
+def test_nearest_respects_max_km():
+    km, _ = brute_force(*QUERIES[0])[0]
+    assert INDEX.nearest(*QUERIES[0], k=1, max_km=km - 1) == []
+
+
+PARIS = [
+    {"lat": 49.0128, "lon": 2.5500, "iata": "CDG", "city": "Paris", "name": "Charles de Gaulle International Airport"},
+    {"lat": 48.7233, "lon": 2.3794, "iata": "ORY", "city": "Paris", "name": "Paris-Orly Airport"},
+    {"lat": 48.9694, "lon": 2.4414, "iata": "LBG", "city": "Paris", "name": "Paris-Le Bourget Airport"},
+    {"lat": 49.4544, "lon": 2.1128, "iata": "BVA", "city": "Beauvais", "name": "Paris Beauvais Tille Airport"},
+    {"lat": 48.7519, "lon": 2.1061, "iata": "TNF", "city": "Toussus-le-noble", "name": "Toussus-le-Noble Airport"},
+    {"lat": 33.6373, "lon": -95.4508, "iata": "PRX", "city": "Paris", "name": "Cox Field"},
+]
+PARIS_INDEX = GeoIndex(PARIS, served=["CDG", "ORY", "BVA"])
+
+
+def test_airports_without_scheduled_service_are_skipped():
+    assert PARIS_INDEX.nearby_iata("CDG", 100, limit=5) == ["CDG", "ORY", "BVA"]
+    codes = [PARIS[i]["iata"] for _, i in PARIS_INDEX.within(49.0, 2.5, 100, commercial=False)]
+    assert {"LBG", "TNF"} <= set(codes)
+
+
+def test_city_codes_search_around_the_city():
+    assert PARIS_INDEX.nearby_iata("PAR", 100) == ["PAR", "BVA"]
+    assert PARIS_INDEX.nearby_iata("XXX", 100) == ["XXX"]
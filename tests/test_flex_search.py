@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+
+from flex_search import FlexScheduler, calendar_summary, cheapest, date_grid
+
+
+def day(offset):
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+def test_round_trip_grid():
+    cells = date_grid(day(30), day(37), window=1)
+    assert len(cells) == 9
+    assert cells[0] == (day(29), day(36))
+    assert cells[-1] == (day(31), day(38))
+
+
+def test_return_stays_after_depart():
+    cells = date_grid(day(30), day(31), window=2)
+    assert all(back > dep for dep, back in cells)
+    assert (day(30), day(29)) not in cells
+    assert (day(32), day(33)) in cells
+
+
+def test_one_way_grid_varies_the_departure_only():
+    assert date_grid(day(30), None, window=2) == [(day(d), None) for d in range(28, 33)]
+
+
+def test_past_departures_are_skipped():
+    cells = date_grid(day(1), None, window=3)
+    assert [dep for dep, _ in cells] == [day(d) for d in range(0, 5)]
+
+
+def test_cheapest_skips_unparsable_prices():
+    offers = [{"id": "1", "price": {"total": "n/a"}}, {"id": "2", "price": {"total": "310.50", "currency": "EUR"}},
+              {"id": "3", "price": {"total": "99.00", "currency": "EUR"}}, {"id": "4"}]
+    assert cheapest(offers) == {"total": 99.0, "currency": "EUR", "offer_id": "3"}
+    assert cheapest([]) is None
+
+
+def test_scheduler_runs_each_cell_once_and_reports_errors():
+    prices = {day(29): "250.00", day(30): "180.00"}
+
+    def search(dep, ret):
+        if dep not in prices:
+            raise RuntimeError("upstream down")
+        return [{"id": dep, "price": {"total": prices[dep], "currency": "EUR"}}]
+
+    cells = date_grid(day(30), None, window=1)
+    found = list(FlexScheduler(search, max_concurrency=2).run(cells + cells))
+    assert len(found) == 3
+
+    summary = calendar_summary(found)
+    assert [c["depart_date"] for c in summary["cells"]] == [day(29), day(30), day(31)]
+    assert summary["cells"][2]["error"] == "upstream down"
+    assert summary["cheapest"]["cheapest"] == {"total": 180.0, "currency": "EUR", "offer_id": day(30)}
@@ -0,0 +1,48 @@
+import requests
+
+from amadeus_api import AmadeusAPI
+from rate_limiter import RateLimited
+
+
+def api_with_chunks(fail):
+    """AmadeusAPI whose get_hotel_offers answers from memory; `fail` maps the
+    first hotel id of a chunk to an exception or an errors payload."""
+    api = AmadeusAPI.__new__(AmadeusAPI)
+
+    def get_hotel_offers(chunk, *args):
+        outcome = fail.get(chunk[0])
+        if isinstance(outcome, Exception):
+            raise outcome
+        if outcome is not None:
+            return outcome
+        return {"data": [{"hotel": {"hotelId": h}, "offers": [{"price": {"total": str(100 + int(h[1:]))}}]}
+                         for h in chunk]}
+
+    api.get_hotel_offers = get_hotel_offers
+    return api
+
+
+def hotel_ids(n):
+    return [f"H{i}" for i in range(n)]
+
+
+def test_failing_chunk_keeps_the_other_chunks():
+    api = api_with_chunks({"H20": RateLimited("shopping", "no capacity within 30s")})
+    found = api.filter_hotels(hotel_ids(60), "2026-06-01", "2026-06-03", 1, 1, None)
+    assert len(found["data"]) == 40
+    assert found["errors"] == [{"title": "RateLimited", "detail": "shopping: no capacity within 30s"}]
+
+
+def test_upstream_errors_are_passed_through():
+    error = {"status": 400, "code": 1257, "title": "INVALID PROPERTY CODE"}
+    api = api_with_chunks({"H0": {"errors": [error]}, "H40": requests.ConnectionError("reset")})
+    found = api.filter_hotels(hotel_ids(60), "2026-06-01", "2026-06-03", 1, 1, None)
+    assert [h["hotel"]["hotelId"] for h in found["data"]] == [f"H{i}" for i in range(20, 40)]
+    assert error in found["errors"]
+    assert {"title": "ConnectionError", "detail": "reset"} in found["errors"]
+
+
+def test_no_errors_key_when_every_chunk_succeeds():
+    found = api_with_chunks({}).filter_hotels(hotel_ids(30), "2026-06-01", "2026-06-03", 1, 1, None)
+    assert len(found["data"]) == 30
+    assert "errors" not in found
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+import planner_context
+from bench_planner_context import sample_itinerary
+from planner_context import compact, count_tokens
+
+ITINERARY = sample_itinerary()
+
+
+@pytest.mark.parametrize("fmt, budget", [("text", 250), ("text", 400), ("text", 600),
+                                         ("json", 450), ("json", 700), ("json", 1000)])
+def test_compact_stays_within_the_budget(fmt, budget):
+    context = compact(ITINERARY, budget=budget, fmt=fmt)
+    assert context.fits
+    assert context.tokens <= budget
+    assert context.tokens == count_tokens(context.text)
+
+
+def test_budget_drops_rows_from_the_longest_list_first():
+    full = compact(ITINERARY)
+    assert full.rows == dict(planner_context.LIMITS, transfers=len(ITINERARY["transfers"]["data"]))
+    cut = compact(ITINERARY, budget=full.tokens - 1)
+    assert cut.rows["activities"] == planner_context.LIMITS["activities"] - 1
+    assert {k: v for k, v in cut.rows.items() if k != "activities"} == \
+        {k: v for k, v in full.rows.items() if k != "activities"}
+
+
+def test_budget_too_small_keeps_one_row_each():
+    context = compact(ITINERARY, budget=10)
+    assert not context.fits
+    assert context.rows == {"flights": 1, "hotels": 1, "activities": 1, "transfers": 1}
+
+
+def test_json_tables_list_only_the_codes_the_rows_use():
+    context = compact(ITINERARY, fmt="json", limits={"flights": 1})
+    payload = json.loads(context.text)
+    assert len(payload["flights"]["rows"]) == 1
+    row = " ".join(payload["flights"]["rows"][0][1:])
+    assert payload["carriers"] and all(code in row for code in payload["carriers"])
+    assert payload["airports"] and all(code in row for code in payload["airports"])
+
+
+def test_missing_sections_and_errors():
+    context = compact({"query": {"origin": "JFK", "destination": "CDG"}, "errors": {"hotels": "timeout"}})
+    assert context.text.splitlines() == ["TRIP JFK>CDG .. adults=1", "UNAVAILABLE hotels=timeout"]
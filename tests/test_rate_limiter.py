@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from rate_limiter import HIGH, LOW, NORMAL, RateGovernor, RateLimited, RateLimiter, SqliteState, TokenBucket
+
+
+def test_token_bucket_spends_the_burst_then_refills():
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    bucket.updated -= 1.0  # one second later: two tokens back
+    assert [bucket.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+def test_token_bucket_never_holds_more_than_the_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+    bucket.updated -= 60
+    assert [bucket.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+def wait_for_queue(limiter, n):
+    deadline = time.monotonic() + 2
+    while len(limiter.waiters) < n:
+        assert time.monotonic() < deadline, "waiters never queued"
+        time.sleep(0.001)
+
+
+def test_higher_lanes_are_served_first():
+    limiter = RateLimiter("shopping", rate=50, burst=1)
+    limiter.pause(0.3)  # everyone below queues up before the first token
+    order = []
+
+    def call(label, priority):
+        limiter.acquire(priority, timeout=5)
+        order.append(label)
+
+    threads = []
+    for label, priority in [("low1", LOW), ("low2", LOW), ("normal", NORMAL), ("high", HIGH)]:
+        threads.append(threading.Thread(target=call, args=(label, priority)))
+        threads[-1].start()
+        wait_for_queue(limiter, len(threads))
+    for t in threads:
+        t.join()
+
+    assert order == ["high", "normal", "low1", "low2"]
+    assert limiter.metrics()["granted"] == {"high": 1, "normal": 1, "low": 2}
+
+
+def test_monthly_reserve_is_kept_for_the_high_lane():
+    limiter = RateLimiter("booking", rate=1000, burst=100, monthly_quota=20, reserve=0.1)
+    for _ in range(18):
+        limiter.acquire(NORMAL)
+    with pytest.raises(RateLimited, match="monthly quota exhausted"):
+        limiter.acquire(NORMAL)
+    limiter.acquire(HIGH)
+    limiter.acquire(HIGH)
+    with pytest.raises(RateLimited):
+        limiter.acquire(HIGH)
+
+    stats = limiter.metrics()
+    assert stats["month_used"] == 20
+    assert stats["month_remaining"] == 0
+    assert stats["rejected"] == 2
+
+
+def test_timeout_leaves_the_queue():
+    limiter = RateLimiter("shopping", rate=1, burst=1)
+    limiter.acquire()
+    with pytest.raises(RateLimited, match="no capacity within 0.05s"):
+        limiter.acquire(timeout=0.05)
+    assert limiter.waiters == []
+    assert limiter.metrics()["timeouts"] == 1
+
+
+def test_async_waiters_keep_lane_order():
+    limiter = RateLimiter("shopping", rate=50, burst=1)
+    order = []
+
+    async def call(label, priority):
+        await limiter.acquire_async(priority, timeout=5)
+        order.append(label)
+
+    async def main():
+        limiter.pause(0.2)
+        tasks = [asyncio.create_task(call("low", LOW))]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(call("high", HIGH)))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["high", "low"]
+    assert limiter.waiters == []
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    limiter = RateLimiter("shopping", rate=1, burst=1)
+
+    async def main():
+        await limiter.acquire_async()
+        task = asyncio.create_task(limiter.acquire_async(timeout=5))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert limiter.waiters == []
+
+
+def test_shared_state_counts_across_governors(tmp_path):
+    path = str(tmp_path / "rate.db")
+    limits = {"shopping": {"rate": 1000, "burst": 100, "monthly_quota": 5}}
+    first, second = RateGovernor(limits, store_path=path), RateGovernor(limits, store_path=path)
+    assert isinstance(first.state, SqliteState)
+
+    async def main():
+        for governor in (first, second, first, second):
+            await governor.acquire_async("shopping")
+
+    asyncio.run(main())
+    second.acquire("shopping")
+    assert first.metrics()["shopping"]["month_used"] == 5
+    with pytest.raises(RateLimited):
+        first.acquire("shopping")
+
+
+@pytest.mark.parametrize("target, family", [
+    ("https://test.api.amadeus.com/v2/shopping/flight-offers", "shopping"),
+    ("/v1/booking/flight-orders", "booking"),
+    ("/v1/reference-data/locations", "reference-data"),
+    ("https://test.api.amadeus.com/v1/security/oauth2/token", None),
+])
+def test_family_for(target, family):
+    assert RateGovernor.family_for(target) == family
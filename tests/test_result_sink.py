@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+
+import pytest
+
+from result_sink import BackgroundWriter, JsonlSink, ResultSink, make_sink
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class BlockedSink(ResultSink):
+    def __init__(self):
+        self.release = threading.Event()
+        self.records = []
+
+    def write_batch(self, records):
+        self.release.wait(5)
+        self.records.extend(records)
+
+
+def test_close_writes_what_was_queued(tmp_path):
+    path = tmp_path / "results.jsonl"
+    writer = BackgroundWriter(lambda: JsonlSink(path), flush_interval=0.05)
+    for i in range(5):
+        writer.submit({"id": i})
+    writer.close()
+    assert [r["id"] for r in read_lines(path)] == list(range(5))
+    assert writer.stats() == {"queued": 0, "written": 5, "dropped": 0, "errors": 0}
+
+
+def test_sink_is_only_built_on_the_first_submit(tmp_path):
+    path = tmp_path / "results.jsonl"
+    writer = BackgroundWriter(lambda: JsonlSink(path))
+    assert not path.exists()
+    writer.submit({"id": 1})
+    assert path.exists()
+    writer.close()
+
+
+def test_full_queue_drops_instead_of_blocking():
+    sink = BlockedSink()
+    writer = BackgroundWriter(sink, batch_size=1, flush_interval=0.01, max_queue=2)
+    for i in range(10):
+        writer.submit({"id": i})
+    assert writer.stats()["dropped"] >= 7
+    sink.release.set()
+    writer.close()
+    assert len(sink.records) + writer.stats()["dropped"] == 10
+
+
+def test_check_fails_on_a_bad_sink(tmp_path):
+    with pytest.raises(ValueError, match="Unknown result sink"):
+        BackgroundWriter(lambda: make_sink("parquet", str(tmp_path / "x"))).check()
+    with pytest.raises(OSError):
+        BackgroundWriter(lambda: make_sink("jsonl", str(tmp_path / "missing" / "x.jsonl"))).check()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_worker_gets_its_own_thread_and_sink(tmp_path):
+    writer = BackgroundWriter(lambda: JsonlSink(tmp_path / f"{os.getpid()}.jsonl"), flush_interval=0.05)
+    writer.submit({"from": "parent"})
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            writer.submit({"from": "child"})
+            writer.close()
+            code = 0 if writer.stats()["written"] == 1 else 1
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    writer.close()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert read_lines(tmp_path / f"{os.getpid()}.jsonl") == [{"from": "parent"}]
+    assert read_lines(tmp_path / f"{pid}.jsonl") == [{"from": "child"}]
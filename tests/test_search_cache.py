@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from search_cache import SearchCache, search_key
+
+PARAMS = {"originLocationCode": "JFK", "destinationLocationCode": "CDG", "departureDate": "2026-06-01"}
+
+
+def test_search_key_normalizes_params():
+    assert search_key({"a": " jfk ", "b": None, "c": 1}) == search_key({"c": 1, "a": "JFK"})
+
+
+def test_concurrent_searches_make_one_upstream_call():
+    cache = SearchCache(ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return {"data": ["offer"]}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch(PARAMS, fetch)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    while cache.stats()["coalesced"] < 7:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"data": ["offer"]}] * 8
+    assert cache.get_or_fetch(PARAMS, fetch) == {"data": ["offer"]}
+    assert len(calls) == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = SearchCache(ttl=60)
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch(PARAMS, fail)
+    assert cache.get_or_fetch(PARAMS, lambda: "ok") == "ok"
+    assert cache.stats()["upstream_calls"] == 2
+
+
+def test_stale_result_is_served_while_a_slow_refresh_runs():
+    cache = SearchCache(ttl=60, stale_ttl=600, fresh_timeout=0.05)
+    cache.get_or_fetch(PARAMS, lambda: "old")
+    key = search_key(PARAMS)
+    fetched_at, result = cache.cache.get(key)
+    cache.cache.set(key, (fetched_at - 120, result))  # two minutes past fresh
+    release = threading.Event()
+
+    def slow():
+        release.wait(2)
+        return "new"
+
+    assert cache.get_or_fetch(PARAMS, slow) == "old"
+    assert cache.stats()["stale_served"] == 1
+    release.set()
+    cache.pool.shutdown(wait=True)
+    assert cache.get_or_fetch(PARAMS, slow) == "new"
+
+
+def test_async_searches_are_coalesced():
+    cache = SearchCache(ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "offers"
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_fetch_async(PARAMS, fetch) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["offers"] * 10
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 9
+
+
+def test_cancelling_the_leader_does_not_cancel_the_fetch():
+    cache = SearchCache(ttl=60)
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "offers"
+
+    async def main():
+        leader = asyncio.create_task(cache.get_or_fetch_async(PARAMS, fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_fetch_async(PARAMS, fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await waiter
+
+    assert asyncio.run(main()) == "offers"
+    assert cache.stats()["upstream_calls"] == 1
@@ -0,0 +1,60 @@
+from ttl_cache import MISSING, SqliteStore, TTLCache
+
+
+def test_entries_expire():
+    cache = TTLCache(ttl=60)
+    cache.set("fresh", 1)
+    cache.set("old", 2, ttl=-1)
+    assert cache.get("fresh") == 1
+    assert cache.get("old") is MISSING
+    assert cache.get("old", "default") == "default"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+    assert len(cache) == 1
+
+
+def test_negative_results_use_the_negative_ttl():
+    cache = TTLCache(ttl=60, negative_ttl=-1)
+    cache.set("nothing", None)
+    assert cache.get("nothing") is MISSING
+
+    cache = TTLCache(ttl=60, negative_ttl=60)
+    cache.set("nothing", None)
+    assert cache.get("nothing") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_peek_leaves_lru_order_alone():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1
+    cache.set("c", 3)
+    assert cache.peek("a") is MISSING
+    assert cache.stats()["hits"] == 0
+
+
+def test_store_warms_a_new_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = TTLCache(maxsize=3, store=SqliteStore(path))
+    cache.set("a", {"iata": "CDG"})
+    cache.set("b", None)
+    cache.set("c", ["LHR"])
+    cache.set("gone", 1, ttl=-1)  # evicts "a" from the store too
+    cache.store.flush()
+
+    warm = TTLCache(maxsize=3, store=SqliteStore(path))
+    assert warm.get("a") is MISSING
+    assert warm.get("b") is None
+    assert warm.get("c") == ["LHR"]
+    assert warm.get("gone") is MISSING